@@ -2,21 +2,61 @@ import customtkinter as ctk
 import json
 import os
 import datetime
-import openpyxl
-import shutil
+import threading
 
-from CTkMessagebox import CTkMessagebox
-from PIL import Image, ImageDraw, ImageOps
 from pathlib import Path
 from customtkinter import filedialog
+from asset_store import AssetStore
+from catalog import Catalog, Item, inventory_from_json, inventory_to_json
+from catalog_io import apply_catalog, export_catalog, validate_catalog
+from history_export import ExportCancelled, column_widths, export_history
+from history_query import filter_days, parse_day
+from history_view import HistoryView
+from instrumentation import timed
+from io_executor import DebouncedWriter, IOExecutor, UIDispatcher
+from outbox import open_outbox
+from storage import STORAGE_ERRORS, empty_amounts, open_store
+from thumbnail_cache import ThumbnailCache
+from virtual_grid import VirtualGrid
+
+
+def CTkMessagebox(*args, **kwargs):
+    """Show a CTkMessagebox (the package is imported on first use to keep startup fast)"""
+    from CTkMessagebox import CTkMessagebox as messagebox
+    return messagebox(*args, **kwargs)
 
 
 class InventoryManagement:
     """Manages inventory, tracks purchases, and handles UI interactions"""
 
+    # Catalogs larger than this use the virtualized grid (INVENTORY_GRID=auto|virtual|standard)
+    VIRTUAL_GRID_THRESHOLD = 200
+
+    # Inventory saves within this window (ms) are merged into one write
+    SAVE_DELAY_MS = int(os.environ.get("INVENTORY_SAVE_DELAY_MS", 250))
+
+    # Exports with more transactions than this also offer CSV / JSONL
+    EXPORT_FAST_THRESHOLD = 50000
+
+    # Matches listed in the searchable pickers of the edit / remove windows
+    PICKER_LIMIT = 50
+
+    @timed("ui.refresh_inventory_from_firebase")
     def refresh_inventory_from_firebase(self):
         """Refresh the inventory from the local JSON file after a Firebase update"""
-        self.inventory = self.load_inventory()
+        # Read the file in the background, then apply it on the UI thread
+        self.io.submit(self.read_inventory, on_done=self.apply_inventory,
+                       on_error=lambda e: print(f"⚠️ Could not reload inventory: {e}"))
+
+
+    @timed("ui.apply_inventory")
+    def apply_inventory(self, inventory):
+        """Show a freshly loaded inventory (UI thread)"""
+        if inventory == self.inventory:
+            return  # Nothing changed, leave the grid alone
+
+        self.inventory = inventory
+        self.catalog.load(inventory)
         self.refresh_inventory_display()
         print("🔄 Inventory updated from Firebase")
     
@@ -27,6 +67,11 @@ class InventoryManagement:
         self.root.title("Furniture Inventory Management")
         self.root.attributes("-fullscreen", True)
 
+        # Disk and network I/O run on background workers; results come back through root.after
+        self.ui = UIDispatcher(self.root)
+        self.io = IOExecutor(self.ui)                           # Ordered writes
+        self.background = IOExecutor(self.ui, name="export")    # Long jobs (exports)
+
         # Apply Modern Theme
         ctk.set_appearance_mode("dark")
         ctk.set_default_color_theme("blue")
@@ -50,35 +95,43 @@ class InventoryManagement:
             "export": self.inventory_dir
         }
 
+        # Storage backend for inventory, totals and history (INVENTORY_STORAGE=json|sqlite)
+        self.store = open_store(self.inventory_dir)
+
+        # Item changes queued for Firebase (uploaded in batches by the sync engine, kept while offline)
+        self.outbox = open_outbox(self.inventory_dir)
+
+        # +/- taps mark their item dirty; the changed items are written once per save window
+        self.inventory_writer = DebouncedWriter(
+            self.root, self.io, self.snapshot_items, self.store.save_items,
+            delay_ms=self.SAVE_DELAY_MS,
+            on_error=lambda e: CTkMessagebox(
+                title="Error", 
+                message=f"Failed to save inventory: {e}", 
+                icon="cancel"))
+
+        # Rounded product thumbnails cached on disk and in memory across refreshes
+        # Thumbnails not in memory are prepared on a worker pool and stream into the grid
+        self.thumbnails = ThumbnailCache(Path.cwd() / "assets" / ".thumbnails", dispatch=self.ui.call)
+        # Picked images are stored once under their content hash, with the display-size derivative
+        self.assets = AssetStore(Path.cwd() / "assets", self.thumbnails)
+        self.images_ready = False   # Cards show the placeholder until load_images() runs after the first frame
+        self.sync_service = None    # In-process Firebase sync engine, set once it is running
+
         self.inventory = self.load_inventory()  # Load or initialize inventory
+        self.catalog = Catalog(self.inventory)  # Indexes over the inventory (name, image, price band)
         self.item_labels = {}   # Dictionary to store item labels for updating
         self.quantity_vars = {} # Quantity for each items
+        self.cart_mode = False  # When on, "Add" collects items in the cart instead of selling them one by one
+        self.cart = {}          # Basket waiting for checkout ({item: quantity})
+        self.search_text = ""   # Text typed in the search bar (the grid shows only its matches)
         self.create_ui()    # Build UI
             
                 
     def load_inventory(self):
         """Load inventory from JSON file or create a default one if it doesn't exist"""
-        json_path = self.file_paths["inventory"]
-
         try:
-            if json_path.exists():
-                with json_path.open("r") as file:
-                    inventory = json.load(file)
-
-                    # Ensure the inventory is always a dictionary
-                    if not isinstance(inventory, dict):
-                        raise ValueError("Invalid inventory format")
-                    
-                    # Ensure all items have a quantity field
-                    for item, data in inventory.items():
-                        if isinstance(data, int):   # Convert old format (integer) to new dict format
-                            inventory[item] = {"price": 100, "quantity": data} 
-                        # elif isinstance(data, dict) and "quantity" not in data:
-                        elif isinstance(data, dict):
-                            inventory[item]["quantity"] = data.get("quantity", 0)
-                            inventory[item]["price"] = data.get("price", 100)
-            else:
-                inventory = {}
+            return self.read_inventory()
 
         except (json.JSONDecodeError, ValueError):
             CTkMessagebox(
@@ -86,35 +139,69 @@ class InventoryManagement:
                 message="Inventory file is corrupted or invalid. Resetting inventory", 
                 icon="cancel")
             inventory = {}
+        except STORAGE_ERRORS as e:
+            CTkMessagebox(
+                title="Error", 
+                message=f"Failed to load inventory: {e}", 
+                icon="cancel")
+            return {}
+
+        self.io.submit(self.store.save_inventory, inventory)
+        return inventory
+
+
+    @timed("ui.read_inventory")
+    def read_inventory(self):
+        """Read and validate the stored inventory into Item records (no UI calls, safe on a worker thread)"""
+        # Legacy integer records and missing price/quantity fields are handled here, once
+        stored = self.store.load_inventory()
+        inventory = inventory_from_json(stored)
 
         # Reset all quantities to 0 on startup
         for item in inventory.values():
-            item["quantity"] = 0
+            item.quantity = 0
 
-        self.save_inventory(inventory)  # Save the updated inventory with reset quantities
+        # Legacy image paths (plain file names, Windows separators) move into the asset store once
+        adopted = self.assets.adopt(inventory)
+        if adopted:
+            self.outbox.put_many({f"inventory/{item}": inventory[item].to_json() for item in adopted})
+
+        # Save the updated inventory with reset quantities (only when that changed anything)
+        normalized = inventory_to_json(inventory)
+        if normalized != stored:
+            self.store.save_inventory(normalized)
 
         return inventory
 
 
-    def save_inventory(self, data=None):
-        """Save inventory data to JSON file safely"""
+    def snapshot_inventory(self, data=None):
+        """Plain-dict copy of the inventory so a worker thread can write it while the UI keeps changing it"""
         if data is None:
             data = self.inventory
-        
-        json_path = self.file_paths["inventory"]
+        return inventory_to_json(data)
 
-        try:
-            json_path.parent.mkdir(parents=True, exist_ok=True) # Ensure directory exists before saving
 
-            # Write to file safely with utf-8 encoding
-            with json_path.open("w", encoding="utf-8") as file:
-                json.dump(data, file, indent=4)
+    def snapshot_items(self, items):
+        """Plain-dict copy of some items ({id: record}, None for removed ones) for the I/O worker"""
+        return {item: self.inventory[item].to_json() if item in self.inventory else None for item in items}
 
-        except (OSError, IOError) as e:
-            CTkMessagebox(
-                title="Error", 
-                message=f"Failed to save inventory: {e}", 
-                icon="cancel")
+
+    @timed("ui.save_inventory")
+    def save_inventory(self, *items):
+        """Mark these items dirty; changes within the save window are written once, atomically"""
+        self.inventory_writer.mark_dirty(*items)
+
+
+    def release_image(self, image):
+        """Delete a stored image in the background once no item uses it (looked up in the image index)"""
+        if image and not self.catalog.with_image(image):
+            self.io.submit(self.assets.discard, image)
+
+
+    def queue_item_upload(self, *items):
+        """Queue the current state of these items for Firebase (deleted items are removed remotely)"""
+        writes = {f"inventory/{item}": self.inventory[item].to_json() if item in self.inventory else None for item in items}
+        self.io.submit(self.outbox.put_many, writes)
 
 
     def create_ui(self):
@@ -133,6 +220,20 @@ class InventoryManagement:
 
         self.create_button("Reset Total", self.reset_total, x=200, y=15, width=140, height=40)  # Reset Button
 
+        # Cart: collect a customer's items and commit them together
+        self.cart_button = self.create_button("🛒 Cart: Off", self.toggle_cart_mode, x=360, y=15, width=140, height=40)
+        self.cart_label = ctk.CTkLabel(self.root, text="", font=("Arial", 18, "bold"))
+        self.cart_label.place(x=520, y=20)
+        self.create_button("Checkout", self.checkout_cart, x=760, y=15, width=120, height=40)
+        self.create_button("Clear Cart", self.clear_cart, x=890, y=15, width=120, height=40)
+        self.update_cart_label()
+
+        # Search bar: filters the grid as the user types
+        self.search_entry = ctk.CTkEntry(self.root, placeholder_text="🔍 Search items", font=("Arial", 18), width=330, height=40)
+        self.search_entry.place(x=1030, y=15)
+        self.search_entry.bind("<KeyRelease>", lambda event: self.search_inventory(self.search_entry.get()))
+        self.create_button("✖", self.clear_search, x=1370, y=15, width=40, height=40)
+
         # Create the scrollable inventory area
         self.create_scrollable_inventory()
         self.populate_inventory()
@@ -149,6 +250,8 @@ class InventoryManagement:
 
         self.create_button("Exit", self.confirm_exit, frame=button_frame, width=140, height=50)
         self.create_button("Export History", self.export_history_to_excel, frame=button_frame, width=180, height=50)
+        self.create_button("Export Catalog", self.export_catalog_file, frame=button_frame, width=180, height=50)
+        self.create_button("Import Catalog", self.import_catalog_file, frame=button_frame, width=180, height=50)
 
         add_button = ctk.CTkButton(master=self.root, font=("Arial", 18), text="➕ Add", width=140, height=50, command=self.create_add_window)
         add_button.place(x=1430, y=10)   
@@ -160,6 +263,7 @@ class InventoryManagement:
         remove_button.place(x=1750, y=10)
 
 
+    @timed("ui.create_add_window")
     def create_add_window(self):
         add_window = ctk.CTkToplevel(self.root)
         add_window.title("Add Equipment")
@@ -190,11 +294,7 @@ class InventoryManagement:
                 filetypes=[("Image Files", "*.png;*.jpg;*.jpeg;*.gif")]
             )
             if file_path:
-                # Copy the selected image to the assets folder
-                destination = f"assets/{file_path.split('/')[-1]}"
-                shutil.copy(file_path, destination)
-                image_path.set(destination) # Update path to the copied location
-                image_label.configure(text=file_path.split("/")[-1])    # Show the file name
+                self.import_image(file_path, image_path, image_label)
         
         image_button = ctk.CTkButton(add_window, text="Upload Image", font=("Arial", 16), command=select_image)
         image_button.pack(pady=(15, 5))
@@ -217,15 +317,31 @@ class InventoryManagement:
         # cancel_button.pack(pady=40)
         
         
+    def import_image(self, file_path, image_path, image_label):
+        """Store a picked image in the asset store (hash, copy, thumbnail) in the background"""
+        image_label.configure(text=f"Importing {os.path.basename(file_path)}...")
+
+        def imported(path):
+            image_path.set(path)    # Stored, deduplicated location
+            image_label.configure(text=os.path.basename(file_path))    # Show the file name
+
+        def failed(e):
+            image_label.configure(text="No file selected")
+            CTkMessagebox(title="Error", message=f"Could not import the image: {e}", icon="cancel")
+
+        self.io.submit(self.assets.import_image, file_path, on_done=imported, on_error=failed)
+
+
+    @timed("ui.create_edit_window")
     def create_edit_window(self):
         edit_window = ctk.CTkToplevel(self.root)
         edit_window.title("Edit Equipment")
-        edit_window.geometry("400x420")
+        edit_window.geometry("400x460")
         edit_window.attributes("-topmost", True)
 
         # Center the window dynamically
         edit_window.update_idletasks()
-        window_width, window_height = 400, 420
+        window_width, window_height = 400, 460
         screen_width = edit_window.winfo_screenwidth()
         screen_height = edit_window.winfo_screenheight()
         x_position = (screen_width // 2) - (window_width // 2)
@@ -237,11 +353,8 @@ class InventoryManagement:
         name_label = ctk.CTkLabel(edit_window, text="Select Equipment:", font=("Arial", 16))
         name_label.pack(pady=5)
 
-        equipment_names = list(self.inventory.keys())
-        selected_name = ctk.StringVar(value=equipment_names[0] if equipment_names else "")
-
-        dropdown = ctk.CTkOptionMenu(edit_window, variable=selected_name, values=equipment_names)
-        dropdown.pack(pady=5)
+        selected_name = ctk.StringVar()
+        self.create_item_picker(edit_window, selected_name)
 
         # Prefill Fields with Selected Equipment Data
         image_path = ctk.StringVar()
@@ -254,8 +367,8 @@ class InventoryManagement:
             if selected_item and selected_item in self.inventory:
                 data = self.inventory[selected_item]
                 new_name_var.set(selected_item)
-                new_price_var.set(str(data.get("price", "")))
-                image_path.set(data.get("image", ""))
+                new_price_var.set(str(data.price))
+                image_path.set(data.image or "")
 
                 # Update Image Label
                 image_label.configure(text=os.path.basename(image_path.get()) if image_path.get() else "No file selected")
@@ -274,15 +387,7 @@ class InventoryManagement:
                 filetypes=[("Image Files", "*.png;*.jpg;*.jpeg;*.gif")]
             )
             if file_path:
-                destination = os.path.join("assets", os.path.basename(file_path))
-
-                try:
-                    shutil.copy(file_path, destination)  # Copy image to assets
-
-                    image_path.set(destination)  # Store image path
-                    image_label.configure(text=os.path.basename(file_path))  # Update UI
-                except Exception as e:
-                    print(f"Error copying file: {e}")  # Debugging error
+                self.import_image(file_path, image_path, image_label)
 
                 
         image_button = ctk.CTkButton(edit_window, text="Upload Image", font=("Arial", 16), command=select_image)
@@ -315,18 +420,20 @@ class InventoryManagement:
                 return
 
             if name:
-                if new_name and new_name != name:
-                    self.inventory[new_name] = self.inventory.pop(name)
-
-                self.inventory[new_name]["price"] = new_price
+                try:
+                    self.catalog.rename(name, new_name)
+                except ValueError as e:
+                    CTkMessagebox(title="Error", message=f"Cannot rename: {e}", icon="cancel")
+                    return
 
-                if new_image:
-                    self.inventory[new_name]["image"] = new_image
-                else:
-                    # Retain old image if not changed
-                    self.inventory[new_name]["image"] = self.inventory[new_name].get("image", "")
+                # Retain old image if not changed
+                old_image = self.inventory[new_name].image
+                self.catalog.update(new_name, price=new_price, image=new_image or old_image or "")
+                if new_image and new_image != old_image:
+                    self.release_image(old_image)
 
-                self.save_inventory()
+                self.save_inventory(name, new_name)
+                self.queue_item_upload(name, new_name)
                 self.refresh_inventory_display()
                 edit_window.destroy()
                 CTkMessagebox(title="Success", message=f"Equipment {new_name} updated successfully", icon="info")
@@ -338,6 +445,7 @@ class InventoryManagement:
         # Trigger field update on open
         update_fileds()
     
+    @timed("ui.create_remove_window")
     def create_remove_window(self):
         remove_window = ctk.CTkToplevel(self.root)
         remove_window.title("Remove Equipment")
@@ -353,18 +461,39 @@ class InventoryManagement:
         y_position = (screen_height // 2) - (window_height // 2)
         remove_window.geometry(f"{window_width}x{window_height}+{x_position}+{y_position}")
 
-        # Dropdown Menu
-        equipment_names = list(self.inventory.keys())
+        # Searchable Dropdown Menu
         selected_item = ctk.StringVar()
-        dropdown = ctk.CTkComboBox(remove_window, values=equipment_names, variable=selected_item)
-        dropdown.pack(pady=(100, 20))
+        self.create_item_picker(remove_window, selected_item, pady=(80, 5))
 
         # Remove Button
         remove_button = ctk.CTkButton(remove_window, text="Remove", font=("Arial", 18), command=lambda: self.remove_equipment(selected_item.get(), remove_window))
         remove_button.pack(pady=20)
         
     
+    def create_item_picker(self, window, variable, pady=5):
+        """Search entry above a dropdown of the matching items (first PICKER_LIMIT), selecting into variable"""
+        search_entry = ctk.CTkEntry(window, placeholder_text="🔍 Type to search", width=200)
+        search_entry.pack(pady=pady)
+
+        matches = self.catalog.search("", limit=self.PICKER_LIMIT)
+        variable.set(matches[0] if matches else "")
+        dropdown = ctk.CTkOptionMenu(window, variable=variable, values=matches)
+        dropdown.pack(pady=5)
+
+        def filter_items(event=None):
+            """Answer each keystroke from the catalog's search index"""
+            matches = self.catalog.search(search_entry.get(), limit=self.PICKER_LIMIT)
+            dropdown.configure(values=matches)
+            if variable.get() not in matches:
+                variable.set(matches[0] if matches else "")
+
+        search_entry.bind("<KeyRelease>", filter_items)
+        return dropdown
+
+
+    @timed("ui.add_equipment")
     def add_equipment(self, name, image_path, price, window):
+        name = name.strip()
         if not name or not image_path or not price.isdigit():
             CTkMessagebox(
                 title="Invalid Input",
@@ -373,15 +502,17 @@ class InventoryManagement:
             )
             return
         
-        new_item = {
-            "name": name,
-            "image": image_path,
-            "price": float(price),
-            "quantity": 0
-        }
+        new_item = Item(price=float(price), quantity=0, image=image_path, name=name)
         
-        self.inventory[name.lower()] = new_item
-        self.save_inventory()
+        # The typed name is the item's canonical ID (same key locally and in Firebase)
+        try:
+            self.catalog.add(name, new_item)
+        except ValueError as e:
+            CTkMessagebox(title="Invalid Input", message=f"Cannot add {name}: {e}", icon="cancel")
+            return
+
+        self.save_inventory(name)
+        self.queue_item_upload(name)
         window.destroy()
         self.refresh_inventory_display()
         CTkMessagebox(
@@ -391,6 +522,7 @@ class InventoryManagement:
         )
 
 
+    @timed("ui.remove_equipment")
     def remove_equipment(self, item_name, remove_window):
         """Safely remove an item from the inventory"""
         # Confirmation Dialog
@@ -404,16 +536,15 @@ class InventoryManagement:
         if confirm != "Yes":
             return
 
-        inventory_keys = {k.lower(): k for k in self.inventory.keys()}  # Map lowercase to original keys
-        item_name_lower = item_name.lower()
+        original_name = self.catalog.find(item_name)   # Case-insensitive lookup of the actual key
 
-        if item_name_lower in inventory_keys:
-            original_name = inventory_keys[item_name_lower] # Get the actual key from the inventory
-            del self.inventory[original_name]   # Remove item
+        if original_name is not None:
+            removed = self.catalog.remove(original_name)   # Remove item
+            self.release_image(removed.image)
             
             # Save updated inventory
-            with open(self.file_paths["inventory"], "w") as file:
-                json.dump(self.inventory, file, indent=4)
+            self.save_inventory(original_name)
+            self.queue_item_upload(original_name)
 
             self.refresh_inventory_display()
             CTkMessagebox(
@@ -430,12 +561,22 @@ class InventoryManagement:
         remove_window.destroy()
         
             
+    @timed("ui.load_images")
+    def load_images(self):
+        """Swap the card placeholders for the real thumbnails (called after the first frame is painted)"""
+        self.images_ready = True
+        self.refresh_inventory_display()
+
+
+    @timed("ui.refresh_inventory_display")
     def refresh_inventory_display(self):
-        """Refresh the inventory display using the scrollable frame"""
-        if hasattr(self, "scroll_frame"):
-            for widget in self.scroll_frame.winfo_children():
-                widget.destroy()
-            self.populate_inventory()   # Reload inventory items
+        """Refresh the inventory display, reusing the cards already on screen"""
+        if self.switch_grid_if_needed():
+            return
+        if hasattr(self, "cards"):
+            self.sync_inventory_cards()
+        elif hasattr(self, "scroll_frame"):
+            self.populate_inventory()   # First build of the grid
    
 
     def create_button(self, text, command, x=None, y=None, frame=None, width= 140, height=50):
@@ -470,9 +611,18 @@ class InventoryManagement:
             option_2="No")
         
         if response.get() == "Yes":
+            # Flush the pending inventory save and let queued writes finish before closing the store
+            self.inventory_writer.flush()
+            self.background.shutdown(wait=False)
+            self.thumbnails.shutdown()
+            self.io.shutdown(wait=True)
+            if self.sync_service is not None:
+                self.sync_service.stop()    # Stop syncing before the shared store closes
+            self.store.close()
             self.root.destroy()
         
         
+    @timed("ui.update_quantity")
     def update_quantity(self, item, qty_var, change):
         """Increase or decrease the quantity of an inventory item"""
 
@@ -497,8 +647,8 @@ class InventoryManagement:
         
         # Ensure item exists in inventory before updating
         if item in self.inventory:
-            self.inventory[item]["quantity"] = new_qty
-            self.save_inventory()
+            self.inventory[item].quantity = new_qty
+            self.save_inventory(item)
 
             # Update UI label if it exists
             if item in self.item_labels:
@@ -511,93 +661,211 @@ class InventoryManagement:
             )
 
 
-    def export_history_to_excel(self):
-        """Export history data to an Excel File formatted correctly"""
-        now = datetime.datetime.now().strftime("%m-%d-%Y_%H-%M-%S")
-        excel_file = os.path.join(self.file_paths["export"], f"history_{now}.xlsx")
+    @timed("ui.export_history_to_excel")
+    def export_history_to_excel(self, start=None, end=None):
+        """Export history data (optionally only from start to end) to an Excel File formatted correctly"""
+        # The aggregates give the row count and column widths without reading the history
+        self.io.submit(self.store.history_summary,
+                       on_done=lambda summary: self.start_history_export(summary, start, end))
 
-        os.makedirs(self.file_paths["export"], exist_ok=True)   # Ensure export directory exists
-        
-        # Check if history file exists
-        if not os.path.exists(self.file_paths["history"]):
+
+    @timed("ui.start_history_export")
+    def start_history_export(self, summary, start=None, end=None):
+        """Pick the export format and stream the history to a file on a worker (returns its future)"""
+        count = sum(day["count"] for day in filter_days(summary["days"], start, end).values())
+        if not count:
             CTkMessagebox(
-                title="Error", 
-                message="No history data found to export", 
-                icon="cancel")
+                title="Error",
+                message="History file is empty. Nothing to export",
+                icon="cancel"
+            )
             return
-        
-        # Load history data
-        try:
-            with open(self.file_paths["history"], "r") as file:
-                history_data = json.load(file)
-                if not history_data:
-                    CTkMessagebox(
-                        title="Error",
-                        message="History file is empty. Nothing to export",
-                        icon="cancel"
-                    )
-                    return
-        except json.JSONDecodeError:
+
+        fmt = "xlsx"
+        if count > self.EXPORT_FAST_THRESHOLD:
+            # Large histories: offer the much faster plain-text formats
+            choice = CTkMessagebox(
+                title="Large Export",
+                message=f"{count} transactions to export. Choose a format:",
+                icon="question",
+                option_1="Excel",
+                option_2="CSV",
+                option_3="JSONL"
+            ).get()
+            fmt = {"Excel": "xlsx", "CSV": "csv", "JSONL": "jsonl"}.get(choice)
+            if fmt is None:
+                return
+
+        os.makedirs(self.file_paths["export"], exist_ok=True)   # Ensure export directory exists
+        now = datetime.datetime.now().strftime("%m-%d-%Y_%H-%M-%S")
+        export_file = os.path.join(self.file_paths["export"], f"history_{now}.{fmt}")
+        prices = {item: data.price for item, data in self.inventory.items()}
+        widths = column_widths(summary, prices)
+
+        # Progress window with a cancel button
+        cancel = threading.Event()
+        progress_window = ctk.CTkToplevel(self.root)
+        progress_window.title("Exporting History")
+        progress_window.geometry("400x160")
+        progress_window.attributes("-topmost", True)
+        progress_window.configure(fg_color=self.colors["bg"])
+        progress_window.protocol("WM_DELETE_WINDOW", cancel.set)
+
+        progress_label = ctk.CTkLabel(progress_window, text=f"0 / {count} transactions", font=("Arial", 16))
+        progress_label.pack(pady=(15, 5))
+        progress_bar = ctk.CTkProgressBar(progress_window, width=340)
+        progress_bar.set(0)
+        progress_bar.pack(pady=5)
+        cancel_button = ctk.CTkButton(progress_window, text="Cancel", font=("Arial", 16, "bold"),
+                                      fg_color=self.colors["btn"], command=cancel.set, width=120)
+        cancel_button.pack(pady=10)
+
+        def show_progress(done, total):
+            if progress_window.winfo_exists():
+                progress_label.configure(text=f"{done} / {total} transactions")
+                progress_bar.set(done / total if total else 1)
+
+        def export_done(count):
+            progress_window.destroy()
             CTkMessagebox(
-                title="Error", 
-                message="History file is corrupted or invalid", 
+                title="Export Successful", 
+                message=f"History exported to\n{export_file}", 
+                icon="info")
+            if hasattr(os, "startfile"):    # Windows only
+                os.startfile(self.file_paths["export"])   # Open the export directory
+
+        def export_failed(e):
+            progress_window.destroy()
+            if isinstance(e, ExportCancelled):
+                return
+            CTkMessagebox(
+                title="Export Error", 
+                message=f"Failed to save the export file.\nError: {str(e)}", 
                 icon="cancel")
-            return
 
-        # Create an Excel Workbook
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        ws.title = "Transaction History"
+        # Stream the history into the file on a worker so the touchscreen stays responsive
+        return self.background.submit(export_history, export_file, self.store.iter_history(start, end), prices,
+                               fmt=fmt, widths=widths, total=count, cancel=cancel,
+                               progress=lambda done, total: self.ui.call(show_progress, done, total),
+                               on_done=export_done, on_error=export_failed)
+
+
+    @timed("ui.import_catalog_file")
+    def import_catalog_file(self, path=None, update_existing=None):
+        """Bulk-add items from a CSV / JSONL catalog (returns the future of the validation job)
+
+        Rows are read and validated in chunks on a worker (name, price, image on disk) and
+        the images of the rows that will be applied go into the asset store (items that already
+        exist are rejected first, unless they are updated). The valid rows are then applied together:
+        one inventory write, one Firebase multi-path update and one grid refresh.
+        """
+        if path is None:
+            path = filedialog.askopenfilename(
+                title="Select Catalog",
+                filetypes=[("Catalog Files", "*.csv;*.jsonl")]
+            )
+            if not path:
+                return
+        if update_existing is None:
+            choice = CTkMessagebox(
+                title="Import Catalog",
+                message="Update the price and image of items that already exist?",
+                icon="question",
+                option_1="Yes",
+                option_2="No",
+                option_3="Cancel"
+            ).get()
+            if choice not in ("Yes", "No"):
+                return
+            update_existing = choice == "Yes"
+
+        # Names already taken, copied for the worker: those rows are rejected before their image is stored
+        known = None if update_existing else dict(self.catalog.by_name)
+
+        def validate():
+            rows, errors = [], []
+            existing = None if known is None else lambda name: known.get(name.lower())
+            for valid, rejected in validate_catalog(path, import_image=lambda image: self.assets.import_image(image, derivative=False),
+                                                    existing=existing):
+                rows += valid
+                errors += rejected
+            return rows, errors
+
+        def validated(result):
+            rows, errors = result
+            added, updated, rejected = apply_catalog(self.catalog, rows, update_existing)
+            errors += rejected
+            changed = added + updated
+            if changed:
+                self.save_inventory(*changed)
+                self.queue_item_upload(*changed)
+                self.refresh_inventory_display()
 
-        # Set headers
-        headers = ["Date", "Quantity", "Product", "Cost", "Total"]
-        ws.append(headers)
+            message = f"{len(added)} added, {len(updated)} updated, {len(errors)} rejected"
+            if errors:
+                shown = "\n".join(f"{where}: {error}" for where, error in errors[:10])
+                more = f"\n... and {len(errors) - 10} more" if len(errors) > 10 else ""
+                message += f"\n\n{shown}{more}"
+            CTkMessagebox(title="Import Catalog", message=message, icon="check" if changed else "warning", width=500)
+
+        def failed(e):
+            CTkMessagebox(title="Import Error", message=f"Could not import the catalog.\nError: {e}", icon="cancel")
+
+        return self.background.submit(validate, on_done=validated, on_error=failed)
+
+
+    @timed("ui.export_catalog_file")
+    def export_catalog_file(self, fmt=None):
+        """Stream the catalog to a CSV / JSONL file on a worker (the format import reads back)"""
+        if fmt is None:
+            choice = CTkMessagebox(
+                title="Export Catalog",
+                message="Choose a format:",
+                icon="question",
+                option_1="CSV",
+                option_2="JSONL",
+                option_3="Cancel"
+            ).get()
+            fmt = {"CSV": "csv", "JSONL": "jsonl"}.get(choice)
+            if fmt is None:
+                return
 
-        # Make headers bold
-        for col_num, header in enumerate(headers, 1):
-            ws.cell(row=1, column=col_num).font = openpyxl.styles.Font(bold=True)
+        os.makedirs(self.file_paths["export"], exist_ok=True)
+        now = datetime.datetime.now().strftime("%m-%d-%Y_%H-%M-%S")
+        export_file = os.path.join(self.file_paths["export"], f"catalog_{now}.{fmt}")
+        snapshot = inventory_from_json(self.snapshot_inventory())   # The worker must not see later edits
 
-        # Write history data
-        row_num = 2
-        for date, transactions in history_data.items():
-            ws.append([date, "", "", "", ""])
+        def export_done(count):
+            CTkMessagebox(title="Export Successful", message=f"{count} items exported to\n{export_file}", icon="info")
 
-            for entry in transactions:
-                quantity = entry.get("quantity", 0)
-                item_name = entry.get("item", "Unknown Item")
-                fixed_price = self.inventory.get(entry["item"], {}).get("price", "N/A")
-                total_cost = entry.get("total", "N/A")
+        def export_failed(e):
+            CTkMessagebox(title="Export Error", message=f"Failed to save the catalog.\nError: {e}", icon="cancel")
 
-                ws.append(["", quantity, item_name, f"₱ {fixed_price}", f"₱ {total_cost}"])
-            
-            row_num += len(transactions) + 1
-            ws.append([""]) # Blank row for separation
+        return self.background.submit(export_catalog, export_file, snapshot, fmt,
+                                      on_done=export_done, on_error=export_failed)
 
-        # Auto adjust columns widths
-        for col in ws.columns:
-            max_length = max((len(str(cell.value)) if cell.value else 0) for cell in col)
-            ws.column_dimensions[col[0].column_letter].width = max_length + 2
 
-        # Save the Excel File
-        try:
-            wb.save(excel_file)
-            CTkMessagebox(
-                title="Export Successful", 
-                message=f"History exported to\n{excel_file}", 
-                icon="info")
-            os.startfile(self.file_paths["export"])   # Open the export directory
-        except Exception as e:
-            CTkMessagebox(
-                title="Export Error", 
-                message=f"Failed to save Excel file.\nError: {str(e)}", 
-                icon="cancel")
+    def use_virtual_grid(self):
+        """Decide whether the product grid should be virtualized"""
+        mode = os.environ.get("INVENTORY_GRID", "auto").lower()
+        if mode == "auto":
+            return len(self.inventory) > self.VIRTUAL_GRID_THRESHOLD
+        return mode == "virtual"
 
 
-    def create_scrollable_inventory(self):
+    def create_scrollable_inventory(self, before=None):
         """Create a scrollable inventory grid with images, names, and buttons"""
+        placement = {"before": before} if before is not None else {}   # Keep the old grid's place in the layout
+        if self.use_virtual_grid():
+            # Only the rows around the viewport get cards; a fixed pool is recycled on scroll
+            self.virtual_grid = VirtualGrid(self.root, create_card=self.create_card, bind_card=self.bind_card,
+                                            columns=5, fg_color=self.colors["bg"])
+            self.virtual_grid.pack(fill="both", expand=True, padx=10, pady=10, **placement)
+            return
+
         # Create a Scrollable Frame
         self.scroll_frame = ctk.CTkScrollableFrame(self.root, fg_color=self.colors["bg"])
-        self.scroll_frame.pack(fill="both", expand=True, padx=10, pady=10)
+        self.scroll_frame.pack(fill="both", expand=True, padx=10, pady=10, **placement)
 
         inner_frame = self.scroll_frame._parent_canvas  # This access the actual inner frame
 
@@ -606,114 +874,222 @@ class InventoryManagement:
             inner_frame.grid_columnconfigure(col, weight=1)
                 
                     
+    @timed("ui.switch_grid_if_needed")
+    def switch_grid_if_needed(self):
+        """Rebuild the grid as the other kind when the catalog crossed VIRTUAL_GRID_THRESHOLD (True if it did)
+
+        A bulk import or a Firebase sync can grow a small catalog past the threshold: the
+        standard grid would then build a full card per item on the Tk thread.
+        """
+        virtual = hasattr(self, "virtual_grid")
+        if not hasattr(self, "cards") or self.use_virtual_grid() == virtual:
+            return False
+
+        old_grid = self.virtual_grid if virtual else self.scroll_frame
+        self.create_scrollable_inventory(before=old_grid)
+        old_grid.destroy()
+        if virtual:
+            del self.virtual_grid
+        else:
+            del self.scroll_frame, self.center_frame
+        self.quantity_vars.clear()      # They belonged to the old cards
+        self.populate_inventory()
+        print(f"🔁 Switched to the {'virtual' if not virtual else 'standard'} grid ({len(self.inventory)} items)")
+        return True
+
+
+    @timed("ui.populate_inventory")
     def populate_inventory(self):
         """Populate the inventory grid inside the scrollable frame"""
+        self.columns = 5
+        self.cards = {}         # Item key -> card widgets currently on screen
+        self.card_order = []    # Item keys in grid order (only the ones matching the search)
 
-        def round_corners(image, size=(280, 280), radius=30):
-            """Load an image (or use provided PIL image), resize it, and apply rounded corners"""
-            if isinstance(image, str):  # If image is a file path
-                img = Image.open(image).convert("RGBA")
-            else:   # If image is already a PIL image (placeholder)
-                img = image.convert("RGBA")
+        if hasattr(self, "virtual_grid"):
+            self.virtual_grid.set_items(self.visible_items())
+            return
 
-            img = img.resize(size, Image.LANCZOS)
+        # Center the grid using a parent frame
+        self.center_frame = ctk.CTkFrame(self.scroll_frame, fg_color=self.colors["bg"])
+        self.center_frame.pack(expand=True, fill="both")
 
-            # Create mask with rounded corners
-            mask = Image.new("L", size, 0)
-            draw = ImageDraw.Draw(mask)
-            draw.rounded_rectangle((0, 0, *size), radius=radius, fill=255)
+        # Configure column weights for even spacing
+        for i in range(self.columns):
+            self.center_frame.grid_columnconfigure(i, weight=1)
 
-            # Apply mask to the image
-            rounded = ImageOps.fit(img, size, centering=(0.5, 0.5))
-            rounded.putalpha(mask)
+        self.sync_inventory_cards()
 
-            return rounded
 
-        columns = 5
-        row, col = 0, 0
+    @timed("ui.sync_inventory_cards")
+    def sync_inventory_cards(self):
+        """Diff the inventory against the cards on screen and only touch the ones that changed"""
+        if hasattr(self, "virtual_grid"):
+            self.virtual_grid.set_items(self.visible_items())   # Pool cards skip unchanged fields
+            return
 
-        # Center the grid using a parent frame
-        center_frame = ctk.CTkFrame(self.scroll_frame, fg_color=self.colors["bg"])
-        center_frame.pack(expand=True, fill="both")
+        # Remove cards for items that no longer exist
+        for item in [item for item in self.cards if item not in self.inventory]:
+            self.cards.pop(item)["frame"].destroy()
+            self.quantity_vars.pop(item, None)
 
-        # Configure column weights for even spacing
-        for i in range(columns):
-            center_frame.grid_columnconfigure(i, weight=1)
+        # Create missing cards and update the ones whose fields changed
+        for item, data in self.inventory.items():
+            fields = self.card_fields(item, data)
+            card = self.cards.get(item)
+            if card is None:
+                card = self.create_card(self.center_frame)
+                card["item"] = item
+                self.cards[item] = card
+                self.quantity_vars[item] = card["qty_var"]
+            if card["fields"] != fields:
+                self.update_card(card, fields)
 
-        # Loop through inventory items
-        # for index, (item, data) in enumerate(self.inventory.items()):
-        #     row = index // columns
-        #     col = index % columns
+        self.layout_cards(self.visible_items())
 
-        for item, data in self.inventory.items():            
-            # Handle cases where data is just an integer
-            if isinstance(data, int):
-                data = {"price": 100, "quantity": data}
 
-            price = data.get("price", 100)
-            quantity = data.get("quantity", 0)
-            
-            item_frame = ctk.CTkFrame(center_frame, fg_color="#3d3d3d", corner_radius=15)
-            item_frame.grid(row=row, column=col, padx=15, pady=10, sticky="nsew")
+    def visible_items(self):
+        """Item keys shown in the grid: the search matches, or the whole inventory"""
+        return self.catalog.search(self.search_text)
 
-            image_container = ctk.CTkFrame(item_frame, fg_color="#3d3d3d", corner_radius=15)
-            image_container.pack(padx=10, pady=10)
 
-            # Load Image
-            # image_path = os.path.join("assets", f"{item.lower().replace(' ', '_')}.jpg")
-            image_path = self.inventory[item].get("image", "")
+    def layout_cards(self, order):
+        """Grid these items' cards in order and hide the others (the cards are kept for later)"""
+        # Only re-grid when items were added, removed, reordered or filtered
+        if order == self.card_order:
+            return
+        shown = set(order)
+        for item in self.card_order:
+            if item not in shown and item in self.cards:
+                self.cards[item]["frame"].grid_remove()
+        for index, item in enumerate(order):
+            self.cards[item]["frame"].grid(row=index // self.columns, column=index % self.columns,
+                                           padx=15, pady=10, sticky="nsew")
+        self.card_order = order
+
+
+    @timed("ui.search_inventory")
+    def search_inventory(self, text):
+        """Show only the cards matching text (from the catalog's search index, no grid rebuild)"""
+        if text.strip().lower() == self.search_text.strip().lower():
+            return
+        self.search_text = text
+        matches = self.visible_items()
+        if hasattr(self, "virtual_grid"):
+            self.virtual_grid.scroll_to_top()
+            self.virtual_grid.set_items(matches)
+        elif hasattr(self, "cards"):
+            self.layout_cards(matches)
+            self.scroll_frame._parent_canvas.yview_moveto(0)
+
+
+    def clear_search(self):
+        self.search_entry.delete(0, "end")
+        self.search_inventory("")
+
+
+    def card_fields(self, item, data):
+        """Return the values a card displays, used to detect changes"""
+        # Cached rounded thumbnail (shared placeholder if no image is found, images are deferred
+        # or the thumbnail is still being prepared in the background)
+        if not self.images_ready:
+            return (item, data.price, data.quantity, self.thumbnails.placeholder())
+        image = self.thumbnails.get(data.image or "", on_ready=lambda image: self.thumbnail_ready(item), waiter=item)
+        return (item, data.price, data.quantity, image)
+
+
+    def thumbnail_ready(self, item):
+        """A background thumbnail finished: update the card showing the item, if it is on screen"""
+        if item not in self.inventory:
+            return
+        if hasattr(self, "virtual_grid"):
+            for card in self.virtual_grid.visible_cards():
+                if card["item"] == item:
+                    self.bind_card(card, item)
+            return
 
-            # Create a blank image (solid color) if no image is found
-            placeholder = Image.new("RGB", (280, 280), color=(200, 200, 200))  # Light gray
-            rounded_img = round_corners(image_path) if os.path.exists(image_path) else placeholder
-            
-            img = ctk.CTkImage(light_image=rounded_img, size=(280, 280))
+        card = getattr(self, "cards", {}).get(item)
+        if card is not None:
+            fields = self.card_fields(item, self.inventory[item])
+            if card["fields"] != fields:
+                self.update_card(card, fields)
 
-            item_img = ctk.CTkLabel(item_frame, image=img, text="")
-            item_img.image = img
-            item_img.pack(padx=10, pady=10)
 
-            # Item Name
-            item_label = ctk.CTkLabel(image_container, text=item, font=("Arial", 30))
-            item_label.pack(pady=10)
-            
-            # Quantity Display
-            qty_var = ctk.IntVar(value=quantity)
-            qty_label = ctk.CTkLabel(item_frame, textvariable=qty_var, font=("Arial", 20, "bold"))
-            qty_label.pack(pady=5)
-            
-            # Price Display (Below Quantity)
-            price_label = ctk.CTkLabel(item_frame, text=f"₱ {price}", font=("Arial", 25))
-            price_label.pack(pady=5)
+    def create_card(self, parent):
+        """Build the widgets of one product card (bound to an item by update_card)"""
+        card = {"item": None, "fields": None}
 
-            # Buttons for Layout (Left: `+` & `-`, Right: "Add")
-            btn_frame = ctk.CTkFrame(item_frame, fg_color="#3d3d3d")
-            btn_frame.pack(pady=5)
-            
-            btn_minus = ctk.CTkButton(btn_frame, text="-", font=("Arial", 14, "bold"), fg_color=self.colors["btn"],
-                                command=lambda i=item, q=qty_var: self.update_quantity(i, q, -1),
-                                width=50, height=50)
-            btn_minus.pack(side="left", padx=5, pady=5)
-
-            btn_plus = ctk.CTkButton(btn_frame, text="+", font=("Arial", 14, "bold"), fg_color=self.colors["btn"],
-                                command=lambda i=item, q=qty_var: self.update_quantity(i, q, 1),
-                                width=50, height=50)
-            btn_plus.pack(side="left", padx=5, pady=5)
-
-            btn_add = ctk.CTkButton(btn_frame, text="Add", font=("Arial", 16, "bold"), fg_color="#2a9d8f",
-                                command=lambda i=item, q=qty_var: self.add_amount(i, q),
-                                width=100, height=50)
-            btn_add.pack(side="right", padx=10, pady=5)
-            
-            self.quantity_vars[item] = qty_var
+        card["frame"] = item_frame = ctk.CTkFrame(parent, fg_color="#3d3d3d", corner_radius=15)
+
+        image_container = ctk.CTkFrame(item_frame, fg_color="#3d3d3d", corner_radius=15)
+        image_container.pack(padx=10, pady=10)
+
+        card["image"] = ctk.CTkLabel(item_frame, image=self.thumbnails.placeholder(), text="")
+        card["image"].pack(padx=10, pady=10)
+
+        # Item Name
+        card["name"] = ctk.CTkLabel(image_container, text="", font=("Arial", 30))
+        card["name"].pack(pady=10)
+
+        # Quantity Display
+        card["qty_var"] = ctk.IntVar(value=0)
+        qty_label = ctk.CTkLabel(item_frame, textvariable=card["qty_var"], font=("Arial", 20, "bold"))
+        qty_label.pack(pady=5)
+
+        # Price Display (Below Quantity)
+        card["price"] = ctk.CTkLabel(item_frame, text="", font=("Arial", 25))
+        card["price"].pack(pady=5)
 
-            # Manage Columns
-            col += 1
-            if col >= columns:
-                col = 0
-                row += 1
+        # Buttons for Layout (Left: `+` & `-`, Right: "Add")
+        btn_frame = ctk.CTkFrame(item_frame, fg_color="#3d3d3d")
+        btn_frame.pack(pady=5)
 
+        # Commands look up the bound item when pressed, so the card can be reused
+        btn_minus = ctk.CTkButton(btn_frame, text="-", font=("Arial", 14, "bold"), fg_color=self.colors["btn"],
+                            command=lambda c=card: self.update_quantity(c["item"], c["qty_var"], -1),
+                            width=50, height=50)
+        btn_minus.pack(side="left", padx=5, pady=5)
 
+        btn_plus = ctk.CTkButton(btn_frame, text="+", font=("Arial", 14, "bold"), fg_color=self.colors["btn"],
+                            command=lambda c=card: self.update_quantity(c["item"], c["qty_var"], 1),
+                            width=50, height=50)
+        btn_plus.pack(side="left", padx=5, pady=5)
+
+        btn_add = ctk.CTkButton(btn_frame, text="Add", font=("Arial", 16, "bold"), fg_color="#2a9d8f",
+                            command=lambda c=card: self.add_amount(c["item"], c["qty_var"]),
+                            width=100, height=50)
+        btn_add.pack(side="right", padx=10, pady=5)
+
+        return card
+
+
+    def bind_card(self, card, item):
+        """Bind a (possibly recycled) card to an item of the inventory"""
+        if card["item"] is not None and self.quantity_vars.get(card["item"]) is card["qty_var"]:
+            del self.quantity_vars[card["item"]]
+
+        card["item"] = item
+        self.quantity_vars[item] = card["qty_var"]
+        self.update_card(card, self.card_fields(item, self.inventory[item]))
+
+
+    def update_card(self, card, fields):
+        """Push changed values into an existing card's widgets"""
+        old = card["fields"] or (None, None, None, None)
+        item, price, quantity, image = fields
+
+        if item != old[0]:
+            card["name"].configure(text=item)
+        if price != old[1]:
+            card["price"].configure(text=f"₱ {price}")
+        if quantity != old[2]:
+            card["qty_var"].set(quantity)
+        if image is not old[3]:
+            card["image"].configure(image=image)
+
+        card["fields"] = fields
+
+
+    @timed("ui.add_amount")
     def add_amount(self, item, qty_var):
         """Save the calculated amount (price x quantity) to JSON and log history"""
         quantity = qty_var.get()
@@ -722,114 +1098,128 @@ class InventoryManagement:
             CTkMessagebox(title="Export Error", message="Please select at least 1 item", icon="cancel")
             return
 
+        if self.cart_mode:
+            # The line moves from the card to the cart; the sale is persisted with the rest of the basket at checkout
+            self.cart[item] = self.cart.get(item, 0) + quantity
+            record = self.inventory[item]
+            record.quantity = max(0, record.quantity - quantity)
+            qty_var.set(record.quantity)
+            self.save_inventory(item)
+            self.update_cart_label()
+            return
+
         # Ensure price exists
-        price = self.inventory[item].get("price", 100)
-        total_amount = price * quantity
+        record = self.inventory[item]
+        total_amount = record.price * quantity
 
-        # Load previous data or create a new one
-        data = self.load_amount_data()
+        # Deduct stock instead of resetting to zero
+        record.quantity = max(0, record.quantity - quantity)
 
-        # Ensure `total` and `entries` exist
-        data.setdefault("total", 0)
-        data.setdefault("entries", [])
+        # Reset quantity after adding
+        qty_var.set(0)
+        # self.update_ui()
 
-        # Update total amount and history
-        data["total"] += total_amount
-        data["entries"].append({"item": item, "quantity": quantity, "total": total_amount})
+        def sale_saved(data):
+            # Update total label
+            self.total_label.configure(text=f"Total: ₱ {data['total']}")
+            CTkMessagebox(title="Success", message=f"Added {quantity} x {item} for ₱ {total_amount}. New Total: ₱ {data['total']}", icon="info")
 
-        self.save_amount_data(data)
+        # Update stock, total amount and history together (in the background)
+        self.io.submit(self.store.record_sale, item, quantity, total_amount, {item: record.quantity},
+                       date=datetime.datetime.now().strftime("%B %d, %Y"),
+                       on_done=sale_saved,
+                       on_error=lambda e: CTkMessagebox(title="Error", message=f"Failed to save purchase: {e}", icon="cancel"))
 
-        # Update total label
-        self.total_label.configure(text=f"Total: ₱ {data['total']}")
 
-        # Log the purchase in history
-        self.log_purchase(item, quantity, total_amount)
+    def toggle_cart_mode(self):
+        """Switch "Add" between selling right away and collecting items in the cart"""
+        if self.cart_mode and self.cart:
+            CTkMessagebox(title="Cart", message="Check out or clear the cart first", icon="warning")
+            return
+        self.cart_mode = not self.cart_mode
+        self.cart_button.configure(text=f"🛒 Cart: {'On' if self.cart_mode else 'Off'}")
+        self.update_cart_label()
 
-        CTkMessagebox(title="Success", message=f"Added {quantity} x {item} for ₱ {total_amount}. New Total: ₱ {data['total']}", icon="info")
 
-        # Deduct stock instead of resetting to zero
-        self.inventory[item]["quantity"] = max(0, self.inventory[item]["quantity"] - quantity)
+    def update_cart_label(self):
+        """Show the number of items in the cart and their value"""
+        if not self.cart_mode:
+            self.cart_label.configure(text="")
+            return
+        count = sum(self.cart.values())
+        value = sum(self.inventory[item].price * quantity for item, quantity in self.cart.items() if item in self.inventory)
+        self.cart_label.configure(text=f"🛒 {count} item{'s' if count != 1 else ''} · ₱ {value}")
 
-        # Reset quantity after adding
-        qty_var.set(0)
-        # self.update_ui()
 
-        # Saved updated inventory
-        with open(self.file_paths["inventory"], "w") as file:
-            json.dump(self.inventory, file, indent=4)
+    def clear_cart(self):
+        """Empty the cart without selling anything"""
+        self.cart.clear()
+        self.update_cart_label()
+
 
+    @timed("ui.checkout_cart")
+    def checkout_cart(self):
+        """Sell the whole basket at once: one history write, one total update, one inventory write, one upload"""
+        if not self.cart:
+            CTkMessagebox(title="Cart", message="The cart is empty", icon="info")
+            return
 
-    def log_purchase(self, item, quantity, total_amount):
-        """Log each purchase in history.json under the correct date"""
-        today = datetime.datetime.now().strftime("%B %d, %Y")
+        # The stock was taken off the cards when the items went into the cart
+        lines = [(item, quantity, self.inventory[item].price * quantity)
+                 for item, quantity in self.cart.items() if item in self.inventory]   # Skip items removed meanwhile
+        basket = dict(self.cart)
+        self.clear_cart()
+        if not lines:
+            return
 
-        history_data = {}
+        def basket_saved(data):
+            self.total_label.configure(text=f"Total: ₱ {data['total']}")
+            if self.sync_service is not None:
+                self.sync_service.notify_local_change()     # Upload the basket in one update now
+            receipt = "\n".join(f"{quantity} x {item}: ₱ {total}" for item, quantity, total in lines)
+            CTkMessagebox(title="Receipt",
+                          message=f"{receipt}\n\nBasket total: ₱ {sum(total for _, _, total in lines)}\n"
+                                  f"New Total: ₱ {data['total']}",
+                          icon="check", width=500)
+
+        def basket_failed(e):
+            # Keep the basket so the sale can be retried (its stock is still off the cards, so nothing is lost or sold twice)
+            for item, quantity in basket.items():
+                self.cart[item] = self.cart.get(item, 0) + quantity
+            self.update_cart_label()
+            CTkMessagebox(title="Error", message=f"Failed to save purchase (the items are still in the cart): {e}", icon="cancel")
+
+        # Stock, total amount and history of the whole basket in one background write
+        self.io.submit(self.store.record_sales, lines, {item: self.inventory[item].quantity for item, _, _ in lines},
+                       date=datetime.datetime.now().strftime("%B %d, %Y"),
+                       on_done=basket_saved, on_error=basket_failed)
 
-        # Check if the history file exists and load existing data;
-        if self.file_paths["history"].exists():
-            try:
-                with open(self.file_paths["history"], "r") as file:
-                    history_data = json.load(file)
-                    if not isinstance(history_data, dict):
-                        raise ValueError("Invalid history file format")
-            except (json.JSONDecodeError, ValueError):
-                history_data = {}
-
-        # Add new entry for today
-        history_data.setdefault(today, []).append({
-            "quantity": quantity,
-            "item": item,
-            "total": total_amount
-        })
-
-        # Save the updated history with error handling
+
+    def load_amount_data(self):
+        """Load previous spending data from the storage backend"""
         try:
-            with open(self.file_paths["history"], "w") as file:
-                json.dump(history_data, file, indent=4)
-        except (OSError, IOError) as e:
+            return self.store.load_amounts()
+        except (json.JSONDecodeError, ValueError):
             CTkMessagebox(
                 title="Error",
-                message=f"Failed to save history: {e}",
+                message="Amount file is corrupted. Resetting data",
                 icon="cancel"
             )
-    
-    
-    def load_amount_data(self):
-        """Load previous spending data from JSON"""
-        if self.file_paths["amounts"]:
-            try:
-                with open(self.file_paths["amounts"], "r") as file:
-                    data = json.load(file)
-                    if not isinstance(data, dict) or "total" not in data or "entries" not in data:
-                        raise ValueError("Invalid amount file format")
-                    return data
-            except (json.JSONDecodeError, ValueError):
-                CTkMessagebox(
-                    title="Error",
-                    message="Amount file is corrupted. Resetting data",
-                    icon="cancel"
-                )
         
         # Return a default structure if file is missing or corrupted
-        return {"total": 0, "entries": []}
+        return empty_amounts()
 
 
     def save_amount_data(self, data):
-        """Save spending data to JSON"""
-        temp_file = self.file_paths["amounts"].with_suffix(".tmp")
-
-        try:
-            with temp_file.open("w", encoding="utf-8") as file:
-                json.dump(data, file, indent=4)
-
-            temp_file.replace(self.file_paths["amounts"])   # Replace the original file with the temp file
-        except (OSError, IOError) as e:
-            CTkMessagebox(
-                title="Error", 
-                message=f"Failed to save data: {e}", 
-                icon="cancel")
+        """Save spending data through the storage backend (in the background)"""
+        self.io.submit(self.store.save_amounts, data,
+                       on_error=lambda e: CTkMessagebox(
+                           title="Error", 
+                           message=f"Failed to save data: {e}", 
+                           icon="cancel"))
 
 
+    @timed("ui.open_history_window")
     def open_history_window(self):
         """Open a new window showing purchase history"""
 
@@ -839,22 +1229,15 @@ class InventoryManagement:
             self.history_window.focus_force()
             return
 
-        # Load history data
-        history_data = {}
-        if os.path.exists(self.file_paths["history"]):
-            try:
-                with open(self.file_paths["history"], "r") as file:
-                    history_data = json.load(file)
-            except (json.JSONDecodeError, ValueError):
-                CTkMessagebox(title="Error",
-                              message="History file is corrupted.",
-                              icon="cancel")
-                return
-        else:
-            CTkMessagebox(
-                title="Error", 
-                message="No history data found", 
-                icon="cancel")
+        # Load only the precomputed daily totals in the background, then build the window
+        self.io.submit(self.store.history_summary, on_done=self.show_history_window)
+
+
+    @timed("ui.show_history_window")
+    def show_history_window(self, summary):
+        """Build the history window from the daily totals (UI thread)"""
+        if hasattr(self, "history_window") and self.history_window.winfo_exists():
+            self.history_window.lift()   # Opened twice while loading
             return
 
         # Create new window
@@ -873,47 +1256,16 @@ class InventoryManagement:
         y_position = (screen_height // 2) - (window_height // 2)
         self.history_window.geometry(f"{window_width}x{window_height}+{x_position}+{y_position}")
 
-        # Title
-        title_label = ctk.CTkLabel(self.history_window, text="Transaction History", font=("Arial", 20, "bold"))
-        title_label.pack(pady=10)
+        self.populate_history_ui(self.history_window, summary)
 
-        # Scrollable CTkFrame
-        scroll_frame = ctk.CTkScrollableFrame(self.history_window, fg_color="#3A3A3A")
-        scroll_frame.pack(fill="both", expand=True, padx=10, pady=10)
 
-        # Display purchase history (Empty after reset)
-        if not history_data:
-            empty_label = ctk.CTkLabel(scroll_frame, text="No transaction history available", font=("Arial", 16), text_color="white")
-            empty_label.pack(pady=20)
-        else:
-            for  date, transactions in history_data.items():
-                date_label = ctk.CTkLabel(scroll_frame, text=date, font=("Arial", 20, "bold"), fg_color="transparent")
-                date_label.pack(pady=5)
-
-                total = 0
-                for entry in transactions:
-                    text = f"{entry['quantity']}x → {entry['item']} (₱ {entry['total']})"
-                    item_label = ctk.CTkLabel(scroll_frame, text=text, font=("Arial", 20), fg_color="transparent")
-                    item_label.pack()
-                    total += entry['total']
-                
-                total_label = ctk.CTkLabel(scroll_frame, text=f"Total: ₱ {total}", font=("Arial", 22, "bold"), fg_color="transparent")
-                total_label.pack(pady=15)
-
-                divider = ctk.CTkFrame(scroll_frame, fg_color="#555555", height=2)
-                divider.pack(fill="x", padx=20, pady=10)
-                    
-        # Button Frame
-        button_frame = ctk.CTkFrame(self.history_window, fg_color=self.colors["bg"])
-        button_frame.pack(fill="x", pady=10)
-
-        # Reset CTkButton
-        reset_button = ctk.CTkButton(button_frame, text="Reset History", font=("Arial", 18, "bold"),
-                                     fg_color=self.colors["btn"], command=lambda: self.reset_history(self.history_window),
-                                     width=140, height=40)
-        reset_button.pack(pady=10)
+    @timed("ui.load_history_day")
+    def load_history_day(self, date, callback, on_error=None):
+        """Load one day's transactions in the background for the history view"""
+        self.io.submit(lambda: self.store.query_history(date, date).get(date, []), on_done=callback, on_error=on_error)
 
 
+    @timed("ui.reset_history")
     def reset_history(self, history_window):
         """Manually reset the history.json file"""
 
@@ -927,15 +1279,12 @@ class InventoryManagement:
         if response != "Yes":
             return
 
-        # Clear history file
-        try:
-            with open(self.file_paths["history"], "w") as file:
-                json.dump({}, file, indent=4)
-
-            # Reset stored total amount
-            reset_data = {"total": 0, "entries": []}
-            self.save_amount_data(reset_data)
+        def clear_history():
+            # Clear history snapshot and journal, then the stored total amount
+            self.store.reset_history()
+            self.store.save_amounts(empty_amounts())
 
+        def history_cleared(result):
             # Update total label if it exists
             if hasattr(self, "total_label"):
                 self.total_label.configure(text="Total: ₱ 0")
@@ -952,71 +1301,78 @@ class InventoryManagement:
             # Repopulate the history window with an empty message
             empty_label = ctk.CTkLabel(history_window, text="No transaction history available", font=("Arial", 18), text_color="white")
             empty_label.pack(pady=20)
-        except (OSError, IOError) as e:
-            CTkMessagebox(
-                title="Error",
-                message=f"Failed to reset history: {e}",
-                icon="cancel"
-            )
+
+        self.io.submit(clear_history, on_done=history_cleared,
+                       on_error=lambda e: CTkMessagebox(
+                           title="Error",
+                           message=f"Failed to reset history: {e}",
+                           icon="cancel"
+                       ))
                 
 
-    def populate_history_ui(self, history_window):
-        """Repopulate the history window after resetting"""
+    @timed("ui.populate_history_ui")
+    def populate_history_ui(self, history_window, summary=None, start=None, end=None):
+        """(Re)build the history window: paged day headers, transactions loaded on expand"""
+        if summary is None:
+            # Load the daily totals in the background first
+            self.io.submit(self.store.history_summary,
+                           on_done=lambda summary: self.populate_history_ui(history_window, summary, start, end))
+            return
 
         # Clear existing widgets in history window before repopulating
         for widget in history_window.winfo_children():
             widget.destroy()
 
-        # Load history data
-        history_window = {}
-        if os.path.exists(self.file_paths["history"]):
-            try:
-                with open(self.file_paths["history"], "r") as file:
-                    history_data = json.load(file)
-            except (json.JSONDecodeError, ValueError):
-                history_data = {}
-
         # Title
         title_label = ctk.CTkLabel(history_window, text="Transaction History", font=("Arial", 20, "bold"))
         title_label.pack(pady=10)
 
-        # Scrollable CTkFrame
-        scroll_frame = ctk.CTkScrollableFrame(history_window, fg_color="#3a3a3a")
-        scroll_frame.pack(fill="both", expand=True, padx=10, pady=10)
-    
-        # Display purchase history (Empty after reset)
-        if not history_data:
-            empty_label = ctk.CTkLabel(scroll_frame, text="No transaction history available", font=("Arial", 16), text_color="white")
-            empty_label.pack(pady=20)
-        else:
-            for date, transactions in history_data.items():
-                date_label = ctk.CTkLabel(scroll_frame, text=date, font=("Arial", 20, "bold"), fg_color="transparent", text_color="white")
-                date_label.pack(pady=5)
+        # Date range filter (ISO dates, either may be left empty)
+        filter_frame = ctk.CTkFrame(history_window, fg_color=self.colors["bg"])
+        filter_frame.pack(pady=5)
+
+        start_entry = ctk.CTkEntry(filter_frame, placeholder_text="From (YYYY-MM-DD)", font=("Arial", 16), width=180)
+        start_entry.grid(row=0, column=0, padx=5)
+        end_entry = ctk.CTkEntry(filter_frame, placeholder_text="To (YYYY-MM-DD)", font=("Arial", 16), width=180)
+        end_entry.grid(row=0, column=1, padx=5)
+        if start:
+            start_entry.insert(0, start)
+        if end:
+            end_entry.insert(0, end)
 
-                total = 0
-                for entry in transactions:
-                    text = f"{entry['quantity']}x → {entry['item']} (₱ {entry['total']})"
-                    item_label = ctk.CTkLabel(scroll_frame, text=text, font=("Arial", 20), fg_color="transparent", text_color="white")
-                    item_label.pack()
-                    total += entry['total']
+        def apply_filter():
+            try:
+                new_start, new_end = parse_day(start_entry.get()), parse_day(end_entry.get())
+            except ValueError as e:
+                CTkMessagebox(title="Invalid Date", message=str(e), icon="cancel")
+                return
+            self.populate_history_ui(history_window, None, new_start, new_end)
 
-                total_label = ctk.CTkLabel(scroll_frame, text=f"Total: ₱ {total}", font=("Arial", 22, "bold"), fg_color="transparent", text_color="white")
-                total_label.pack(pady=15)
+        filter_button = ctk.CTkButton(filter_frame, text="Filter", font=("Arial", 16, "bold"),
+                                      fg_color=self.colors["btn"], command=apply_filter, width=90)
+        filter_button.grid(row=0, column=2, padx=5)
 
-                divider = ctk.CTkFrame(scroll_frame, fg_color="#555555", height=2)
-                divider.pack(fill="x", padx=20, pady=10)
+        # Day headers with their totals; each day's transactions load when it is expanded
+        HistoryView(history_window, summary, self.load_history_day, start, end)
 
         # Button Frame
-        button_frame = ctk.CTkFrame(self.history_window, fg_color=self.colors["bg"])
+        button_frame = ctk.CTkFrame(history_window, fg_color=self.colors["bg"])
         button_frame.pack(fill="x", pady=10)
         
         # Reset CTkButton
         reset_button = ctk.CTkButton(button_frame, text="Reset History", font=("Arial", 18, "bold"),
                                      fg_color=self.colors["btn"], command=lambda: self.reset_history(history_window),
                                      width=140, height=40)
-        reset_button.pack(pady=10)
+        reset_button.pack(side="left", expand=True, pady=10)
+
+        # Export only the days shown
+        export_button = ctk.CTkButton(button_frame, text="Export Shown", font=("Arial", 18, "bold"),
+                                      fg_color=self.colors["btn"], command=lambda: self.export_history_to_excel(start, end),
+                                      width=140, height=40)
+        export_button.pack(side="left", expand=True, pady=10)
         
         
+    @timed("ui.reset_total")
     def reset_total(self):
         """Reset the total amount spent back to 0 in amounts.json"""
 
@@ -1031,7 +1387,7 @@ class InventoryManagement:
         if response == "Yes":
             try:
                 # Reset total and clear entries
-                reset_data = {"total": 0, "entries": []}
+                reset_data = empty_amounts()
                 self.save_amount_data(reset_data)
 
                 # Update displayed total
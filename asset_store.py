@@ -0,0 +1,137 @@
+import hashlib
+import os
+import re
+import shutil
+import threading
+
+from pathlib import Path, PurePosixPath, PureWindowsPath
+
+
+# Content-addressed images are named after the SHA-256 of their bytes
+HASH_NAME = re.compile(r"[0-9a-f]{64}")
+
+# The extension comes from the file's signature, so the same bytes always get the same name
+SIGNATURES = (
+    (b"\xff\xd8\xff", ".jpg"),
+    (b"\x89PNG\r\n\x1a\n", ".png"),
+    (b"GIF87a", ".gif"),
+    (b"GIF89a", ".gif"),
+    (b"BM", ".bmp"),
+)
+
+
+def normalize_path(path):
+    """Stored form of an image path: POSIX separators, relative to the working directory when inside it
+
+    Fixes paths saved on Windows ("assets\\hammer.jpg") and leading "./" so the same file
+    always has the same string in inventory.json and Firebase.
+    """
+    if not isinstance(path, str) or not path:
+        return path
+    if "\\" in path:
+        path = PureWindowsPath(path).as_posix()
+    if os.path.isabs(path):
+        try:
+            return Path(path).relative_to(Path.cwd()).as_posix()
+        except ValueError:
+            return PurePosixPath(path).as_posix()
+    return PurePosixPath(path).as_posix()
+
+
+def image_extension(path):
+    """Extension matching an image file's content (".img" when the format is not recognised)"""
+    with open(path, "rb") as file:
+        header = file.read(12)
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return ".webp"
+    for signature, ext in SIGNATURES:
+        if header.startswith(signature):
+            return ext
+    return ".img"
+
+
+def file_digest(path, chunk_size=1024 * 1024):
+    """SHA-256 of a file, read in chunks (camera photos can be large)"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class AssetStore:
+    """Product images stored once under the hash of their content (assets/<sha256>.<ext>)
+
+    Importing the same picture twice, or two pictures with the same file name, can neither
+    duplicate nor overwrite anything. The display-size rounded thumbnail is generated at
+    import, so the grid never decodes the full-resolution original.
+    """
+
+    def __init__(self, assets_dir, thumbnails=None):
+        self.assets_dir = Path(assets_dir)
+        self.assets_dir.mkdir(parents=True, exist_ok=True)
+        self.thumbnails = thumbnails    # ThumbnailCache building the derivatives (optional)
+        self._lock = threading.Lock()
+        self._adopted = {}  # (source path, mtime, size) -> asset path, so legacy files are hashed once
+
+
+    def import_image(self, source, derivative=True):
+        """Store an image (deduplicated) and return its normalized asset path"""
+        name = file_digest(source) + image_extension(source)
+        destination = self.assets_dir / name
+
+        with self._lock:
+            if not destination.exists():
+                temp_file = destination.with_suffix(".tmp")
+                shutil.copyfile(source, temp_file)
+                temp_file.replace(destination)  # Never a half-copied asset under its final name
+                print(f"🖼️ Stored image {Path(source).name} as {name}")
+
+        if derivative and self.thumbnails is not None:
+            self.thumbnails.prepare(destination)
+        return normalize_path(str(destination))
+
+
+    def discard(self, path):
+        """Delete a stored image and its thumbnail derivative (paths outside the store are left alone)"""
+        if not self.is_stored(path):
+            return False
+        paths = [Path(path)]
+        if self.thumbnails is not None:
+            paths.append(self.thumbnails.derivative_path(path))
+        with self._lock:
+            for file in paths:
+                try:
+                    file.unlink()
+                except FileNotFoundError:
+                    pass
+        print(f"🗑️ Removed unused image {Path(path).name}")
+        return True
+
+
+    def is_stored(self, path):
+        """Whether an image path already points into the content-addressed store"""
+        path = Path(path)
+        return HASH_NAME.fullmatch(path.stem) is not None and path.parent.resolve() == self.assets_dir.resolve()
+
+
+    def adopt(self, inventory):
+        """Move items with legacy image paths (basenames, Windows separators) into the store
+
+        Returns the IDs of the items whose image path changed. Images that cannot be read are
+        left as they are. Derivatives are built lazily by the grid, keeping startup fast.
+        """
+        changed = []
+        for item_id, item in inventory.items():
+            if not item.image or self.is_stored(item.image):
+                continue
+            try:
+                stat = os.stat(item.image)
+                key = (os.path.abspath(item.image), stat.st_mtime_ns, stat.st_size)
+                if key not in self._adopted:
+                    self._adopted[key] = self.import_image(item.image, derivative=False)
+            except OSError:
+                continue
+            item.image = self._adopted[key]
+            changed.append(item_id)
+        return changed
@@ -0,0 +1,227 @@
+import itertools
+import os
+import sys
+import types
+
+
+class MockScheduler:
+    """Stands in for the Tk event loop: after()/after_idle() callbacks run when pumped"""
+
+    def __init__(self):
+        self.pending = {}
+        self._ids = itertools.count(1)
+
+
+    def add(self, callback, args):
+        after_id = f"after#{next(self._ids)}"
+        self.pending[after_id] = (callback, args)
+        return after_id
+
+
+    def cancel(self, after_id):
+        self.pending.pop(after_id, None)
+
+
+    def pump(self):
+        """Run the callbacks that are due now (ones they schedule wait for the next pump)"""
+        due, self.pending = self.pending, {}
+        for callback, args in due.values():
+            callback(*args)
+
+
+SCHEDULER = MockScheduler()
+
+
+class MockWidget:
+    """Accepts any widget call and keeps only what the app reads back
+
+    Used instead of Tk to measure the Python side of the handlers (diffing, indexing,
+    storage) without a display; run with --widgets tk under Xvfb for the full cost.
+    """
+
+    _window_ids = itertools.count(1)
+
+    def __init__(self, master=None, *args, **kwargs):
+        self.master = master
+        self._options = dict(kwargs)
+        self._parent_canvas = self      # CTkScrollableFrame internals used by the app
+
+
+    def __getattr__(self, name):
+        # pack, grid, bind, destroy, lift, title, geometry, ... do nothing
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return lambda *args, **kwargs: None
+
+
+    def destroy(self):
+        pass
+
+
+    def configure(self, **kwargs):
+        self._options.update(kwargs)
+
+    config = configure
+
+
+    def cget(self, key):
+        return self._options.get(key)
+
+
+    def after(self, delay_ms, callback=None, *args):
+        return SCHEDULER.add(callback, args) if callback is not None else None
+
+
+    def after_idle(self, callback, *args):
+        return SCHEDULER.add(callback, args)
+
+
+    def after_cancel(self, after_id):
+        SCHEDULER.cancel(after_id)
+
+
+    def winfo_exists(self):
+        return True
+
+
+    def winfo_width(self):
+        return 1920
+
+
+    def winfo_height(self):
+        return 1080
+
+
+    def winfo_reqheight(self):
+        return 420
+
+
+    def winfo_screenwidth(self):
+        return 1920
+
+
+    def winfo_screenheight(self):
+        return 1080
+
+
+    def winfo_children(self):
+        return []
+
+
+    def canvasy(self, y):
+        return y
+
+
+    def yview(self, *args):
+        return (0.0, 1.0)
+
+
+    def create_window(self, *args, **kwargs):
+        return next(self._window_ids)
+
+
+class MockVariable:
+    """StringVar / IntVar replacement"""
+
+    def __init__(self, master=None, value=None, **kwargs):
+        self.value = value
+
+
+    def get(self):
+        return self.value
+
+
+    def set(self, value):
+        self.value = value
+
+
+    def trace_add(self, mode, callback):
+        return None
+
+
+class MockMessagebox:
+    """Non-blocking CTkMessagebox that always answers with its first option"""
+
+    def __init__(self, *args, option_1="OK", **kwargs):
+        self.answer = option_1
+
+
+    def get(self):
+        return self.answer
+
+
+def install_mock_widgets():
+    """Register fake customtkinter / CTkMessagebox modules (call before importing the GUI)"""
+    ctk = types.ModuleType("customtkinter")
+    for name in ("CTk", "CTkToplevel", "CTkFrame", "CTkScrollableFrame", "CTkLabel", "CTkButton",
+                 "CTkEntry", "CTkOptionMenu", "CTkComboBox", "CTkProgressBar", "CTkCanvas",
+                 "CTkScrollbar", "CTkImage"):
+        setattr(ctk, name, type(name, (MockWidget,), {}))
+    ctk.StringVar = ctk.IntVar = MockVariable
+    ctk.set_appearance_mode = ctk.set_default_color_theme = lambda *args, **kwargs: None
+    ctk.filedialog = types.SimpleNamespace(askopenfilename=lambda **kwargs: "")
+
+    messagebox = types.ModuleType("CTkMessagebox")
+    messagebox.CTkMessagebox = MockMessagebox
+
+    sys.modules["customtkinter"] = ctk
+    sys.modules["CTkMessagebox"] = messagebox
+
+
+def block_firebase():
+    """Make sure nothing in a benchmark can reach Firebase"""
+    sys.modules["firebase_admin"] = None    # Any import now raises ImportError
+
+
+class BenchApp:
+    """An InventoryManagement instance running against a synthetic data directory"""
+
+    def __init__(self, workdir, widgets="mock", storage="json"):
+        self.widgets = widgets
+        block_firebase()
+        if widgets == "mock":
+            install_mock_widgets()
+        elif sys.platform.startswith("linux") and not os.environ.get("DISPLAY"):
+            raise RuntimeError("No display: run under Xvfb (e.g. xvfb-run python -m benchmarks.run --widgets tk)")
+
+        os.environ["INVENTORY_STORAGE"] = storage
+        os.chdir(workdir)   # The app keeps its data under ./inventory and ./assets
+
+        import customtkinter as ctk
+        from InventoryManagement import InventoryManagement
+
+        self.ctk = ctk
+        self.root = ctk.CTk()
+        self.app = InventoryManagement(self.root)
+        self.app.EXPORT_FAST_THRESHOLD = float("inf")   # Never ask for a format (it would block)
+        self.app.load_images()
+        self.pump()
+
+
+    def pump(self):
+        """Let the event loop run its pending callbacks"""
+        if self.widgets == "mock":
+            SCHEDULER.pump()
+        else:
+            self.root.update()
+
+
+    def settle(self):
+        """Wait until the background workers are idle, then deliver their UI callbacks"""
+        self.app.inventory_writer.flush()
+        self.app.io.submit(lambda: None).result()
+        self.app.background.submit(lambda: None).result()
+        self.pump()
+
+
+    def int_var(self, value):
+        return self.ctk.IntVar(value=value)
+
+
+    def close(self):
+        self.app.thumbnails.shutdown()
+        self.app.io.shutdown(wait=True)
+        self.app.background.shutdown(wait=True)
+        self.app.store.close()
+        if self.widgets != "mock":
+            self.root.destroy()
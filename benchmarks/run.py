@@ -0,0 +1,325 @@
+import argparse
+import datetime
+import itertools
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+RESULTS_DIR = REPO_DIR / "benchmarks" / "results"
+sys.path.insert(0, str(REPO_DIR))
+
+from benchmarks.synthetic import write_dataset
+
+
+def measure(operation, iterations, setup=None):
+    """Time an operation (latency percentiles in ms) and measure its peak traced memory
+
+    setup() runs before every call and is not timed. Memory is measured in one extra
+    call under tracemalloc, so tracing does not distort the timings.
+    """
+    timings = []
+    for _ in range(iterations):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        operation()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    if setup is not None:
+        setup()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    operation()
+    peak = tracemalloc.get_traced_memory()[1] - baseline
+    tracemalloc.stop()
+
+    timings.sort()
+    return {
+        "iterations": iterations,
+        "latency_ms": {
+            "mean": round(statistics.fmean(timings), 3),
+            "p50": round(percentile(timings, 50), 3),
+            "p90": round(percentile(timings, 90), 3),
+            "p99": round(percentile(timings, 99), 3),
+            "max": round(timings[-1], 3),
+        },
+        "peak_memory_kb": round(peak / 1024, 1),
+    }
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    rank = math.ceil(pct / 100 * len(sorted_values))
+    return sorted_values[max(0, min(len(sorted_values), rank) - 1)]
+
+
+def run_safely(results, name, function, **labels):
+    """Record an operation's result, or its error without stopping the suite"""
+    print(f"▶️ {name} {labels}")
+    try:
+        result = {"operation": name, **labels, **function()}
+        results.append(result)
+        print(f"   p50 {result['latency_ms']['p50']} ms, p99 {result['latency_ms']['p99']} ms, "
+              f"peak {result['peak_memory_kb']} KB")
+    except Exception as e:
+        results.append({"operation": name, **labels, "error": f"{type(e).__name__}: {e}"})
+        print(f"   ⚠️ {type(e).__name__}: {e}")
+
+
+# GUI handlers ---------------------------------------------------------------
+
+def bench_gui(workdir, skus, args, results):
+    """Time the InventoryManagement handlers against a catalog of skus items"""
+    from benchmarks.harness import BenchApp
+
+    write_dataset(workdir, skus, args.gui_transactions, seed=args.seed)
+    bench = BenchApp(workdir, widgets=args.widgets, storage=args.storage)
+    app = bench.app
+    rng = random.Random(args.seed)
+    items = list(app.inventory)
+    labels = {"skus": skus, "transactions": args.gui_transactions}
+
+    def rebuild_setup():
+        # Start every rebuild from an empty grid
+        if hasattr(app, "center_frame"):
+            app.center_frame.destroy()
+        app.quantity_vars.clear()
+
+    def rebuild():
+        app.populate_inventory()
+        bench.pump()
+
+    def change_some_items():
+        # About 1% of the catalog changed, as after a Firebase update
+        for item in rng.sample(items, max(1, skus // 100)):
+            app.catalog.update(item, price=app.inventory[item].price + 1)
+
+    def refresh():
+        app.refresh_inventory_display()
+        bench.pump()
+
+    def sale(persist):
+        def run():
+            item = rng.choice(items)
+            app.inventory[item].quantity = 10
+            app.add_amount(item, bench.int_var(1))
+            if persist:
+                bench.settle()
+        return run
+
+    def checkout(persist):
+        def run():
+            # An eight-item basket committed at once (compare with eight add_amount calls)
+            app.cart_mode = True
+            for item in rng.sample(items, min(8, len(items))):
+                app.inventory[item].quantity = 10
+                app.add_amount(item, bench.int_var(1))
+            app.checkout_cart()
+            app.cart_mode = False
+            if persist:
+                bench.settle()
+        return run
+
+    # Typing a product name one letter at a time, then clearing the search bar
+    name = items[-1]
+    keystrokes = itertools.cycle([name[:length] for length in range(len(name) + 1)])
+
+    def search():
+        app.search_inventory(next(keystrokes))
+        bench.pump()
+
+    summary = app.store.history_summary()
+
+    def export():
+        app.start_history_export(summary).result()
+
+    run_safely(results, "populate_inventory", lambda: measure(rebuild, args.repeat, rebuild_setup), **labels)
+    run_safely(results, "refresh_inventory_display", lambda: measure(refresh, args.repeat, change_some_items), **labels)
+    run_safely(results, "add_amount (ui thread)", lambda: measure(sale(False), args.repeat, bench.settle), **labels)
+    run_safely(results, "add_amount (persisted)", lambda: measure(sale(True), args.repeat, bench.settle), **labels)
+    run_safely(results, "checkout_cart (8 items, ui thread)", lambda: measure(checkout(False), args.repeat, bench.settle), **labels)
+    run_safely(results, "checkout_cart (8 items, persisted)", lambda: measure(checkout(True), args.repeat, bench.settle), **labels)
+    run_safely(results, "search_inventory (keystroke)", lambda: measure(search, args.repeat), **labels)
+    run_safely(results, "export_history_to_excel", lambda: measure(export, args.export_repeat), **labels)
+
+    bench.close()
+
+
+# Storage and export -----------------------------------------------------------
+
+def bench_store(workdir, transactions, args, results):
+    """Time sales, history queries and exports against a history of transactions"""
+    from history_export import column_widths, export_history
+    from storage import open_store
+
+    inventory_dir = write_dataset(workdir, args.store_skus, transactions, seed=args.seed)
+    store = open_store(inventory_dir, backend=args.storage)
+    inventory = store.load_inventory()
+    items = list(inventory)
+    rng = random.Random(args.seed)
+    labels = {"skus": args.store_skus, "transactions": transactions}
+
+    summary = store.history_summary()
+    days = list(summary["days"])
+    prices = {item: data["price"] for item, data in inventory.items()}
+    widths = column_widths(summary, prices)
+
+    def record_sale():
+        item = rng.choice(items)
+        store.record_sale(item, 1, inventory[item]["price"], {item: inventory[item]["quantity"]})
+
+    def record_basket():
+        basket = rng.sample(items, min(8, len(items)))
+        store.record_sales([(item, 1, inventory[item]["price"]) for item in basket],
+                           {item: inventory[item]["quantity"] for item in basket})
+
+    def append_history():
+        item = rng.choice(items)
+        store.append_history({"quantity": 1, "item": item, "total": inventory[item]["price"]})
+
+    def query_week():
+        start = rng.randrange(max(1, len(days) - 7))
+        store.query_history(days[start], days[min(len(days) - 1, start + 6)])
+
+    def query_item():
+        store.query_history(items=[rng.choice(items)])
+
+    def export(fmt):
+        path = Path(workdir) / f"export.{fmt}"
+        return lambda: export_history(path, store.iter_history(), prices, fmt=fmt, widths=widths)
+
+    run_safely(results, "store.record_sale", lambda: measure(record_sale, args.repeat), **labels)
+    run_safely(results, "store.record_sales (8 items)", lambda: measure(record_basket, args.repeat), **labels)
+    run_safely(results, "store.append_history", lambda: measure(append_history, args.repeat), **labels)
+    run_safely(results, "store.history_summary", lambda: measure(store.history_summary, args.repeat), **labels)
+    run_safely(results, "store.query_history (7 days)", lambda: measure(query_week, args.repeat), **labels)
+    run_safely(results, "store.query_history (1 item)", lambda: measure(query_item, args.repeat), **labels)
+    for fmt in ("csv", "jsonl", "xlsx"):
+        run_safely(results, f"export ({fmt})", lambda: measure(export(fmt), args.export_repeat), **labels)
+
+    store.close()
+
+
+# Results ----------------------------------------------------------------------
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def max_rss_kb():
+    """Peak resident memory of this process (Unix only)"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == "darwin" else rss
+
+
+def compare(old_path, new_path, threshold):
+    """Print p50 changes between two result files; returns True when something regressed"""
+    with open(old_path, encoding="utf-8") as file:
+        old = json.load(file)
+    with open(new_path, encoding="utf-8") as file:
+        new = json.load(file)
+
+    def key(result):
+        return (result["operation"], result.get("skus"), result.get("transactions"))
+
+    baseline = {key(result): result for result in old["results"] if "latency_ms" in result}
+    regressed = False
+    print(f"{old['meta']['commit']} -> {new['meta']['commit']} (p50, regression above {threshold:.2f}x)")
+    for result in new["results"]:
+        before = baseline.get(key(result))
+        if before is None or "latency_ms" not in result:
+            continue
+        ratio = result["latency_ms"]["p50"] / max(before["latency_ms"]["p50"], 1e-6)
+        flag = "🔺" if ratio > threshold else "  "
+        regressed = regressed or ratio > threshold
+        print(f"{flag} {result['operation']:<34} skus={result.get('skus')!s:<6} tx={result.get('transactions')!s:<8} "
+              f"{before['latency_ms']['p50']:>10.3f} -> {result['latency_ms']['p50']:>10.3f} ms ({ratio:.2f}x)")
+    return regressed
+
+
+def parse_sizes(text):
+    return [int(size) for size in text.split(",") if size]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the inventory GUI handlers, storage and exports")
+    sub = parser.add_subparsers(dest="command")
+
+    run = sub.add_parser("run", help="Run the benchmarks (default)")
+    run.add_argument("--skus", type=parse_sizes, default=[10, 1000, 10000, 50000], help="Catalog sizes for the GUI handlers")
+    run.add_argument("--transactions", type=parse_sizes, default=[1000, 100000, 1000000], help="History sizes for storage and export")
+    run.add_argument("--gui-transactions", type=int, default=10000, help="History size used with the GUI handlers")
+    run.add_argument("--store-skus", type=int, default=1000, help="Catalog size used with the storage benchmarks")
+    run.add_argument("--repeat", type=int, default=20, help="Timed calls per operation")
+    run.add_argument("--export-repeat", type=int, default=3, help="Timed calls per export")
+    run.add_argument("--widgets", choices=("mock", "tk"), default="mock", help="Mocked widgets or real Tk (needs a display / Xvfb)")
+    run.add_argument("--storage", choices=("json", "sqlite"), default="json")
+    run.add_argument("--only", choices=("gui", "store"), help="Run only one group")
+    run.add_argument("--seed", type=int, default=0)
+    run.add_argument("--output", help="Result file (default: benchmarks/results/<time>-<commit>.json)")
+
+    cmp = sub.add_parser("compare", help="Compare two result files")
+    cmp.add_argument("old")
+    cmp.add_argument("new")
+    cmp.add_argument("--threshold", type=float, default=1.2, help="p50 ratio counted as a regression")
+
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] not in ("run", "compare", "-h", "--help"):
+        argv = ["run", *argv]
+    args = parser.parse_args(argv)
+
+    if args.command == "compare":
+        sys.exit(1 if compare(args.old, args.new, args.threshold) else 0)
+
+    results = []
+    started = datetime.datetime.now()
+    with tempfile.TemporaryDirectory(prefix="inventory-bench-") as tmp:
+        if args.only in (None, "store"):
+            for transactions in args.transactions:
+                bench_store(Path(tmp) / f"store-{transactions}", transactions, args, results)
+        if args.only in (None, "gui"):
+            for skus in args.skus:
+                bench_gui(Path(tmp) / f"gui-{skus}", skus, args, results)
+        os.chdir(REPO_DIR)  # Leave the temporary directory before it is removed
+
+    commit = git_commit()
+    output = Path(args.output) if args.output else RESULTS_DIR / f"{started:%Y%m%d-%H%M%S}-{commit}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    report = {
+        "meta": {
+            "commit": commit,
+            "started": started.isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "widgets": args.widgets,
+            "storage": args.storage,
+            "max_rss_kb": max_rss_kb(),
+        },
+        "results": results,
+    }
+    with output.open("w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2)
+    print(f"✅ Results saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
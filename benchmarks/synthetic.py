@@ -0,0 +1,56 @@
+import datetime
+import json
+import math
+import random
+
+from pathlib import Path
+from history_query import DATE_KEY_FORMAT
+
+
+def make_catalog(skus, seed=0):
+    """Synthetic inventory ({id: record}) with skus items in the stored JSON format"""
+    rng = random.Random(seed)
+    return {
+        f"Item {index:05d}": {"name": f"Item {index:05d}", "price": rng.randrange(50, 5001, 50), "quantity": 0}
+        for index in range(skus)
+    }
+
+
+def make_history(transactions, catalog, days=365, seed=0, start=datetime.date(2024, 1, 1)):
+    """Per-date history view ({date: [entries]}) with transactions spread evenly over days"""
+    rng = random.Random(seed)
+    names = list(catalog)
+    per_day = max(1, math.ceil(transactions / days))
+
+    history = {}
+    seq = 0
+    day = start
+    while seq < transactions:
+        entries = []
+        for _ in range(min(per_day, transactions - seq)):
+            seq += 1
+            item = rng.choice(names)
+            quantity = rng.randint(1, 5)
+            entries.append({"seq": seq, "ts": f"{day.isoformat()}T12:00:00", "item": item,
+                            "quantity": quantity, "total": catalog[item]["price"] * quantity})
+        history[day.strftime(DATE_KEY_FORMAT)] = entries
+        day += datetime.timedelta(days=1)
+    return history
+
+
+def write_dataset(directory, skus, transactions, seed=0):
+    """Write inventory.json, amounts.json and history.json for a synthetic shop; returns the inventory dir"""
+    inventory_dir = Path(directory) / "inventory"
+    inventory_dir.mkdir(parents=True, exist_ok=True)
+
+    catalog = make_catalog(skus, seed)
+    history = make_history(transactions, catalog, seed=seed)
+    total = sum(entry["total"] for entries in history.values() for entry in entries)
+
+    with (inventory_dir / "inventory.json").open("w", encoding="utf-8") as file:
+        json.dump(catalog, file)
+    with (inventory_dir / "amounts.json").open("w", encoding="utf-8") as file:
+        json.dump({"total": total, "entries": []}, file)
+    with (inventory_dir / "history.json").open("w", encoding="utf-8") as file:
+        json.dump(history, file)
+    return inventory_dir
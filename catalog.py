@@ -0,0 +1,320 @@
+import re
+
+from asset_store import normalize_path
+
+
+class Item:
+    """One inventory item: fixed attributes in __slots__, validated once when loaded
+
+    Items live in memory in this form; plain dicts are only used at the edges (JSON files,
+    SQLite rows and Firebase) through from_json / to_json.
+    """
+
+    __slots__ = ("price", "quantity", "image", "name")
+
+    def __init__(self, price=100, quantity=0, image=None, name=None):
+        self.price = price          # int or float, as stored
+        self.quantity = quantity    # Units in stock
+        self.image = image          # Image path (None if the record has none)
+        self.name = name            # Display name (None if the record has none)
+
+
+    @classmethod
+    def from_json(cls, data):
+        """Validate a stored record (dict or legacy integer quantity); raises ValueError if invalid"""
+        if isinstance(data, bool):
+            raise ValueError(f"Invalid item record: {data!r}")
+        if isinstance(data, int):   # Old format (integer quantity)
+            return cls(quantity=data)
+        if not isinstance(data, dict):
+            raise ValueError(f"Invalid item record: {data!r}")
+
+        price = data.get("price", 100)
+        if not isinstance(price, (int, float)) or isinstance(price, bool):
+            try:
+                price = float(price)
+            except (TypeError, ValueError):
+                raise ValueError(f"Invalid price: {price!r}")
+        try:
+            quantity = int(data.get("quantity", 0))
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid quantity: {data.get('quantity')!r}")
+
+        return cls(price, quantity, normalize_path(data.get("image")), data.get("name"))
+
+
+    def to_json(self):
+        """Plain dict in the stored format (optional fields only when set)"""
+        data = {"price": self.price, "quantity": self.quantity}
+        if self.image is not None:
+            data["image"] = self.image
+        if self.name is not None:
+            data["name"] = self.name
+        return data
+
+
+    def __eq__(self, other):
+        if not isinstance(other, Item):
+            return NotImplemented
+        return (self.price, self.quantity, self.image, self.name) == (other.price, other.quantity, other.image, other.name)
+
+
+    def __repr__(self):
+        return f"Item(price={self.price!r}, quantity={self.quantity!r}, image={self.image!r}, name={self.name!r})"
+
+
+def inventory_from_json(data):
+    """Validate a stored inventory dict into {id: Item}, skipping (and reporting) invalid records"""
+    inventory = {}
+    for item_id, record in data.items():
+        try:
+            inventory[item_id] = Item.from_json(record)
+        except ValueError as e:
+            print(f"⚠️ Skipping inventory item {item_id!r}: {e}")
+    return inventory
+
+
+def inventory_to_json(inventory):
+    """Plain-dict copy of an {id: Item} inventory for storage and Firebase"""
+    return {item_id: item.to_json() for item_id, item in inventory.items()}
+
+
+class Catalog:
+    """Inventory items by canonical ID with secondary indexes kept up to date in place
+
+    The canonical ID of an item is its key in inventory.json and Firebase. The lower-cased
+    name, image path, price band and search indexes are updated on every add, edit and
+    remove, so lookups, searches and dropdown lists never scan or rebuild the whole inventory.
+    """
+
+    PRICE_BAND = 100    # Width of a price band (₱)
+    # A search word for a price range ("50-150", "₱50-₱150")
+    PRICE_RANGE = re.compile(r"₱?(\d+(?:\.\d+)?)-₱?(\d+(?:\.\d+)?)")
+    GRAM = 3            # Search terms this long or longer match anywhere in a name (trigram index)
+
+    def __init__(self, items=None):
+        self.load({} if items is None else items)
+
+
+    def load(self, items):
+        """Index a whole inventory dict (only on startup and full reloads); the dict is used in place"""
+        self.items = items          # Canonical ID -> Item
+        self.by_name = {}           # Lower-cased ID / display name -> canonical ID
+        self.by_image = {}          # Image path -> set of canonical IDs
+        self.by_price_band = {}     # Price band -> set of canonical IDs
+        self.by_gram = {}           # Trigram of a lower-cased name -> set of sequence numbers
+        self.by_prefix = {}         # First one or two letters of a word -> set of sequence numbers
+        self.search_text = {}       # Sequence number -> lower-cased names, to confirm trigram matches
+        self._names = None          # Cached dropdown list
+
+        # The search indexes hold sequence numbers that increase in inventory order, so
+        # matches come out in grid order with a plain integer sort
+        self._seq = {}              # Canonical ID -> sequence number
+        self._by_seq = {}           # Sequence number -> canonical ID
+        self._next_seq = 0
+
+        for item_id, data in items.items():
+            self._index(item_id, data)
+
+
+    def __contains__(self, item_id):
+        return item_id in self.items
+
+
+    def __len__(self):
+        return len(self.items)
+
+
+    def find(self, name):
+        """Canonical ID for a name typed in any case (None if unknown)"""
+        if name in self.items:
+            return name
+        return self.by_name.get(name.strip().lower())
+
+
+    def names(self):
+        """Canonical IDs in inventory order (for dropdowns)"""
+        if self._names is None:
+            self._names = list(self.items)
+        return self._names
+
+
+    def search(self, text, limit=None):
+        """Canonical IDs matching every word of text, in inventory order (all items if text is blank)
+
+        Words shorter than GRAM letters match the start of a word of the name ("ha" finds
+        "Claw Hammer"); longer words match anywhere ("mmer" too). A word like "50-150" keeps
+        the items priced in that range. Each word is answered from the prefix / trigram / price
+        band indexes, so the cost depends on the matches, not the catalog size.
+        """
+        terms = text.lower().split()
+        if not terms:
+            return self.names()[:limit]
+
+        matches = None
+        for term in sorted(terms, key=len, reverse=True):   # Longest (most selective) word first
+            found = self._match(term, matches)
+            matches = found if matches is None else matches & found
+            if not matches:
+                return []
+
+        return [self._by_seq[seq] for seq in sorted(matches)[:limit]]
+
+
+    def with_image(self, image_path):
+        """IDs of the items using an image"""
+        return set(self.by_image.get(image_path, ()))
+
+
+    def in_price_range(self, low, high):
+        """IDs of the items priced between low and high (only the overlapping bands are visited)"""
+        matches = set()
+        for band in range(self.price_band(low), self.price_band(high) + 1):
+            for item_id in self.by_price_band.get(band, ()):
+                if low <= self.items[item_id].price <= high:
+                    matches.add(item_id)
+        return matches
+
+
+    def add(self, item_id, data):
+        """Add a new item (raises ValueError if the name is already taken in any case)"""
+        existing = self.find(item_id)
+        if existing is not None:
+            raise ValueError(f"'{existing}' already exists")
+
+        self.items[item_id] = data
+        self._index(item_id, data)
+        self._names = None
+
+
+    def update(self, item_id, **changes):
+        """Change fields of an item, moving it between image / price indexes as needed"""
+        data = self.items[item_id]
+        self._unindex(item_id, data)
+        for field, value in changes.items():
+            setattr(data, field, value)
+        self._index(item_id, data)
+
+
+    def rename(self, item_id, new_id):
+        """Move an item to a new canonical ID (raises ValueError if another item has that name)"""
+        if new_id == item_id:
+            return
+        existing = self.find(new_id)
+        if existing is not None and existing != item_id:
+            raise ValueError(f"'{existing}' already exists")
+
+        data = self.remove(item_id)
+        if data.name is not None:
+            data.name = new_id      # Keep the display name in step
+        self.items[new_id] = data
+        self._index(new_id, data)
+        self._names = None
+
+
+    def remove(self, item_id):
+        """Remove an item and return its data"""
+        data = self.items.pop(item_id)
+        self._unindex(item_id, data)
+        del self._by_seq[self._seq.pop(item_id)]    # A re-added item goes to the end, as in the dict
+        self._names = None
+        return data
+
+
+    @classmethod
+    def price_band(cls, price):
+        return int(price // cls.PRICE_BAND)
+
+
+    def _keys(self, item_id, data):
+        """Lower-cased names an item can be found by"""
+        keys = {item_id.lower()}
+        if data.name:
+            keys.add(str(data.name).lower())
+        return keys
+
+
+    def _match(self, term, candidates=None):
+        """Sequence numbers of the items matching one lower-cased search word (checked against candidates when given)"""
+        price_range = self.PRICE_RANGE.fullmatch(term)
+        if price_range is not None:
+            # Items in the price range, plus any that have the word in their name ("Nail 10-20")
+            low, high = sorted(float(bound) for bound in price_range.groups())
+            found = {self._seq[item_id] for item_id in self.in_price_range(low, high)}
+            return (found if candidates is None else found & candidates) | self._match_name(term, candidates)
+        return self._match_name(term, candidates)
+
+
+    def _match_name(self, term, candidates=None):
+        """Sequence numbers of the items whose names match one lower-cased search word"""
+        if len(term) < self.GRAM:
+            return set(self.by_prefix.get(term, ()))
+
+        if candidates is None:
+            # Rarest trigram first: every other one only narrows it down
+            grams = sorted((self.by_gram.get(gram, set()) for gram in self._grams(term)), key=len)
+            candidates = grams[0].intersection(*grams[1:])
+            if len(term) == self.GRAM:
+                return candidates
+        # Shared trigrams don't guarantee the word appears as a whole
+        return {seq for seq in candidates if term in self.search_text[seq]}
+
+
+    @classmethod
+    def _grams(cls, key):
+        return {key[i:i + cls.GRAM] for i in range(len(key) - cls.GRAM + 1)}
+
+
+    @classmethod
+    def _search_keys(cls, keys):
+        """Trigrams and word prefixes of an item's lower-cased names, for the search indexes"""
+        grams, prefixes = set(), set()
+        for key in keys:
+            grams |= cls._grams(key)
+            for word in key.split():
+                prefixes.update(word[:length] for length in range(1, cls.GRAM))
+        return grams, prefixes
+
+
+    def _index(self, item_id, data):
+        keys = self._keys(item_id, data)
+        for key in keys:
+            self.by_name.setdefault(key, item_id)   # First item keeps a shared name
+        seq = self._seq.get(item_id)
+        if seq is None:     # Edits keep their number (and place)
+            seq = self._seq[item_id] = self._next_seq
+            self._by_seq[seq] = item_id
+            self._next_seq += 1
+        self.search_text[seq] = "\n".join(keys)
+        grams, prefixes = self._search_keys(keys)
+        for gram in grams:
+            self.by_gram.setdefault(gram, set()).add(seq)
+        for prefix in prefixes:
+            self.by_prefix.setdefault(prefix, set()).add(seq)
+        if data.image:
+            self.by_image.setdefault(data.image, set()).add(item_id)
+        self.by_price_band.setdefault(self.price_band(data.price), set()).add(item_id)
+
+
+    def _unindex(self, item_id, data):
+        keys = self._keys(item_id, data)
+        for key in keys:
+            if self.by_name.get(key) == item_id:
+                del self.by_name[key]
+        seq = self._seq[item_id]
+        del self.search_text[seq]
+        grams, prefixes = self._search_keys(keys)
+        for index, search_keys in ((self.by_gram, grams), (self.by_prefix, prefixes)):
+            for search_key in search_keys:
+                index[search_key].discard(seq)
+                if not index[search_key]:
+                    del index[search_key]
+        if data.image in self.by_image:
+            self.by_image[data.image].discard(item_id)
+            if not self.by_image[data.image]:
+                del self.by_image[data.image]
+        band = self.price_band(data.price)
+        if band in self.by_price_band:
+            self.by_price_band[band].discard(item_id)
+            if not self.by_price_band[band]:
+                del self.by_price_band[band]
@@ -0,0 +1,245 @@
+import argparse
+import csv
+import json
+import os
+
+from pathlib import Path
+from catalog import Item
+from instrumentation import timed
+
+
+CATALOG_FIELDS = ["name", "price", "quantity", "image"]
+CATALOG_FORMATS = ("csv", "jsonl")
+
+
+def catalog_format(path, fmt=None):
+    """Format of a catalog file, from its extension unless given"""
+    fmt = fmt or Path(path).suffix.lstrip(".").lower()
+    if fmt not in CATALOG_FORMATS:
+        raise ValueError(f"Unsupported catalog format: {fmt or Path(path).name}")
+    return fmt
+
+
+def read_catalog_rows(path, fmt=None):
+    """Yield (line number, row dict) from a CSV or JSONL catalog, one row at a time"""
+    fmt = catalog_format(path, fmt)
+    if fmt == "csv":
+        with open(path, encoding="utf-8-sig", newline="") as file:  # Excel writes a BOM
+            reader = csv.DictReader(file)
+            for row in reader:
+                yield reader.line_num, {key.strip().lower(): value for key, value in row.items() if key}
+    else:
+        with open(path, encoding="utf-8") as file:
+            for line_num, line in enumerate(file, 1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError as e:
+                    row = ValueError(f"Invalid JSON: {e.msg}")
+                yield line_num, row
+
+
+def validate_row(row, base_dir=None):
+    """Validated (name, Item) for one catalog row; raises ValueError with the reason if invalid
+
+    Relative image paths are looked up from the working directory, then next to the
+    catalog file (base_dir). The image has to exist; empty cells mean "no image".
+    """
+    if isinstance(row, Exception):
+        raise row
+    if not isinstance(row, dict):
+        raise ValueError(f"Invalid row: {row!r}")
+
+    name = str(row.get("name") or "").strip()
+    if not name:
+        raise ValueError("Missing name")
+
+    price = row.get("price")
+    if price is None or price == "":
+        raise ValueError("Missing price")
+    if isinstance(price, str) and price.strip().isdigit():
+        price = int(price)      # Keep whole prices as int, like the stored records
+    record = {"price": price, "quantity": row.get("quantity") or 0, "name": name}
+    image = str(row.get("image") or "").strip()
+    if image:
+        if not os.path.isfile(image) and base_dir is not None and os.path.isfile(os.path.join(base_dir, image)):
+            image = os.path.join(base_dir, image)
+        if not os.path.isfile(image):
+            raise ValueError(f"Image not found: {image}")
+        record["image"] = image
+
+    item = Item.from_json(record)
+    if not item.price >= 0:    # Also rejects NaN
+        raise ValueError(f"Invalid price: {price!r}")
+    if item.quantity < 0:
+        raise ValueError(f"Invalid quantity: {record['quantity']!r}")
+    return name, item
+
+
+def validate_catalog(path, fmt=None, import_image=None, chunk_size=500, existing=None):
+    """Stream a catalog file and yield (valid, errors) per chunk of chunk_size rows
+
+    valid is a list of (name, Item); errors a list of (line number, message). Rows are
+    never all held in memory. import_image(path) -> stored path, when given, moves each
+    valid row's image into the asset store. Names repeated in the file are rejected after
+    their first row. existing(name) -> ID of the item already using the name (or None),
+    when given, rejects those rows before their image is stored.
+    """
+    base_dir = os.path.dirname(os.path.abspath(path))
+    seen = set()
+    valid, errors = [], []
+
+    for line_num, row in read_catalog_rows(path, fmt):
+        try:
+            name, item = validate_row(row, base_dir)
+            if name.lower() in seen:
+                raise ValueError(f"Duplicate name in file: {name}")
+            current = existing(name) if existing is not None else None
+            if current is not None:
+                raise ValueError(f"'{current}' already exists")
+            if item.image and import_image is not None:
+                item.image = import_image(item.image)
+            seen.add(name.lower())
+            valid.append((name, item))
+        except (ValueError, OSError) as e:
+            errors.append((line_num, str(e)))
+
+        if len(valid) + len(errors) >= chunk_size:
+            yield valid, errors
+            valid, errors = [], []
+
+    if valid or errors:
+        yield valid, errors
+
+
+def apply_catalog(catalog, rows, update_existing=False):
+    """Add validated (name, Item) rows to a Catalog in memory; returns (added, updated, errors)
+
+    Existing items (matched in any case) are updated in place when update_existing is set,
+    keeping their stock; otherwise they are reported as errors. Nothing is saved here, so
+    the caller writes and uploads the whole batch once.
+    """
+    added, updated, errors = [], [], []
+    for name, item in rows:
+        existing = catalog.find(name)
+        if existing is None:
+            catalog.add(name, item)
+            added.append(name)
+        elif update_existing:
+            current = catalog.items[existing]
+            changes = {"price": item.price}
+            if item.image:
+                changes["image"] = item.image
+            if any(getattr(current, field) != value for field, value in changes.items()):
+                catalog.update(existing, **changes)
+                updated.append(existing)    # Unchanged rows are neither written nor uploaded
+        else:
+            errors.append((name, f"'{existing}' already exists"))
+    return added, updated, errors
+
+
+def catalog_rows(inventory):
+    """Yield export rows ({name, price, quantity, image}) from an {id: Item} inventory"""
+    for item_id, item in inventory.items():
+        yield {"name": item_id, "price": item.price, "quantity": item.quantity, "image": item.image or ""}
+
+
+@timed("catalog.export")
+def export_catalog(path, inventory, fmt=None):
+    """Stream an inventory to a CSV or JSONL catalog (readable by import); returns the row count"""
+    fmt = catalog_format(path, fmt)
+    written = 0
+    temp_file = Path(path).with_suffix(".tmp")
+    if fmt == "csv":
+        with temp_file.open("w", encoding="utf-8-sig", newline="") as file:
+            writer = csv.DictWriter(file, fieldnames=CATALOG_FIELDS)
+            writer.writeheader()
+            for row in catalog_rows(inventory):
+                writer.writerow(row)
+                written += 1
+    else:
+        with temp_file.open("w", encoding="utf-8") as file:
+            for row in catalog_rows(inventory):
+                file.write(json.dumps(row, ensure_ascii=False) + "\n")
+                written += 1
+    temp_file.replace(path)     # Never leave a half-written catalog under its final name
+    return written
+
+
+@timed("catalog.import")
+def import_catalog(path, catalog, fmt=None, import_image=None, update_existing=False, chunk_size=500, progress=None):
+    """Validate a catalog file chunk by chunk and apply it to a Catalog in memory
+
+    Returns {"added": [...], "updated": [...], "errors": [(line or name, message)]}.
+    progress(rows done) is called after every chunk. Saving and uploading are left to the
+    caller, so a whole import is one inventory write and one Firebase update. Rows of items
+    that already exist are rejected before their image is stored, unless they update them.
+    """
+    report = {"added": [], "updated": [], "errors": []}
+    done = 0
+    existing = None if update_existing else catalog.find
+    for valid, errors in validate_catalog(path, fmt, import_image, chunk_size, existing):
+        added, updated, rejected = apply_catalog(catalog, valid, update_existing)
+        report["added"] += added
+        report["updated"] += updated
+        report["errors"] += errors + rejected
+        done += len(valid) + len(errors)
+        if progress is not None:
+            progress(done)
+    return report
+
+
+def main(argv=None):
+    """Import or export the catalog of an inventory directory without the GUI"""
+    from asset_store import AssetStore
+    from catalog import Catalog, inventory_from_json, inventory_to_json
+    from outbox import open_outbox
+    from storage import open_store
+
+    parser = argparse.ArgumentParser(description="Bulk import / export of the inventory catalog (CSV or JSONL)")
+    parser.add_argument("--inventory-dir", default=os.path.join(os.getcwd(), "inventory"))
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    imp = sub.add_parser("import", help="Validate and add the items of a catalog file")
+    imp.add_argument("path")
+    imp.add_argument("--format", choices=CATALOG_FORMATS, help="Default: from the file extension")
+    imp.add_argument("--update", action="store_true", help="Update items that already exist instead of rejecting them")
+    imp.add_argument("--dry-run", action="store_true", help="Only validate, change nothing")
+    imp.add_argument("--chunk-size", type=int, default=500)
+
+    exp = sub.add_parser("export", help="Write the catalog to a file")
+    exp.add_argument("path")
+    exp.add_argument("--format", choices=CATALOG_FORMATS, help="Default: from the file extension")
+
+    args = parser.parse_args(argv)
+    store = open_store(args.inventory_dir, compact=False)
+    try:
+        inventory = inventory_from_json(store.load_inventory())
+        if args.command == "export":
+            written = export_catalog(args.path, inventory, args.format)
+            print(f"✅ Exported {written} items to {args.path}")
+            return
+
+        catalog = Catalog(inventory)
+        assets = AssetStore(Path.cwd() / "assets")
+        import_image = None if args.dry_run else lambda path: assets.import_image(path, derivative=False)
+        report = import_catalog(args.path, catalog, args.format, import_image=import_image,
+                                update_existing=args.update, chunk_size=args.chunk_size,
+                                progress=lambda done: print(f"⏳ {done} rows checked"))
+        for where, message in report["errors"]:
+            print(f"⚠️ {where}: {message}")
+
+        changed = report["added"] + report["updated"]
+        if changed and not args.dry_run:
+            # One write for the whole batch, and one multi-path update queued for Firebase
+            store.save_inventory(inventory_to_json(inventory))
+            open_outbox(args.inventory_dir).put_many({f"inventory/{item}": inventory[item].to_json() for item in changed})
+        print(f"✅ {len(report['added'])} added, {len(report['updated'])} updated, {len(report['errors'])} rejected"
+              + (" (dry run)" if args.dry_run else ""))
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,56 +1,133 @@
-import firebase_admin
 import json
 import os
 import threading
-import time
 
 from tkinter import TclError
-from firebase_admin import credentials, db
+from instrumentation import count, count_payload, timed
+from outbox import open_outbox
+from storage import empty_amounts, open_store
+from sync_engine import SyncEngine
+
+# Nothing connects at import time: start_sync() sets everything below up once
+root_ref = db_ref = amounts_ref = history_ref = None
+store = None        # Local storage backend (shared with the GUI when it passes its own)
+outbox = None       # Pending writes, uploaded in batches so changes survive going offline
+sync_engine = None
+ready = threading.Event()   # Set once Firebase is connected and the sync engine is running
+_start_lock = threading.Lock()
 
-# Load firebase credentials
-try:
-    cred = credentials.Certificate("inventory-management-349a9-872e51942446.json")
-    firebase_admin.initialize_app(cred, {
-        "databaseURL": "https://inventory-management-349a9-default-rtdb.firebaseio.com/"
-    })
-    print("✅ Firebase connected successfully")
-except Exception as e:
-    print(f"❌ Firebase connection failed: {e}")
+gui_update_callback = None  # Global variable to store the callback function
+gui_dispatch = None         # Runs a function on the Tk main thread (e.g. UIDispatcher.call)
 
-# Create database reference
-db_ref = db.reference("inventory")
-amounts_ref = db.reference("amounts")
-history_ref = db.reference("history")
 
-# Define JSON file paths
-inventory_path = os.path.join(os.getcwd(), "inventory", "inventory.json")
-amounts_path = os.path.join(os.getcwd(), "inventory", "amounts.json")
-history_path = os.path.join(os.getcwd(), "inventory", "history.json")
+@timed("firebase.connect")
+def connect():
+    """Initialize the Firebase app (once) and create the database references"""
+    global root_ref, db_ref, amounts_ref, history_ref
+    import firebase_admin   # Imported here so the GUI can paint before the SDK loads
 
-gui_update_callback = None  # Global variable to store the callback function
+    from firebase_admin import credentials, db
+
+    # Load firebase credentials (only once per process)
+    try:
+        firebase_admin.get_app()
+    except ValueError:
+        try:
+            cred = credentials.Certificate("inventory-management-349a9-872e51942446.json")
+            firebase_admin.initialize_app(cred, {
+                "databaseURL": "https://inventory-management-349a9-default-rtdb.firebaseio.com/"
+            })
+            print("✅ Firebase connected successfully")
+        except Exception as e:
+            print(f"❌ Firebase connection failed: {e}")
+
+    # Create database reference
+    root_ref = db.reference("/")
+    db_ref = db.reference("inventory")
+    amounts_ref = db.reference("amounts")
+    history_ref = db.reference("history")
+
+
+@timed("firebase.start_sync")
+def start_sync(local_store=None, inventory_dir=None):
+    """Connect and start the single sync engine of this process (idempotent); returns the engine
+
+    Pass the GUI's store to share it; otherwise one is opened for the inventory directory.
+    """
+    global store, outbox, sync_engine
+    with _start_lock:
+        if sync_engine is not None:
+            return sync_engine
+
+        inventory_dir = inventory_dir or os.path.join(os.getcwd(), "inventory")
+        connect()
+        # A standalone sync process leaves history compaction to the GUI
+        store = local_store if local_store is not None else open_store(inventory_dir, compact=False)
+        outbox = open_outbox(inventory_dir)
+
+        # Change-driven sync: streamed inventory deltas in, only changed amounts/history children out
+        # (falls back to polling with backoff when streaming is unavailable)
+        sync_engine = SyncEngine(store, db_ref, amounts_ref, history_ref, on_change=safe_gui_update,
+                                 root_ref=root_ref, outbox=outbox,
+                                 history_mark_path=os.path.join(inventory_dir, "history_sync.json"))
+        sync_engine.start()
+        print("🔄 Started syncing database updates...")
+        ready.set()
+        return sync_engine
+
+
+def start_sync_in_background(local_store=None, inventory_dir=None, on_ready=None, on_error=None):
+    """Run start_sync on a daemon thread; on_ready(engine) / on_error(exc) are called from it"""
+    def run():
+        try:
+            engine = start_sync(local_store, inventory_dir)
+        except Exception as e:
+            print(f"❌ Could not start Firebase sync: {e}")
+            if on_error is not None:
+                on_error(e)
+            return
+        if on_ready is not None:
+            on_ready(engine)
+
+    thread = threading.Thread(target=run, name="firebase-sync", daemon=True)
+    thread.start()
+    return thread
+
+
+def stop_sync():
+    """Stop the sync engine (pending writes stay in the outbox for the next run)"""
+    global sync_engine
+    with _start_lock:
+        if sync_engine is not None:
+            sync_engine.stop()
+            sync_engine = None
+        ready.clear()
 
 # Set the callback from the GUI
-def set_gui_update_callback(callback):
-    global gui_update_callback
+def set_gui_update_callback(callback, dispatch=None):
+    """Register the GUI refresh callback and how to run it on the Tk main thread"""
+    global gui_update_callback, gui_dispatch
     gui_update_callback = callback
+    gui_dispatch = dispatch
 
 
 def add_or_update_item(item_name, price, quantity, image):
-    """Add a new item or update an existing one in Firebase"""
-    item_ref = db_ref.child(item_name)
-    item_ref.set({
+    """Add a new item or update an existing one (queued for Firebase, applied locally now)"""
+    sync_engine.write_item(item_name, {
         "name": item_name,
         "price": price,
         "quantity": quantity,
         "image": image
     })
-    sync_inventory_from_firebase()
     print(f"✅ Item '{item_name}' addded/updated successfully")
 
 
+@timed("firebase.get_inventory")
 def get_inventory():
     """Retrieve all inventory items from Firebase"""
+    count("net.calls")
     inventory = db_ref.get()
+    count_payload("net.bytes_received", inventory)
     if inventory:
         print("📦 Inventory Retrieved:")
         for item, data in inventory.items():
@@ -62,80 +139,77 @@ def get_inventory():
 
 
 def delete_item(item_name):
-    """Delete an item from Firebase"""
-    item_ref = db_ref.child(item_name)
-    item_ref.delete()
-    sync_inventory_from_firebase()
+    """Delete an item (queued for Firebase, applied locally now)"""
+    sync_engine.write_item(item_name, None)
     print(f"❌ Item '{item_name}' deleted successfully")
 
 
+@timed("firebase.sync_inventory")
 def sync_inventory_from_firebase():
     """Fetch inventory data from Firebase and save it locally"""
+    count("net.calls")
     inventory_data = db_ref.get()   # Get inventory from Firebase
+    count_payload("net.bytes_received", inventory_data)
 
     if inventory_data:
-        with open(inventory_path, "w") as file:
-            json.dump(inventory_data, file, indent=4)
+        store.save_inventory(inventory_data)
         print("✅ Synced inventory.json to Firebase")
     else:
         print("⚠️ No inventory data found in Firebase")
 
 
+@timed("firebase.sync_amounts")
 def sync_amounts_to_firebase():
     """Fetch amounts data from Firebase and save it locally"""
-    # Create file if not existing
-    if not os.path.exists(amounts_path):
-        with open(amounts_path, "w") as file:
-            json.dump({"total": 0, "entries": []}, file)
-    
-    with open(amounts_path, "r") as file:
-        amounts_data = json.load(file)
+    try:
+        amounts_data = store.load_amounts()
+    except (json.JSONDecodeError, ValueError):
+        amounts_data = empty_amounts()
     
+    count("net.calls")
+    count_payload("net.bytes_sent", amounts_data)
     amounts_ref.set(amounts_data)
     print("✅ Synced amounts.json to Firebase")
 
 
+@timed("firebase.sync_history")
 def sync_history_to_firebase():
     """Fetch history data from Firebase and save it locally"""
-    # Create file if not existing
-    if not os.path.exists(history_path):
-        with open(history_path, "w") as file:
-            json.dump([], file)
-
-    with open(history_path, "r") as file:
-        history_data = json.load(file)
+    # Rebuild the per-date view from the storage backend
+    history_data = store.read_history()
+    count("net.calls")
+    count_payload("net.bytes_sent", history_data)
 
     history_ref.set(history_data if history_data else ["No history yet"])
     print("✅ Synced history.json to Firebase")
 
 
-def poll_firebase_for_changes():
-    """Poll Firebase every few seconds for updates"""
-    while True:
-        try:
-            # Sync all data from Firebase
-            sync_inventory_from_firebase()
-            sync_amounts_to_firebase()
-            sync_history_to_firebase()
-            print("🔄 Polled and updated from Firebase")
-
-            # Trigger GUI update safely
-            safe_gui_update()  # Call the function to safely update the GUI
-            time.sleep(3)
-        except Exception as e:
-            print(f"⚠️ Error while polling Firebase: {e}")
-
-
 def safe_gui_update():
-    if gui_update_callback and hasattr(gui_update_callback, 'winfo_exists') and gui_update_callback.winfo_exists():
+    """Ask the GUI to refresh; the callback always runs on the Tk main thread"""
+    if gui_update_callback is None:
+        print("⚠️ GUI update skipped - no GUI registered.")
+        return
+
+    def run_update():
         try:
             gui_update_callback()  # Perform the update safely
         except TclError as e:
             print(f"🚨 GUI update failed: {e}")
+
+    if gui_dispatch is not None:
+        gui_dispatch(run_update)    # Hand off to the main thread (sync threads must not touch Tk)
     else:
-        print("⚠️ GUI update skipped - widget no longer exists.")
+        print("⚠️ GUI update skipped - no main-thread dispatcher registered.")
+
 
+if __name__ == "__main__":
+    import instrumentation
 
-# Start the polling in a separate thread
-threading.Thread(target=poll_firebase_for_changes, daemon=True).start()
-print("🔄 Started polling for database updates...")
+    # Standalone sync service (without the GUI)
+    instrumentation.start(os.path.join(os.getcwd(), "inventory", "metrics"))
+    start_sync()
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        stop_sync()
+        instrumentation.stop()
@@ -0,0 +1,89 @@
+import copy
+import json
+
+from pathlib import Path
+
+
+class HistoryAggregates:
+    """Running per-day and per-item totals of the purchase history
+
+    Updated in O(1) as each purchase is logged, so views that only need totals never have
+    to scan the individual transactions.
+    """
+
+    def __init__(self):
+        self.days = {}      # date -> {"total": amount, "count": transactions} (in date order)
+        self.items = {}     # item -> {"quantity": units sold, "revenue": amount}
+        self.total = 0      # Revenue across the whole history
+        self.count = 0      # Number of transactions
+        self.last_seq = 0   # Highest journal sequence number included
+
+
+    def add(self, date, entry):
+        """Include one purchase"""
+        quantity = entry.get("quantity", 0)
+        amount = entry.get("total", 0)
+
+        day = self.days.setdefault(date, {"total": 0, "count": 0})
+        day["total"] += amount
+        day["count"] += 1
+
+        item = self.items.setdefault(entry.get("item", "Unknown Item"), {"quantity": 0, "revenue": 0})
+        item["quantity"] += quantity
+        item["revenue"] += amount
+
+        self.total += amount
+        self.count += 1
+        self.last_seq = max(self.last_seq, entry.get("seq", 0))
+
+
+    def summary(self):
+        """Return a copy that is safe to hand to another thread"""
+        return {
+            "days": copy.deepcopy(self.days),
+            "items": copy.deepcopy(self.items),
+            "total": self.total,
+            "count": self.count
+        }
+
+
+    @classmethod
+    def from_history(cls, history):
+        """Build the aggregates from a per-date history view (O(transactions), done once)"""
+        aggregates = cls()
+        for date, entries in history.items():
+            for entry in entries:
+                aggregates.add(date, entry)
+        return aggregates
+
+
+    def save(self, path, signature=None):
+        """Persist the aggregates (temp file + replace) with the history signature they match"""
+        path = Path(path)
+        data = {**self.summary(), "last_seq": self.last_seq, "signature": signature}
+        temp_file = path.with_suffix(".tmp")
+        with temp_file.open("w", encoding="utf-8") as file:
+            json.dump(data, file)
+        temp_file.replace(path)
+
+
+    @classmethod
+    def load(cls, path, signature=None):
+        """Load persisted aggregates, or None if missing, invalid or out of date"""
+        path = Path(path)
+        try:
+            with path.open("r", encoding="utf-8") as file:
+                data = json.load(file)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+        if not isinstance(data, dict) or data.get("signature") != signature:
+            return None
+
+        aggregates = cls()
+        aggregates.days = data.get("days", {})
+        aggregates.items = data.get("items", {})
+        aggregates.total = data.get("total", 0)
+        aggregates.count = data.get("count", 0)
+        aggregates.last_seq = data.get("last_seq", 0)
+        return aggregates
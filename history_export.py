@@ -0,0 +1,125 @@
+import csv
+import json
+import os
+
+
+EXPORT_HEADERS = ["Date", "Quantity", "Product", "Cost", "Total"]
+EXPORT_FORMATS = ("xlsx", "csv", "jsonl")
+
+
+class ExportCancelled(Exception):
+    """Raised when an export is cancelled part-way (the partial file is removed)"""
+
+
+def history_rows(records, prices):
+    """Yield spreadsheet rows from (date, entry) records: a date row, its transactions, a blank row"""
+    current_date = None
+    for date, entry in records:
+        if date != current_date:
+            if current_date is not None:
+                yield [""]  # Blank row for separation
+            yield [date, "", "", "", ""]
+            current_date = date
+
+        item_name = entry.get("item", "Unknown Item")
+        yield ["", entry.get("quantity", 0), item_name, f"₱ {prices.get(item_name, 'N/A')}", f"₱ {entry.get('total', 'N/A')}"]
+
+    if current_date is not None:
+        yield [""]
+
+
+def column_widths(summary, prices):
+    """Column widths derived from the history aggregates, so they are known before the first row
+
+    Per-item totals bound every single transaction of that item, so the widths are never
+    too narrow and no cell has to be scanned.
+    """
+    days, items = summary.get("days", {}), summary.get("items", {})
+    widths = [
+        max([len(date) for date in days], default=0),
+        max([len(str(item["quantity"])) for item in items.values()], default=0),
+        max([len(name) for name in items], default=0),
+        max([len(f"₱ {prices.get(name, 'N/A')}") for name in items], default=0),
+        max([len(f"₱ {item['revenue']}") for item in items.values()], default=0),
+    ]
+    return [max(width, len(header)) + 2 for width, header in zip(widths, EXPORT_HEADERS)]
+
+
+def export_history(path, records, prices, fmt="xlsx", widths=None, total=0, progress=None, cancel=None, report_every=500):
+    """Stream (date, entry) records into an xlsx/csv/jsonl file in a single pass
+
+    progress(done, total) is called every report_every records; setting the cancel Event
+    stops the export and raises ExportCancelled. Returns the number of records written.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+
+    counter = {"done": 0}
+
+    def tracked():
+        # Count records for progress and check for cancellation as they stream past
+        for record in records:
+            if cancel is not None and cancel.is_set():
+                raise ExportCancelled()
+            yield record
+            counter["done"] += 1
+            if progress is not None and counter["done"] % report_every == 0:
+                progress(counter["done"], total)
+
+    try:
+        if fmt == "xlsx":
+            _write_xlsx(path, history_rows(tracked(), prices), widths)
+        elif fmt == "csv":
+            _write_csv(path, history_rows(tracked(), prices))
+        else:
+            _write_jsonl(path, tracked())
+    except ExportCancelled:
+        if os.path.exists(path):
+            os.remove(path)     # Don't leave a half-written export behind
+        raise
+
+    if progress is not None:
+        progress(counter["done"], total)
+    return counter["done"]
+
+
+def _write_xlsx(path, rows, widths=None):
+    """Write-only workbook: rows go straight to disk instead of being kept in memory"""
+    # openpyxl is only imported when an Excel export actually runs
+    import openpyxl
+
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font
+    from openpyxl.utils import get_column_letter
+
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("Transaction History")
+
+    # Column widths must be set before the first row in write-only mode
+    for col_num, width in enumerate(widths or [], 1):
+        ws.column_dimensions[get_column_letter(col_num)].width = width
+
+    # Bold headers
+    headers = []
+    for header in EXPORT_HEADERS:
+        cell = WriteOnlyCell(ws, value=header)
+        cell.font = Font(bold=True)
+        headers.append(cell)
+    ws.append(headers)
+
+    for row in rows:
+        ws.append(row)
+    wb.save(path)
+
+
+def _write_csv(path, rows):
+    with open(path, "w", encoding="utf-8-sig", newline="") as file:   # BOM so Excel reads the ₱ sign
+        writer = csv.writer(file)
+        writer.writerow(EXPORT_HEADERS)
+        writer.writerows(rows)
+
+
+def _write_jsonl(path, records):
+    with open(path, "w", encoding="utf-8") as file:
+        for date, entry in records:
+            file.write(json.dumps({"date": date, **entry}, ensure_ascii=False) + "\n")
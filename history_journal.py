@@ -0,0 +1,297 @@
+import datetime
+import json
+import os
+import threading
+import time
+
+from pathlib import Path
+from history_query import DATE_KEY_FORMAT, now_timestamp
+from instrumentation import count
+
+
+class HistoryJournal:
+    """Append-only JSON-lines purchase journal on top of a compacted history.json snapshot"""
+
+    def __init__(self, snapshot_path, journal_path=None, fsync_every=8, fsync_interval=1.0,
+                 compact_threshold=1024 * 1024):
+        """Set up the journal next to the snapshot (history.json -> history.jsonl)"""
+        self.snapshot_path = Path(snapshot_path)
+        self.journal_path = Path(journal_path) if journal_path else self.snapshot_path.with_suffix(".jsonl")
+        self.reset_path = self.snapshot_path.with_suffix(".reset")     # Last sequence number used before a reset
+        self.fsync_every = fsync_every              # Force fsync after this many appends
+        self.fsync_interval = fsync_interval        # ...or after this many seconds
+        self.compact_threshold = compact_threshold  # Journal size (bytes) that triggers compaction
+
+        self._lock = threading.RLock()
+        self._file = None
+        self._next_seq = None
+        self._pending = 0   # Appends written but not fsynced yet
+        self._last_fsync = time.monotonic()
+        self._fsync_timer = None
+        self._tail = None   # (inode, byte offset, highest seq before it) where read_since can resume
+
+
+    def append(self, entry, date=None):
+        """Append one purchase to the journal (O(1), no rewrite of the history)"""
+        return self.append_many([entry], date=date)[0]
+
+
+    def append_many(self, entries, date=None):
+        """Append several purchases (e.g. a checkout basket) with a single write and flush"""
+        with self._lock:
+            if self._next_seq is None:
+                self._next_seq = self._last_seq() + 1
+
+            date = date or datetime.datetime.now().strftime(DATE_KEY_FORMAT)
+            ts = now_timestamp()
+            records = []
+            for entry in entries:
+                records.append({"seq": self._next_seq, "date": date, "ts": ts, **entry})
+                self._next_seq += 1
+
+            file = self._open()
+            lines = "".join(json.dumps(record, separators=(",", ":")) + "\n" for record in records)
+            file.write(lines)
+            file.flush()    # Survives a process crash; fsync below makes it survive power loss
+
+            count("disk.bytes_written", len(lines))
+            self._pending += len(records)
+            if self._pending >= self.fsync_every or time.monotonic() - self._last_fsync >= self.fsync_interval:
+                self._fsync()
+            elif self._fsync_timer is None:
+                # Make sure a lone sale still reaches the disk shortly
+                self._fsync_timer = threading.Timer(self.fsync_interval, self.sync)
+                self._fsync_timer.daemon = True
+                self._fsync_timer.start()
+
+            return records
+
+
+    def sync(self):
+        """Flush any pending appends to disk"""
+        with self._lock:
+            self._fsync()
+
+
+    def read_history(self):
+        """Rebuild the per-date history view ({date: [entries]}) from snapshot and journal"""
+        with self._lock:
+            history, last_seq = self._load_snapshot()
+
+            for record in self.read_journal():
+                # Records already folded into the snapshot by an interrupted compaction are skipped
+                if record.get("seq", 0) <= last_seq:
+                    continue
+                date = record.pop("date", "Unknown Date")
+                history.setdefault(date, []).append(record)
+
+            return history
+
+
+    def compact(self):
+        """Fold the journal into history.json and truncate the journal (returns True if it did)"""
+        with self._lock:
+            if not self.journal_path.exists() or self.journal_path.stat().st_size == 0:
+                return False
+
+            history = self.read_history()
+            self._close()
+
+            # Write the new snapshot atomically, then drop the journal
+            temp_file = self.snapshot_path.with_suffix(".tmp")
+            with temp_file.open("w", encoding="utf-8") as file:
+                json.dump(history, file, indent=4)
+                file.flush()
+                os.fsync(file.fileno())
+            temp_file.replace(self.snapshot_path)
+
+            self.journal_path.unlink()
+            self._tail = None
+            print("🗜️ Compacted history journal")
+            return True
+
+
+    def maybe_compact(self):
+        """Compact only once the journal has grown past the threshold (returns True if it did)"""
+        with self._lock:
+            if self.journal_path.exists() and self.journal_path.stat().st_size >= self.compact_threshold:
+                return self.compact()
+            return False
+
+
+    def snapshot_signature(self):
+        """(mtime, size) of history.json; it only changes on compaction or reset"""
+        try:
+            stat = self.snapshot_path.stat()
+            return [stat.st_mtime_ns, stat.st_size]
+        except OSError:
+            return None
+
+
+    def reset(self):
+        """Clear all history (snapshot and journal); sequence numbers keep counting from where they were"""
+        with self._lock:
+            last_seq = self._last_seq() if self._next_seq is None else self._next_seq - 1
+            # Saved first, so an interrupted reset never lets the numbers start over
+            temp_file = self.reset_path.with_suffix(".tmp")
+            with temp_file.open("w", encoding="utf-8") as file:
+                json.dump({"last_seq": last_seq}, file)
+            temp_file.replace(self.reset_path)
+
+            self._close()
+            with self.snapshot_path.open("w", encoding="utf-8") as file:
+                json.dump({}, file, indent=4)
+            if self.journal_path.exists():
+                self.journal_path.unlink()
+            self._next_seq = last_seq + 1
+            self._tail = None
+
+
+    def reset_seq(self):
+        """Last sequence number used before the latest reset (0 if the history was never reset)"""
+        try:
+            with self.reset_path.open("r", encoding="utf-8") as file:
+                return int(json.load(file)["last_seq"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return 0
+
+
+    def close(self, compact=False):
+        """Flush and close the journal, optionally compacting it first"""
+        with self._lock:
+            if compact:
+                self.compact()
+            self._close()
+
+
+    def _open(self):
+        """Open the journal for appending, repairing a torn last line if needed"""
+        if self._file is None:
+            self.journal_path.parent.mkdir(parents=True, exist_ok=True)
+
+            torn = False
+            if self.journal_path.exists() and self.journal_path.stat().st_size > 0:
+                with self.journal_path.open("rb") as file:
+                    file.seek(-1, os.SEEK_END)
+                    torn = file.read(1) != b"\n"
+
+            self._file = self.journal_path.open("a", encoding="utf-8")
+            if torn:
+                self._file.write("\n")  # Terminate a line cut short by a crash
+        return self._file
+
+
+    def _close(self):
+        """Fsync and close the journal file handle"""
+        self._fsync()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+    def _fsync(self):
+        """Fsync pending journal writes"""
+        if self._fsync_timer is not None:
+            self._fsync_timer.cancel()
+            self._fsync_timer = None
+
+        if self._file is not None and self._pending:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        self._pending = 0
+        self._last_fsync = time.monotonic()
+
+
+    def _load_snapshot(self):
+        """Load history.json and return it with the highest sequence number it contains"""
+        history = {}
+        if self.snapshot_path.exists():
+            try:
+                with self.snapshot_path.open("r", encoding="utf-8") as file:
+                    history = json.load(file)
+                    if not isinstance(history, dict):
+                        raise ValueError("Invalid history file format")
+            except (json.JSONDecodeError, ValueError):
+                history = {}
+
+        last_seq = max((entry.get("seq", 0) for entries in history.values() for entry in entries), default=0)
+        return history, last_seq
+
+
+    def read_journal(self):
+        """Yield journal records, ignoring a torn or corrupted line"""
+        if not self.journal_path.exists():
+            return
+
+        if self._file is not None:
+            self._file.flush()
+
+        with self.journal_path.open("r", encoding="utf-8") as file:
+            for line in file:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+
+    def read_since(self, seq):
+        """Journal records with a sequence number above seq, oldest first
+
+        Reading continues from the byte offset where the previous call stopped (while the
+        journal file is the same one), so polling for new sales never re-reads the journal.
+        """
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+            try:
+                stat = self.journal_path.stat()
+            except OSError:
+                self._tail = None
+                return []
+
+            offset = 0
+            if self._tail is not None:
+                inode, tail_offset, tail_seq = self._tail
+                if inode == stat.st_ino and tail_offset <= stat.st_size and tail_seq <= seq:
+                    offset = tail_offset
+
+            # The tail is kept at the start of the last record, so asking again from the
+            # last record (or anything after it) skips everything read before
+            records = []
+            tail = (stat.st_ino, offset, seq)
+            last_seq = seq
+            with self.journal_path.open("rb") as file:
+                file.seek(offset)
+                for line in file:
+                    if not line.endswith(b"\n"):
+                        break   # Still being written: read it next time
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        offset += len(line)
+                        continue
+                    tail = (stat.st_ino, offset, last_seq)
+                    offset += len(line)
+                    record_seq = record.get("seq", 0)
+                    last_seq = max(last_seq, record_seq)
+                    if record_seq > seq:
+                        records.append(record)
+            self._tail = tail
+            return records
+
+
+    def _last_seq(self):
+        """Find the last used sequence number by reading only the tail of the journal"""
+        if self.journal_path.exists() and self.journal_path.stat().st_size > 0:
+            with self.journal_path.open("rb") as file:
+                file.seek(0, os.SEEK_END)
+                size = file.tell()
+                file.seek(max(0, size - 4096))
+                for line in reversed(file.read().splitlines()):
+                    try:
+                        return json.loads(line)["seq"]
+                    except (ValueError, KeyError):
+                        continue
+
+        # An empty history continues after the purchases a reset removed
+        return max(self._load_snapshot()[1], self.reset_seq())
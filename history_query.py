@@ -0,0 +1,111 @@
+import bisect
+import datetime
+import itertools
+
+from functools import lru_cache
+
+
+DATE_KEY_FORMAT = "%B %d, %Y"   # Date keys of the per-date history view ("April 01, 2025")
+
+
+def now_timestamp():
+    """ISO timestamp stored with each purchase"""
+    return datetime.datetime.now().isoformat(timespec="seconds")
+
+
+@lru_cache(maxsize=4096)
+def iso_day(date_key):
+    """ISO day ("2025-04-01") of a history date key, or "" if it cannot be parsed"""
+    try:
+        return datetime.datetime.strptime(date_key, DATE_KEY_FORMAT).date().isoformat()
+    except (TypeError, ValueError):
+        try:
+            return datetime.date.fromisoformat(str(date_key)[:10]).isoformat()
+        except ValueError:
+            return ""
+
+
+def parse_day(value):
+    """Normalize a query bound (date, datetime, ISO string or date key) to an ISO day, None stays None"""
+    if value is None or value == "":
+        return None
+    if isinstance(value, datetime.datetime):
+        return value.date().isoformat()
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+
+    day = iso_day(str(value).strip())
+    if not day:
+        raise ValueError(f"Invalid date: {value}")
+    return day
+
+
+def filter_days(days, start=None, end=None):
+    """Keep the {date_key: ...} entries within [start, end], oldest first"""
+    start, end = parse_day(start), parse_day(end)
+    selected = [
+        (iso_day(date_key), date_key) for date_key in days
+        if (start is None or start <= iso_day(date_key)) and (end is None or iso_day(date_key) <= end)
+    ]
+    selected.sort(key=lambda pair: pair[0])     # Stable, so a day keeps its insertion order
+    return {date_key: days[date_key] for day, date_key in selected}
+
+
+class HistoryIndex:
+    """In-memory date/item index over the purchase history
+
+    Records are grouped by ISO day in a sorted list of days, and every item maps to the days
+    it was sold on, so a range or per-item query only visits the matching days.
+    """
+
+    def __init__(self):
+        self.days = {}          # ISO day -> [(date_key, entry)] in journal order
+        self.sorted_days = []   # ISO days in ascending order
+        self.items = {}         # item -> set of ISO days it appears on
+
+
+    def add(self, date_key, entry):
+        """Index one purchase"""
+        day = iso_day(date_key)
+        if day not in self.days:
+            self.days[day] = []
+            bisect.insort(self.sorted_days, day)
+        self.days[day].append((date_key, entry))
+        self.items.setdefault(entry.get("item", "Unknown Item"), set()).add(day)
+
+
+    @classmethod
+    def from_history(cls, history):
+        """Build the index from a per-date history view"""
+        index = cls()
+        for date_key, entries in history.items():
+            for entry in entries:
+                index.add(date_key, entry)
+        return index
+
+
+    def query(self, start=None, end=None, items=None):
+        """Yield (date_key, entry) for purchases within [start, end] (ISO days), optionally of some items only"""
+        return self.read(self.matching_days(start, end, items), items)
+
+
+    def matching_days(self, start=None, end=None, items=None):
+        """[(ISO day, purchases indexed so far)] of the days a query visits (cheap to take under a lock)"""
+        low = 0 if start is None else bisect.bisect_left(self.sorted_days, start)
+        high = len(self.sorted_days) if end is None else bisect.bisect_right(self.sorted_days, end)
+        days = self.sorted_days[low:high]
+
+        if items is not None:
+            matching = set().union(*(self.items.get(item, ()) for item in items))
+            days = [day for day in days if day in matching]
+        return [(day, len(self.days[day])) for day in days]
+
+
+    def read(self, days, items=None):
+        """Yield (date_key, entry) from a matching_days() result; purchases added since are left out"""
+        if items is not None:
+            items = set(items)
+        for day, length in days:
+            for date_key, entry in itertools.islice(self.days[day], length):
+                if items is None or entry.get("item") in items:
+                    yield date_key, entry
@@ -0,0 +1,186 @@
+import customtkinter as ctk
+
+from history_query import filter_days
+
+
+class HistoryView:
+    """Paged history browser with collapsed day headers and lazily filled days
+
+    Only the day headers are built up front, a page at a time, from the precomputed daily
+    totals. A day's transactions are loaded when it is expanded, and the entry labels come
+    from a bounded pool: once it is used up the least recently expanded day is collapsed.
+    """
+
+    DAYS_PER_PAGE = 30          # Day headers added per page
+    ENTRIES_PER_PAGE = 50       # Transactions shown per "Show more" step
+    MAX_ENTRY_LABELS = 300      # Upper bound on entry labels alive at once
+
+    def __init__(self, parent, summary, load_day, start=None, end=None, text_color="white"):
+        self.load_day = load_day    # load_day(date, callback, on_error): loads entries, calls back on the UI thread
+        self.text_color = text_color
+        self.days = list(reversed(filter_days(summary["days"], start, end).items()))  # Newest day first
+
+        self.sections = {}          # date -> section dict
+        self.expanded = []          # Expanded dates, least recently expanded first
+        self.free_labels = []       # Pooled entry labels not currently shown
+        self.label_count = 0
+        self.shown_days = 0
+
+        self.scroll_frame = ctk.CTkScrollableFrame(parent, fg_color="#3A3A3A")
+        self.scroll_frame.pack(fill="both", expand=True, padx=10, pady=10)
+
+        if not self.days:
+            empty_label = ctk.CTkLabel(self.scroll_frame, text="No transaction history available", font=("Arial", 16), text_color=self.text_color)
+            empty_label.pack(pady=20)
+            return
+
+        self.more_button = ctk.CTkButton(self.scroll_frame, text="Load more days", font=("Arial", 16),
+                                         fg_color="#555555", command=self.show_more_days)
+        self.show_more_days()
+        self.toggle(self.days[0][0])    # Open the most recent day
+        self._watch_scroll()
+
+
+    def show_more_days(self):
+        """Add the next page of (collapsed) day headers"""
+        page = self.days[self.shown_days:self.shown_days + self.DAYS_PER_PAGE]
+        self.shown_days += len(page)
+
+        self.more_button.pack_forget()
+        for date, day in page:
+            self.sections[date] = self._create_section(date, day)
+        if self.shown_days < len(self.days):
+            self.more_button.pack(pady=10)
+
+
+    def toggle(self, date):
+        """Expand or collapse one day"""
+        section = self.sections[date]
+        if section["expanded"]:
+            self.collapse(date)
+            return
+
+        section["expanded"] = True
+        self.expanded.append(date)
+        section["entries"].pack(fill="x", before=section["divider"])
+
+        if section["data"] is None:
+            # Fetch this day's transactions in the background on first expand
+            self._set_header(section, "⋯")
+            if not section["loading"]:
+                section["loading"] = True
+                self.load_day(date, lambda entries: self._day_loaded(date, entries),
+                              lambda error: self._day_failed(date, error))
+        else:
+            self._set_header(section, "▾")
+            self._fill(section)
+
+
+    def collapse(self, date):
+        """Hide a day's transactions and return its labels to the pool"""
+        section = self.sections[date]
+        for label in section["labels"]:
+            label.pack_forget()
+            self.free_labels.append(label)
+        section["labels"] = []
+        section["more"].pack_forget()
+        section["entries"].pack_forget()
+        section["expanded"] = False
+        self._set_header(section, "▸")
+        if date in self.expanded:
+            self.expanded.remove(date)
+
+
+    def _create_section(self, date, day):
+        """Build a collapsed day: header button, (empty) entries frame and divider"""
+        frame = ctk.CTkFrame(self.scroll_frame, fg_color="transparent")
+        frame.pack(fill="x", pady=5)
+
+        header = ctk.CTkButton(frame, text="", font=("Arial", 20, "bold"), fg_color="transparent",
+                               hover_color="#4A4A4A", text_color=self.text_color, anchor="w",
+                               command=lambda: self.toggle(date))
+        header.pack(fill="x", padx=10)
+
+        entries = ctk.CTkFrame(frame, fg_color="transparent")
+        more = ctk.CTkButton(entries, text="Show more", font=("Arial", 14), fg_color="#555555",
+                             width=120, command=lambda: self._fill(self.sections[date]))
+
+        divider = ctk.CTkFrame(frame, fg_color="#555555", height=2)
+        divider.pack(fill="x", padx=20, pady=10)
+
+        section = {"date": date, "day": day, "header": header, "entries": entries, "more": more,
+                   "divider": divider, "labels": [], "data": None, "loading": False, "expanded": False}
+        self._set_header(section, "▸")
+        return section
+
+
+    def _set_header(self, section, marker):
+        day = section["day"]
+        section["header"].configure(
+            text=f"{marker}  {section['date']}    Total: ₱ {day.get('total', 0)}  ({day.get('count', 0)} sales)")
+
+
+    def _day_loaded(self, date, entries):
+        """Store a loaded day and show it if it is still expanded"""
+        if not self.scroll_frame.winfo_exists():
+            return      # Window closed while loading
+        section = self.sections[date]
+        section["data"] = entries
+        section["loading"] = False
+        if section["expanded"]:
+            self._set_header(section, "▾")
+            self._fill(section)
+
+
+    def _day_failed(self, date, error):
+        """Mark a day whose transactions could not be loaded (e.g. a date key that cannot be parsed)"""
+        print(f"⚠️ Could not load the history of {date}: {error}")
+        if not self.scroll_frame.winfo_exists():
+            return
+        section = self.sections[date]
+        section["loading"] = False     # Expanding it again retries
+        if section["expanded"]:
+            self._set_header(section, "⚠")
+
+
+    def _fill(self, section):
+        """Show the next page of a day's transactions using pooled labels"""
+        entries = section["data"] or []
+        shown = len(section["labels"])
+        section["more"].pack_forget()
+
+        for entry in entries[shown:shown + self.ENTRIES_PER_PAGE]:
+            label = self._acquire_label(section["date"])
+            if label is None:
+                break
+            label.configure(text=f"{entry['quantity']}x → {entry['item']} (₱ {entry['total']})")
+            label.pack(in_=section["entries"])
+            label.lift()    # Pooled labels belong to the scroll frame, keep them above the day frame
+            section["labels"].append(label)
+
+        if len(section["labels"]) < len(entries):
+            section["more"].pack(pady=5)
+
+
+    def _acquire_label(self, date):
+        """Take a label from the pool, collapsing older days when the pool is exhausted"""
+        while not self.free_labels and self.label_count >= self.MAX_ENTRY_LABELS:
+            others = [expanded for expanded in self.expanded if expanded != date]
+            if not others:
+                return None
+            self.collapse(others[0])
+
+        if self.free_labels:
+            return self.free_labels.pop()
+
+        self.label_count += 1
+        return ctk.CTkLabel(self.scroll_frame, text="", font=("Arial", 20), fg_color="transparent", text_color=self.text_color)
+
+
+    def _watch_scroll(self):
+        """Load the next page of days once the list is scrolled near its end"""
+        if not self.scroll_frame.winfo_exists():
+            return
+        if self.shown_days < len(self.days) and self.scroll_frame._parent_canvas.yview()[1] >= 0.98:
+            self.show_more_days()
+        self.scroll_frame.after(250, self._watch_scroll)
@@ -0,0 +1,422 @@
+import cProfile
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import traceback
+
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from tkinter import TclError
+
+
+# INVENTORY_METRICS=1 turns on timers and counters. When it is off
+# timed() returns the function unchanged and count()/timer() do nothing, so the
+# instrumented code runs at full speed.
+ENABLED = os.environ.get("INVENTORY_METRICS", "0").lower() not in ("", "0", "false", "no")
+
+# INVENTORY_PROFILE=cprofile|sample dumps a profile of the session (independent of ENABLED)
+PROFILE = os.environ.get("INVENTORY_PROFILE", "").lower()
+
+# The stall watchdog always runs (it is cheap); INVENTORY_STALL_MS=0 turns it off
+try:
+    STALL_THRESHOLD_MS = int(os.environ.get("INVENTORY_STALL_MS", "500") or 0)
+except ValueError:
+    print(f"⚠️ Ignoring INVENTORY_STALL_MS={os.environ['INVENTORY_STALL_MS']!r} (not a whole number of ms)")
+    STALL_THRESHOLD_MS = 500
+
+
+class Metrics:
+    """Thread-safe timers (count / total / max) and counters"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.timers = {}    # name -> [count, total seconds, max seconds]
+        self.counters = {}  # name -> value
+
+
+    def record(self, name, seconds):
+        with self._lock:
+            timer = self.timers.get(name)
+            if timer is None:
+                self.timers[name] = [1, seconds, seconds]
+            else:
+                timer[0] += 1
+                timer[1] += seconds
+                timer[2] = max(timer[2], seconds)
+
+
+    def add(self, name, amount=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+
+    def snapshot(self):
+        """Current values as plain JSON data"""
+        with self._lock:
+            return {
+                "timers": {
+                    name: {"count": count, "total_ms": round(total * 1000, 3),
+                           "mean_ms": round(total * 1000 / count, 3), "max_ms": round(longest * 1000, 3)}
+                    for name, (count, total, longest) in sorted(self.timers.items())
+                },
+                "counters": dict(sorted(self.counters.items())),
+            }
+
+
+metrics = Metrics()
+
+
+def timed(name=None):
+    """Decorator recording how long each call takes (returns the function untouched when disabled)"""
+    def decorate(function):
+        if not ENABLED:
+            return function
+        label = name or function.__qualname__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                metrics.record(label, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+@contextmanager
+def _timer(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.record(name, time.perf_counter() - start)
+
+
+def timer(name):
+    """Context manager timing a block"""
+    return _timer(name) if ENABLED else nullcontext()
+
+
+def count(name, amount=1):
+    """Add to a counter (bytes read/written, network calls, ...)"""
+    if ENABLED:
+        metrics.add(name, amount)
+
+
+def count_file(name, path):
+    """Add a file's size to a byte counter (the stat only happens when enabled)"""
+    if ENABLED:
+        try:
+            metrics.add(name, os.path.getsize(path))
+        except OSError:
+            pass
+
+
+def count_payload(name, value):
+    """Add the JSON size of a Firebase payload to a byte counter (only serialized when enabled)"""
+    if ENABLED:
+        metrics.add(name, len(json.dumps(value, default=str)))
+
+
+class StallWatchdog:
+    """Detects when the Tk main loop is blocked and records where
+
+    A root.after heartbeat marks the loop as alive; a watcher thread notices when it has been
+    silent past the threshold, captures the main thread's stack and the handler that was
+    running. When the loop resumes the stall's duration goes into a per-handler histogram
+    (stalls.json, kept across runs) and a log line (stalls.jsonl).
+    """
+
+    BUCKETS_MS = (250, 500, 1000, 2000, 5000, 10000)
+
+    def __init__(self, root, log_dir, threshold_ms=500, interval_ms=100):
+        self.root = root
+        self.log_dir = Path(log_dir)
+        self.threshold = threshold_ms / 1000
+        self.interval = interval_ms / 1000
+        self.histograms = self._load_histograms()    # handler -> count / total / max / buckets
+
+        self._main_thread = threading.get_ident()    # Created on the Tk thread
+        self._lock = threading.Lock()
+        self._last_beat = time.monotonic()
+        self._stall = None      # The stall in progress (handler and stack), captured by the watcher
+        self._finished = []     # Stalls waiting to be written by the watcher thread
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._watch, name="stall-watchdog", daemon=True)
+
+
+    def start(self):
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        self.root.after(int(self.interval * 1000), self._beat)
+        self._thread.start()
+
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self._write_finished()
+
+
+    def _beat(self):
+        """Heartbeat on the Tk thread: closes the stall in progress, if any"""
+        now = time.monotonic()
+        with self._lock:
+            blocked = now - self._last_beat - self.interval
+            stall, self._stall = self._stall, None
+            self._last_beat = now
+            if stall is None and blocked >= self.threshold:
+                # Ended before the watcher looked: the duration is known, the culprit is not
+                stall = {"handler": "unknown", "stack": None}
+            if stall is not None:
+                self._finished.append({"time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                                       "duration_ms": round(blocked * 1000), **stall})
+        try:
+            self.root.after(int(self.interval * 1000), self._beat)
+        except (RuntimeError, TclError):
+            pass    # Tk is shutting down (or the root was destroyed)
+
+
+    def _watch(self):
+        while not self._stop.wait(self.interval / 2):
+            with self._lock:
+                blocked = time.monotonic() - self._last_beat - self.interval
+                if blocked >= self.threshold and self._stall is None:
+                    self._stall = self._capture()
+                    print(f"🐢 UI blocked for {blocked * 1000:.0f} ms in {self._stall['handler']}")
+            self._write_finished()
+
+
+    def _capture(self):
+        """The main thread's stack and the app handler it is in"""
+        frame = sys._current_frames().get(self._main_thread)
+        if frame is None:
+            return {"handler": "unknown", "stack": None}
+        return {"handler": handler_name(frame), "frames": app_frames(frame), "stack": traceback.format_stack(frame)}
+
+
+    def _write_finished(self):
+        with self._lock:
+            finished, self._finished = self._finished, []
+        if not finished:
+            return
+
+        for stall in finished:
+            histogram = self.histograms.setdefault(stall["handler"], {
+                "count": 0, "total_ms": 0, "max_ms": 0,
+                "buckets": {label: 0 for label in self.bucket_labels()}})
+            histogram["count"] += 1
+            histogram["total_ms"] += stall["duration_ms"]
+            histogram["max_ms"] = max(histogram["max_ms"], stall["duration_ms"])
+            label = self.bucket(stall["duration_ms"])
+            histogram["buckets"][label] = histogram["buckets"].get(label, 0) + 1
+            print(f"🐢 UI was blocked for {stall['duration_ms']} ms in {stall['handler']}")
+
+        try:
+            append_lines(self.log_dir / "stalls.jsonl", [json.dumps(stall) + "\n" for stall in finished])
+            temp_file = self.log_dir / "stalls.tmp"
+            with temp_file.open("w", encoding="utf-8") as file:
+                json.dump(self.slowest(), file, indent=4)
+            temp_file.replace(self.log_dir / "stalls.json")
+        except OSError as e:
+            print(f"⚠️ Could not write stall log: {e}")
+
+
+    def _load_histograms(self):
+        try:
+            with (self.log_dir / "stalls.json").open("r", encoding="utf-8") as file:
+                histograms = json.load(file)
+            return histograms if isinstance(histograms, dict) else {}
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+
+    def slowest(self):
+        """Histograms ordered by total blocked time, worst handler first"""
+        return dict(sorted(self.histograms.items(), key=lambda pair: -pair[1]["total_ms"]))
+
+
+    @classmethod
+    def bucket_labels(cls):
+        return [f"<={edge}" for edge in cls.BUCKETS_MS] + [f">{cls.BUCKETS_MS[-1]}"]
+
+
+    @classmethod
+    def bucket(cls, duration_ms):
+        for edge in cls.BUCKETS_MS:
+            if duration_ms <= edge:
+                return f"<={edge}"
+        return f">{cls.BUCKETS_MS[-1]}"
+
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__)) + os.sep
+
+# The mainloop call, this module and the dispatcher / executor plumbing never name a handler
+PLUMBING_FILES = ("main.py", "instrumentation.py", "io_executor.py")
+
+
+def app_frames(frame):
+    """module.qualname of each app function on a stack, outermost first"""
+    frames = []
+    while frame is not None:
+        code = frame.f_code
+        if not code.co_filename.startswith("<"):    # <stdin>, <string>, frozen modules
+            filename = os.path.abspath(code.co_filename)
+            if filename.startswith(APP_DIR):
+                name = getattr(code, "co_qualname", code.co_name)   # co_qualname is Python 3.11+
+                module = os.path.splitext(os.path.basename(filename))[0]
+                frames.append(f"{module}.{name}")
+        frame = frame.f_back
+    return frames[::-1]
+
+
+def handler_name(frame):
+    """Name of the app handler a stack is running (the Tk callback behind the bindings)
+
+    Bindings and worker results reach the handlers through lambdas, nested callbacks and
+    UIDispatcher._drain, so those frames (and the script's module level) are skipped: a card's Add button is reported as
+    add_amount and a worker result as the method it was handed to. A stack with no app
+    code means Tk itself (layout, redraw) was busy.
+    """
+    frames = [name for name in app_frames(frame)
+              if name.split(".", 1)[0] + ".py" not in PLUMBING_FILES]
+    for name in frames:
+        if not any(anonymous in name for anonymous in ("<module>", "<lambda>", "<locals>")):
+            return name
+    return frames[-1] if frames else "tk"   # Only anonymous code: the innermost of it
+
+
+def append_lines(path, lines, max_bytes=1024 * 1024):
+    """Append to a log file, keeping one rotated copy (<name>.1) once it grows past max_bytes"""
+    size = sum(len(line) for line in lines)
+    if path.exists() and path.stat().st_size + size > max_bytes:
+        path.replace(path.with_name(path.name + ".1"))
+    with path.open("a", encoding="utf-8") as file:
+        file.writelines(lines)
+
+
+class RollingMetricsFile:
+    """Appends a metrics snapshot to metrics.jsonl every interval, rotating it when it grows too big"""
+
+    def __init__(self, path, interval=60, max_bytes=1024 * 1024):
+        self.path = Path(path)
+        self.interval = interval
+        self.max_bytes = max_bytes
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="metrics", daemon=True)
+
+
+    def start(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._thread.start()
+
+
+    def write(self):
+        """Append one snapshot now"""
+        line = json.dumps({"time": time.strftime("%Y-%m-%dT%H:%M:%S"), **metrics.snapshot()}) + "\n"
+        try:
+            append_lines(self.path, [line], self.max_bytes)
+        except OSError as e:
+            print(f"⚠️ Could not write metrics: {e}")
+
+
+    def stop(self):
+        self._stop.set()
+        self.write()
+
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.write()
+
+
+class SamplingProfiler:
+    """Samples the main thread's stack every few milliseconds (collapsed-stack output for flame graphs)"""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.samples = {}   # "module:function;module:function" -> hits
+        self._thread_id = threading.main_thread().ident
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sampler", daemon=True)
+
+
+    def start(self):
+        self._thread.start()
+
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+
+    def dump(self, path):
+        with open(path, "w", encoding="utf-8") as file:
+            for stack, hits in sorted(self.samples.items(), key=lambda pair: -pair[1]):
+                file.write(f"{stack} {hits}\n")
+
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                key = ";".join(reversed(stack))
+                self.samples[key] = self.samples.get(key, 0) + 1
+
+
+_session = {}
+
+
+def start(metrics_dir, root=None):
+    """Start the rolling metrics file, the stall watchdog (given the Tk root) and the configured profiler"""
+    metrics_dir = Path(metrics_dir)
+    if ENABLED:
+        _session["file"] = RollingMetricsFile(metrics_dir / "metrics.jsonl")
+        _session["file"].start()
+        print(f"📈 Metrics enabled, writing to {metrics_dir / 'metrics.jsonl'}")
+
+    if root is not None and STALL_THRESHOLD_MS > 0:
+        _session["watchdog"] = StallWatchdog(root, metrics_dir, threshold_ms=STALL_THRESHOLD_MS)
+        _session["watchdog"].start()
+
+    if PROFILE == "cprofile":
+        _session["cprofile"] = cProfile.Profile()
+        _session["cprofile"].enable()
+    elif PROFILE == "sample":
+        _session["sampler"] = SamplingProfiler()
+        _session["sampler"].start()
+    if PROFILE in ("cprofile", "sample"):
+        _session["dir"] = metrics_dir
+        print(f"🔬 Profiling the session ({PROFILE})")
+
+
+def stop():
+    """Write the last metrics snapshot and dump the profile (call once on exit)"""
+    if "file" in _session:
+        _session.pop("file").stop()
+    if "watchdog" in _session:
+        _session.pop("watchdog").stop()
+
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    if "cprofile" in _session:
+        profile = _session.pop("cprofile")
+        profile.disable()
+        path = _session["dir"] / f"profile-{stamp}.prof"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        profile.dump_stats(path)
+        print(f"🔬 cProfile output saved to {path}")
+    if "sampler" in _session:
+        sampler = _session.pop("sampler")
+        sampler.stop()
+        path = _session["dir"] / f"profile-{stamp}.folded"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        sampler.dump(path)
+        print(f"🔬 Sampling profile saved to {path}")
@@ -0,0 +1,120 @@
+import queue
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+from tkinter import TclError
+
+
+class UIDispatcher:
+    """Thread-safe handoff of callbacks to the Tk main thread
+
+    Worker threads must never touch Tk widgets. They queue callbacks here instead, and the
+    main thread drains the queue from a root.after loop.
+    """
+
+    def __init__(self, root, interval=30):
+        self.root = root
+        self.interval = interval    # Milliseconds between queue checks
+        self._queue = queue.SimpleQueue()
+        self._main_thread = threading.get_ident()
+        self.root.after(self.interval, self._drain)
+
+
+    def call(self, callback, *args, **kwargs):
+        """Run callback(*args, **kwargs) on the main thread (immediately if already on it)"""
+        if threading.get_ident() == self._main_thread:
+            callback(*args, **kwargs)
+        else:
+            self._queue.put((callback, args, kwargs))
+
+
+    def _drain(self):
+        """Run every queued callback, then check again shortly"""
+        while True:
+            try:
+                callback, args, kwargs = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                callback(*args, **kwargs)
+            except Exception as e:
+                print(f"🚨 UI callback {getattr(callback, '__name__', callback)} failed: {e}")
+
+        try:
+            self.root.after(self.interval, self._drain)
+        except (RuntimeError, TclError):
+            pass    # Tk is shutting down (or the root was destroyed)
+
+
+class IOExecutor:
+    """Runs disk and network I/O on a background worker and hands the results back to the UI
+
+    With a single worker (the default) jobs run in submission order, so writes to the same
+    file can never overtake each other.
+    """
+
+    def __init__(self, dispatcher, max_workers=1, name="io"):
+        self.dispatcher = dispatcher
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+
+
+    def submit(self, function, *args, on_done=None, on_error=None, **kwargs):
+        """Run function in the background; on_done(result) / on_error(exc) run on the UI thread"""
+        future = self._pool.submit(function, *args, **kwargs)
+
+        def handoff(done):
+            error = done.exception()
+            if error is not None:
+                if on_error is not None:
+                    self.dispatcher.call(on_error, error)
+                else:
+                    print(f"⚠️ Background task {getattr(function, '__name__', function)} failed: {error}")
+            elif on_done is not None:
+                self.dispatcher.call(on_done, done.result())
+
+        future.add_done_callback(handoff)
+        return future
+
+
+    def shutdown(self, wait=True):
+        """Finish queued jobs (when wait is True) and stop the worker"""
+        self._pool.shutdown(wait=wait)
+
+
+class DebouncedWriter:
+    """Write-behind persistence: repeated saves within a short window become one write
+
+    mark_dirty(*keys) only schedules a write; when the window ends a snapshot of just the keys
+    changed in it is taken on the UI thread and written on the I/O worker. flush() writes
+    pending changes right away.
+    """
+
+    def __init__(self, root, executor, snapshot, write, delay_ms=250, on_error=None):
+        self.root = root
+        self.executor = executor
+        self.snapshot = snapshot    # Returns a copy of the state of some keys (called on the UI thread)
+        self.write = write          # Persists a snapshot (called on the I/O worker)
+        self.delay_ms = delay_ms
+        self.on_error = on_error
+        self._scheduled = None
+        self._dirty = set()
+
+
+    def mark_dirty(self, *keys):
+        """Schedule a write of these keys at the end of the current window"""
+        self._dirty.update(keys)
+        if self._scheduled is None:
+            self._scheduled = self.root.after(self.delay_ms, self.flush)
+
+
+    def flush(self):
+        """Write pending changes now (no-op when nothing is dirty)"""
+        if self._scheduled is None:
+            return
+        try:
+            self.root.after_cancel(self._scheduled)
+        except Exception:
+            pass    # Already fired
+        self._scheduled = None
+        keys, self._dirty = self._dirty, set()
+        return self.executor.submit(self.write, self.snapshot(keys), on_error=self.on_error)
@@ -1,30 +1,56 @@
-import subprocess
 import time
+
+START = time.perf_counter()     # Startup timing is measured from here
+
 import customtkinter as ctk
+import instrumentation
 
 from InventoryManagement import InventoryManagement
 
-def start_firebase_sync():
-    """Start firebase_config.py as a separate process"""
-    return subprocess.Popen(["python", "firebase_config.py"])
+
+def report_startup(stage):
+    """Print how long startup took to reach a stage"""
+    print(f"⏱️ {stage}: {(time.perf_counter() - START) * 1000:.0f} ms")
+
+
+def start_firebase_sync(app):
+    """Start the in-process Firebase sync service in the background (after the first frame)"""
+    import firebase_config  # Imported here: no network work before the window is up
+
+    firebase_config.set_gui_update_callback(app.refresh_inventory_from_firebase, dispatch=app.ui.call)
+
+    def sync_ready(engine):
+        app.sync_service = engine
+        report_startup("Firebase sync ready")
+
+    # Readiness is signalled by the service instead of sleeping a fixed time
+    firebase_config.start_sync_in_background(
+        local_store=app.store,
+        on_ready=lambda engine: app.ui.call(sync_ready, engine))
+
+
+def first_frame_painted(app):
+    """The window is interactive: now load the thumbnails and connect to Firebase"""
+    app.root.update_idletasks()     # Make sure the frame is really on screen
+    report_startup("First frame painted")
+    start_firebase_sync(app)    # Connects on its own thread while the thumbnails load
+    app.load_images()
+    report_startup("Thumbnails requested")
+
 
 if __name__ == "__main__":
-    try:
-        # Start Firebase sync before launching the GUI
-        firebase_process = start_firebase_sync()
-        time.sleep(2)  # Give Firebase time to initialize
-
-        # Run the GUI application
-        root = ctk.CTk()
-        app = InventoryManagement(root)  # Create an instance of the GUI class
-
-        # Set the GUI update callback
-        from firebase_config import set_gui_update_callback
-        set_gui_update_callback(app.refresh_inventory_from_firebase)
-
-        
-        root.mainloop()  # Run the application
-    finally:
-        # Terminate Firebase sync process when GUI closes
-        firebase_process.wait()
-        print("🚀 Firebase process terminated")
\ No newline at end of file
+    report_startup("Modules imported")
+
+    # Run the GUI application
+    root = ctk.CTk()
+    app = InventoryManagement(root)  # Create an instance of the GUI class
+    report_startup("Window built")
+
+    # Stall watchdog, plus INVENTORY_METRICS=1 / INVENTORY_PROFILE=cprofile|sample (see README)
+    instrumentation.start(app.inventory_dir / "metrics", root)
+
+    # Idle callbacks run once Tk has drawn the pending frame
+    root.after(0, lambda: root.after_idle(first_frame_painted, app))
+
+    root.mainloop()  # Run the application
+    instrumentation.stop()  # Last metrics snapshot and profile dump
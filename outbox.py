@@ -0,0 +1,180 @@
+import copy
+import json
+import threading
+
+from pathlib import Path
+from instrumentation import count, count_file
+
+
+class Outbox:
+    """Persistent queue of pending Firebase writes, coalesced by database path
+
+    Repeated writes to the same path keep only the latest value, so the queue never holds
+    more than one entry per item no matter how long the connection is down. A value of
+    None means "delete this path". Queued writes are appended to outbox.jsonl; the queue is
+    written to outbox.json (and the journal dropped) when uploaded writes are acknowledged.
+    """
+
+    def __init__(self, path, compact_threshold=1024 * 1024):
+        self.path = Path(path)
+        self.journal_path = self.path.with_suffix(".jsonl")    # Writes queued since the last compaction
+        self.compact_threshold = compact_threshold  # Journal size (bytes) that triggers compaction while offline
+        self._journal_size = 0
+        self._lock = threading.RLock()
+        self._file = None
+        self._pending = {}
+        self._below = {}    # Ancestor path -> pending paths under it (the writes a parent write supersedes)
+        self._load()
+        if self.journal_path.exists():
+            self._compact()     # Start from a clean journal (a crash may have torn its last line)
+        self.ready = threading.Event()     # Set while there is something to flush
+        if self._pending:
+            self.ready.set()
+
+
+    def put(self, path, value):
+        """Queue a write, replacing any pending write to the same path"""
+        self.put_many({path: value})
+
+
+    def delete(self, path):
+        """Queue a delete"""
+        self.put_many({path: None})
+
+
+    def put_many(self, writes):
+        """Queue several writes at once (persisted as one line appended to the journal)"""
+        with self._lock:
+            writes = {path.strip("/"): value for path, value in writes.items()}
+            for path, value in writes.items():
+                self._coalesce(path, value)
+            self._append(writes)
+            self.ready.set()
+
+
+    def pending(self):
+        """Return a copy of the pending writes ({path: value})"""
+        with self._lock:
+            return copy.deepcopy(self._pending)
+
+
+    def acknowledge(self, sent):
+        """Drop the writes that were uploaded, unless they were overwritten in the meantime"""
+        with self._lock:
+            for path, value in sent.items():
+                if path in self._pending and self._pending[path] == value:
+                    self._drop(path)
+            self._compact()
+            if not self._pending:
+                self.ready.clear()
+
+
+    def __len__(self):
+        with self._lock:
+            return len(self._pending)
+
+
+    def _coalesce(self, path, value):
+        """Merge a write into the pending ones without creating overlapping paths"""
+        # A pending write to a parent path absorbs this one
+        parts = path.split("/")
+        for i in range(len(parts) - 1, 0, -1):
+            parent = "/".join(parts[:i])
+            if parent in self._pending:
+                node = self._pending[parent]
+                if not isinstance(node, dict):
+                    node = self._pending[parent] = {}
+                for key in parts[i:-1]:
+                    if not isinstance(node.get(key), dict):
+                        node[key] = {}
+                    node = node[key]
+                if value is None:
+                    node.pop(parts[-1], None)
+                else:
+                    node[parts[-1]] = value
+                return
+
+        # This write supersedes any pending writes below it
+        for child in list(self._below.get(path, ())):
+            self._drop(child)
+        if path not in self._pending:
+            parts = path.split("/")
+            for i in range(1, len(parts)):
+                self._below.setdefault("/".join(parts[:i]), set()).add(path)
+        self._pending[path] = value
+
+
+    def _drop(self, path):
+        """Remove a pending write and its entries in the ancestor index"""
+        del self._pending[path]
+        parts = path.split("/")
+        for i in range(1, len(parts)):
+            ancestor = "/".join(parts[:i])
+            self._below[ancestor].discard(path)
+            if not self._below[ancestor]:
+                del self._below[ancestor]
+
+
+    def _load(self):
+        """Load pending writes left over from a previous run (outbox.json, then the journal)"""
+        if self.path.exists():
+            try:
+                with self.path.open("r", encoding="utf-8") as file:
+                    data = json.load(file)
+                for path, value in (data if isinstance(data, dict) else {}).items():
+                    self._coalesce(path, value)
+            except (json.JSONDecodeError, OSError):
+                print("⚠️ Outbox file is corrupted, pending uploads were dropped")
+
+        if self.journal_path.exists():
+            with self.journal_path.open("r", encoding="utf-8") as file:
+                for line in file:
+                    try:
+                        writes = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue    # Torn by a crash
+                    for path, value in writes.items():
+                        self._coalesce(path, value)
+
+
+    def _append(self, writes):
+        """Append queued writes to the journal (O(size of the writes), not of the queue)"""
+        if self._file is None:
+            self.journal_path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = self.journal_path.open("a", encoding="utf-8")
+        line = json.dumps(writes, separators=(",", ":")) + "\n"
+        self._file.write(line)
+        self._file.flush()
+        count("disk.bytes_written", len(line))
+        self._journal_size += len(line)
+        if self._journal_size >= self.compact_threshold:
+            self._compact()     # Long offline: the journal repeats coalesced writes, keep it bounded
+
+
+    def _compact(self):
+        """Persist the queue atomically (temp file + replace) and drop the journal"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp_file = self.path.with_suffix(".tmp")
+        with temp_file.open("w", encoding="utf-8") as file:
+            json.dump(self._pending, file)
+        count_file("disk.bytes_written", temp_file)
+        temp_file.replace(self.path)
+        self.journal_path.unlink(missing_ok=True)   # Replaying it again after a crash here is harmless
+        self._journal_size = 0
+
+
+_outboxes = {}
+_outboxes_lock = threading.Lock()
+
+
+def open_outbox(inventory_dir):
+    """Return the shared outbox for an inventory directory (one instance per file)"""
+    path = (Path(inventory_dir) / "outbox.json").resolve()
+    with _outboxes_lock:
+        if path not in _outboxes:
+            _outboxes[path] = Outbox(path)
+        return _outboxes[path]
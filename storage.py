@@ -0,0 +1,801 @@
+import datetime
+import json
+import os
+import sqlite3
+import sys
+import threading
+
+from contextlib import contextmanager
+from pathlib import Path
+from history_aggregates import HistoryAggregates
+from history_journal import HistoryJournal
+from history_query import DATE_KEY_FORMAT, HistoryIndex, iso_day, now_timestamp, parse_day
+from instrumentation import count_file, timed
+
+
+# Errors a storage backend may raise while reading or writing
+STORAGE_ERRORS = (OSError, IOError, sqlite3.Error)
+
+# The amounts keep an O(1) running total, the number of sales and only the most recent sales
+# (every sale is in the history journal), so their writes and uploads never grow
+RECENT_SALES_KEPT = 20
+
+
+def empty_amounts():
+    return {"total": 0, "count": 0, "entries": []}
+
+
+def bounded_amounts(data):
+    """Amounts in the bounded format (older files listed every sale in "entries")"""
+    entries = data.get("entries", [])
+    return {
+        "total": data.get("total", 0),
+        "count": data.get("count", len(entries)),
+        "entries": entries[-RECENT_SALES_KEPT:]
+    }
+
+
+def add_sales(data, lines):
+    """Add (item, quantity, total) sales to the amounts: running total, count and recent sales"""
+    data = bounded_amounts(data)
+    data["total"] += sum(total for item, quantity, total in lines)
+    data["count"] += len(lines)
+    recent = [{"item": item, "quantity": quantity, "total": total} for item, quantity, total in lines]
+    data["entries"] = (data["entries"] + recent)[-RECENT_SALES_KEPT:]
+    return data
+
+
+class JsonStore:
+    """Storage backend using the original JSON files (inventory.json, amounts.json, history journal)"""
+
+    def __init__(self, inventory_dir, compact=True):
+        self.inventory_dir = Path(inventory_dir)
+        self.inventory_dir.mkdir(parents=True, exist_ok=True)
+
+        self.inventory_path = self.inventory_dir / "inventory.json"
+        self.amounts_path = self.inventory_dir / "amounts.json"
+        self.history_path = self.inventory_dir / "history.json"
+        self.aggregates_path = self.inventory_dir / "history_index.json"
+        self._lock = threading.RLock()
+        self._aggregates = None     # Loaded on first use
+        self._index = None          # Date/item index, built on the first query
+        self._inventory = None      # Copy of the last inventory written, so a few items can be saved without the caller's copy
+        self.compact = compact      # Only the owner of the journal compacts it (and writes the aggregates)
+
+        # Purchases are appended to history.jsonl and folded into history.json on compaction
+        self.history = HistoryJournal(self.history_path)
+        if compact:     # Only the process that owns the journal (and amounts.json) converts and compacts
+            self._convert_legacy_amounts()
+            self.aggregates()   # Catch up on the journal before it is folded away
+            if self.history.maybe_compact():
+                self._save_aggregates()
+
+
+    @timed("store.load_inventory")
+    def load_inventory(self):
+        """Load the raw inventory dict (raises ValueError if the file is invalid)"""
+        if not self.inventory_path.exists():
+            return {}
+
+        count_file("disk.bytes_read", self.inventory_path)
+        with self.inventory_path.open("r", encoding="utf-8") as file:
+            inventory = json.load(file)
+
+        # Ensure the inventory is always a dictionary
+        if not isinstance(inventory, dict):
+            raise ValueError("Invalid inventory format")
+        return inventory
+
+
+    @timed("store.save_inventory")
+    def save_inventory(self, inventory):
+        """Write the whole inventory dict to inventory.json atomically (temp file + replace)"""
+        with self._lock:
+            self._write_inventory(inventory)
+            self._inventory = {name: dict(data) if isinstance(data, dict) else data for name, data in inventory.items()}
+
+
+    @timed("store.save_items")
+    def save_items(self, changes):
+        """Write only these items ({id: record}, None removes it); the rest is kept as last written"""
+        with self._lock:
+            inventory = self._written_inventory()
+            for name, data in changes.items():
+                if data is None:
+                    inventory.pop(name, None)
+                else:
+                    inventory[name] = data
+            self._write_inventory(inventory)
+
+
+    def _written_inventory(self):
+        """The inventory as last written (read from disk the first time)"""
+        if self._inventory is None:
+            self._inventory = self.load_inventory()
+        return self._inventory
+
+
+    def _write_inventory(self, inventory):
+        """Replace inventory.json with this dict"""
+        with self._lock:
+            self.inventory_path.parent.mkdir(parents=True, exist_ok=True) # Ensure directory exists before saving
+            temp_file = self.inventory_path.with_suffix(".tmp")
+
+            # Write to file safely with utf-8 encoding
+            with temp_file.open("w", encoding="utf-8") as file:
+                json.dump(inventory, file, indent=4)
+
+            count_file("disk.bytes_written", temp_file)
+            temp_file.replace(self.inventory_path)   # Readers never see a half-written file
+
+
+    def load_amounts(self):
+        """Load the running total and the recent sales (raises ValueError if the file is invalid)"""
+        if not self.amounts_path.exists():
+            return empty_amounts()
+
+        count_file("disk.bytes_read", self.amounts_path)
+        with self.amounts_path.open("r", encoding="utf-8") as file:
+            data = json.load(file)
+
+        if not isinstance(data, dict) or "total" not in data or "entries" not in data:
+            raise ValueError("Invalid amount file format")
+        return bounded_amounts(data)
+
+
+    def save_amounts(self, data):
+        """Save the running total atomically (temp file + replace)"""
+        with self._lock:
+            temp_file = self.amounts_path.with_suffix(".tmp")
+
+            with temp_file.open("w", encoding="utf-8") as file:
+                json.dump(bounded_amounts(data), file, indent=4)
+
+            count_file("disk.bytes_written", temp_file)
+            temp_file.replace(self.amounts_path)   # Replace the original file with the temp file
+
+
+    def _convert_legacy_amounts(self):
+        """Rewrite an amounts.json that still lists every sale in the bounded format (once)"""
+        try:
+            with self.amounts_path.open("r", encoding="utf-8") as file:
+                data = json.load(file)
+        except (OSError, json.JSONDecodeError):
+            return
+
+        if isinstance(data, dict) and isinstance(data.get("entries"), list) and (
+                "count" not in data or len(data["entries"]) > RECENT_SALES_KEPT):
+            self.save_amounts(data)
+            print(f"🗜️ Trimmed amounts.json to the last {RECENT_SALES_KEPT} sales")
+
+
+    def append_history(self, entry, date=None):
+        """Append one purchase to the history and update the aggregates"""
+        with self._lock:
+            record = self.history.append(entry, date=date)
+            self._add_to_indexes(record)
+            return record
+
+
+    def _add_to_indexes(self, record):
+        """Fold a new journal record into the aggregates and the query index (if loaded)"""
+        if self._aggregates is not None:
+            self._aggregates.add(record["date"], record)
+        if self._index is not None:
+            self._index.add(record["date"], {key: value for key, value in record.items() if key != "date"})
+
+
+    def read_history(self):
+        """Return the per-date history view ({date: [entries]})"""
+        return self.history.read_history()
+
+
+    def history_since(self, seq):
+        """(date, entry) purchases after the one numbered seq, oldest first (all of them for 0)
+
+        Returns None when purchase seq is no longer in the history (it was reset). Only the
+        new end of the journal is read, unless a compaction already folded some of those
+        purchases into history.json.
+        """
+        if seq and seq <= self.history.reset_seq():
+            return None     # Numbering goes on after a reset, so seq was among the purchases it removed
+        with self._lock:
+            if seq:
+                records = self.history.read_since(seq - 1)
+                if records and records[0].get("seq") in (seq, seq + 1):
+                    # Purchase seq is still in the journal, or was the last one compacted away
+                    new = records[1:] if records[0]["seq"] == seq else records
+                    return [(record.pop("date", "Unknown Date"), record) for record in new]
+                if not records:
+                    # Nothing in the journal: history.json is described by its saved aggregates
+                    # (read from disk, another process may have compacted or reset the history)
+                    saved = HistoryAggregates.load(self.aggregates_path, self.history.snapshot_signature())
+                    if saved is not None and saved.last_seq == seq:
+                        return []
+                    if saved is not None and saved.last_seq < seq:
+                        return None
+
+        # The full history (first upload, or sales compacted before they were uploaded)
+        history = self.read_history()
+        if seq and not any(entry.get("seq") == seq for entries in history.values() for entry in entries):
+            return None
+        return [(date, entry) for date, entries in history.items()
+                for entry in entries if not seq or entry.get("seq", 0) > seq]
+
+
+    def history_index(self):
+        """Date/item index of the history, built from the journal on first use"""
+        with self._lock:
+            if self._index is None:
+                self._index = HistoryIndex.from_history(self.history.read_history())
+            return self._index
+
+
+    def iter_history(self, start=None, end=None, items=None):
+        """Yield (date, entry) for purchases between start and end (inclusive), oldest first"""
+        items = None if items is None else list(items)
+        with self._lock:
+            index = self.history_index()
+            days = index.matching_days(parse_day(start), parse_day(end), items)
+        # Streamed outside the lock: a day's list only grows, and sales logged meanwhile are
+        # past the length taken above (a reset swaps in a new index, leaving this one intact)
+        yield from index.read(days, items)
+
+
+    def query_history(self, start=None, end=None, items=None):
+        """Per-date view ({date: [entries]}) of the purchases between start and end, optionally of some items"""
+        history = {}
+        for date, entry in self.iter_history(start, end, items):
+            history.setdefault(date, []).append(entry)
+        return history
+
+
+    def reset_history(self):
+        """Clear all purchase history"""
+        with self._lock:
+            self.history.reset()
+            self._index = None
+            self._aggregates = HistoryAggregates()
+            self._save_aggregates()
+
+
+    @timed("store.history_summary")
+    def history_summary(self):
+        """Per-day totals, per-item quantity/revenue and running totals (no transaction scan)"""
+        with self._lock:
+            return self.aggregates().summary()
+
+
+    def aggregates(self):
+        """Load the aggregate index, replaying only journal records newer than it"""
+        with self._lock:
+            if self._aggregates is None:
+                aggregates = HistoryAggregates.load(self.aggregates_path, self.history.snapshot_signature())
+                if aggregates is None:
+                    # Missing or stale index: rebuild it once from the full history
+                    aggregates = HistoryAggregates.from_history(self.history.read_history())
+                else:
+                    for record in self.history.read_journal():
+                        if record.get("seq", 0) > aggregates.last_seq:
+                            aggregates.add(record.get("date", "Unknown Date"), record)
+                self._aggregates = aggregates
+            return self._aggregates
+
+
+    def _save_aggregates(self):
+        """Persist the aggregate index next to the history snapshot it matches"""
+        if self._aggregates is not None:
+            self._aggregates.save(self.aggregates_path, self.history.snapshot_signature())
+
+
+    def record_sale(self, item, quantity, total_amount, stock, date=None):
+        """Persist a sale: history entry, running total and the item's remaining stock ({item: quantity})"""
+        return self.record_sales([(item, quantity, total_amount)], stock, date=date)
+
+
+    @timed("store.record_sales")
+    def record_sales(self, lines, stock, date=None):
+        """Persist a basket of (item, quantity, total) sales and the remaining stock ({item: quantity})
+
+        The JSON files cannot be updated together, so the journal (the source of truth for
+        history) is written first. Use the SQLite backend for a single atomic transaction.
+        """
+        with self._lock:
+            records = self.history.append_many(
+                [{"quantity": quantity, "item": item, "total": total} for item, quantity, total in lines], date=date)
+            for record in records:
+                self._add_to_indexes(record)
+
+            try:
+                data = self.load_amounts()
+            except (json.JSONDecodeError, ValueError):
+                data = empty_amounts()
+            data = add_sales(data, lines)
+            self.save_amounts(data)
+
+            inventory = self._written_inventory()
+            for item, quantity in stock.items():
+                if isinstance(inventory.get(item), dict):
+                    inventory[item]["quantity"] = quantity
+                elif item in inventory:
+                    inventory[item] = quantity  # Old format (integer quantity)
+            self._write_inventory(inventory)
+            return data
+
+
+    def data_version(self):
+        """Cheap signature that changes whenever totals or history change"""
+        version = []
+        for path in (self.amounts_path, self.history_path, self.history.journal_path):
+            try:
+                stat = path.stat()
+                version.append((stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                version.append(None)
+        return tuple(version)
+
+
+    def close(self):
+        """Flush pending writes and compact the history journal (when this store owns it)"""
+        with self._lock:
+            if not self.compact:
+                # Another process (the GUI) may have the journal open: never fold or unlink it
+                self.history.close()
+                return
+            self.aggregates()
+            self.history.close(compact=True)
+            self._save_aggregates()
+
+
+class SQLiteStore:
+    """Storage backend keeping inventory, totals and history in one SQLite database (WAL mode)"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS items (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL UNIQUE,
+            display_name TEXT,
+            image TEXT,
+            price REAL NOT NULL DEFAULT 100,
+            quantity INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE TABLE IF NOT EXISTS totals (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            total REAL NOT NULL DEFAULT 0,
+            count INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE TABLE IF NOT EXISTS amount_entries (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            item TEXT NOT NULL,
+            quantity INTEGER NOT NULL,
+            total REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS history (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            date TEXT NOT NULL,
+            item TEXT NOT NULL,
+            quantity INTEGER NOT NULL,
+            total REAL NOT NULL,
+            ts TEXT,
+            day TEXT NOT NULL DEFAULT ''
+        );
+        CREATE INDEX IF NOT EXISTS history_date ON history (date);
+        CREATE INDEX IF NOT EXISTS history_item ON history (item);
+        CREATE TABLE IF NOT EXISTS daily_totals (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            date TEXT NOT NULL UNIQUE,
+            total REAL NOT NULL DEFAULT 0,
+            count INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE TABLE IF NOT EXISTS item_totals (
+            item TEXT PRIMARY KEY,
+            quantity INTEGER NOT NULL DEFAULT 0,
+            revenue REAL NOT NULL DEFAULT 0
+        );
+        INSERT OR IGNORE INTO totals (id, total) VALUES (1, 0);
+    """
+
+    # Keeps the aggregate tables in step with every history insert (same transaction)
+    AGGREGATE_SQL = (
+        """INSERT INTO daily_totals (date, total, count) VALUES (?, ?, 1)
+           ON CONFLICT (date) DO UPDATE SET total = total + excluded.total, count = count + 1""",
+        """INSERT INTO item_totals (item, quantity, revenue) VALUES (?, ?, ?)
+           ON CONFLICT (item) DO UPDATE SET quantity = quantity + excluded.quantity,
+                                            revenue = revenue + excluded.revenue""",
+    )
+
+    def __init__(self, db_path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")   # Durable at checkpoints, safe against corruption in WAL mode
+        self.conn.executescript(self.SCHEMA)
+        self._add_query_columns()
+        self._bound_amount_entries()
+        self._rebuild_aggregates_if_missing()
+
+
+    @timed("store.load_inventory")
+    def load_inventory(self):
+        """Load the inventory dict in insertion order"""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT name, display_name, image, price, quantity FROM items ORDER BY id").fetchall()
+
+        inventory = {}
+        for name, display_name, image, price, quantity in rows:
+            if isinstance(price, float) and price.is_integer():
+                price = int(price)  # REAL column: keep whole prices as int, like the JSON records
+            data = {"price": price, "quantity": quantity}
+            if display_name is not None:
+                data["name"] = display_name
+            if image is not None:
+                data["image"] = image
+            inventory[name] = data
+        return inventory
+
+
+    @timed("store.save_inventory")
+    def save_inventory(self, inventory):
+        """Upsert every item and delete the ones no longer in the inventory"""
+        rows = []
+        for name, data in inventory.items():
+            if isinstance(data, int):   # Old format (integer quantity)
+                data = {"quantity": data}
+            rows.append((name, data.get("name"), data.get("image"),
+                         data.get("price", 100), data.get("quantity", 0)))
+
+        with self._lock, self._transaction():
+            self.conn.executemany("""
+                INSERT INTO items (name, display_name, image, price, quantity) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (name) DO UPDATE SET
+                    display_name = excluded.display_name, image = excluded.image,
+                    price = excluded.price, quantity = excluded.quantity
+            """, rows)
+
+            # Remove items that were deleted or renamed
+            kept = {row[0] for row in rows}
+            stale = [(name,) for (name,) in self.conn.execute("SELECT name FROM items") if name not in kept]
+            self.conn.executemany("DELETE FROM items WHERE name = ?", stale)
+
+
+    @timed("store.save_items")
+    def save_items(self, changes):
+        """Upsert these items ({id: record}) and delete the ones mapped to None"""
+        rows, removed = [], []
+        for name, data in changes.items():
+            if data is None:
+                removed.append((name,))
+                continue
+            if isinstance(data, int):   # Old format (integer quantity)
+                data = {"quantity": data}
+            rows.append((name, data.get("name"), data.get("image"),
+                         data.get("price", 100), data.get("quantity", 0)))
+
+        with self._lock, self._transaction():
+            self.conn.executemany("""
+                INSERT INTO items (name, display_name, image, price, quantity) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (name) DO UPDATE SET
+                    display_name = excluded.display_name, image = excluded.image,
+                    price = excluded.price, quantity = excluded.quantity
+            """, rows)
+            self.conn.executemany("DELETE FROM items WHERE name = ?", removed)
+
+
+    def load_amounts(self):
+        """Load the running total and the recent sales"""
+        with self._lock:
+            total, count = self.conn.execute("SELECT total, count FROM totals WHERE id = 1").fetchone()
+            entries = self.conn.execute("SELECT item, quantity, total FROM amount_entries ORDER BY id").fetchall()
+
+        return {
+            "total": total,
+            "count": count,
+            "entries": [{"item": item, "quantity": quantity, "total": amount} for item, quantity, amount in entries]
+        }
+
+
+    def save_amounts(self, data):
+        """Replace the running total and the recent sales"""
+        data = bounded_amounts(data)
+        with self._lock, self._transaction():
+            self.conn.execute("UPDATE totals SET total = ?, count = ? WHERE id = 1", (data["total"], data["count"]))
+            self.conn.execute("DELETE FROM amount_entries")
+            self.conn.executemany(
+                "INSERT INTO amount_entries (item, quantity, total) VALUES (?, ?, ?)",
+                [(e.get("item"), e.get("quantity", 0), e.get("total", 0)) for e in data["entries"]])
+
+
+    def append_history(self, entry, date=None):
+        """Append one purchase to the history"""
+        record = {"date": date or _today(), "ts": now_timestamp(), **entry}
+        with self._lock, self._transaction():
+            cursor = self.conn.execute(
+                "INSERT INTO history (date, ts, day, item, quantity, total) VALUES (?, ?, ?, ?, ?, ?)",
+                (record["date"], record["ts"], iso_day(record["date"]), record["item"], record["quantity"], record["total"]))
+            self._add_to_aggregates(record["date"], record["item"], record["quantity"], record["total"])
+        record["seq"] = cursor.lastrowid
+        return record
+
+
+    def read_history(self):
+        """Return the per-date history view ({date: [entries]})"""
+        with self._lock:
+            rows = self.conn.execute("SELECT seq, date, item, quantity, total FROM history ORDER BY seq").fetchall()
+
+        history = {}
+        for seq, date, item, quantity, total in rows:
+            history.setdefault(date, []).append({"seq": seq, "quantity": quantity, "item": item, "total": total})
+        return history
+
+
+    def iter_history(self, start=None, end=None, items=None, batch_size=1000):
+        """Yield (date, entry) for purchases between start and end (inclusive), oldest first
+
+        Range and item filters use the (day, item) index. Rows are streamed in batches from a
+        separate read connection, so a long export never holds the store lock and, in WAL
+        mode, never blocks new sales from being written.
+        """
+        query = "SELECT seq, date, ts, item, quantity, total FROM history WHERE day >= ? AND day <= ?"
+        params = [parse_day(start) or "", parse_day(end) or "9999-12-31"]
+        if items is not None:
+            items = list(items)
+            query += f" AND item IN ({', '.join('?' * len(items))})"
+            params += items
+        query += " ORDER BY day, seq"
+
+        conn = sqlite3.connect(self.db_path)
+        try:
+            cursor = conn.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    return
+                for seq, date, ts, item, quantity, total in rows:
+                    yield date, {"seq": seq, "ts": ts, "quantity": quantity, "item": item, "total": total}
+        finally:
+            conn.close()
+
+
+    def history_since(self, seq):
+        """(date, entry) purchases after the one numbered seq, oldest first (None if it was deleted by a reset)"""
+        with self._lock:
+            # All of them for 0 (entries migrated from legacy JSON history are numbered up to 0)
+            rows = self.conn.execute("SELECT seq, date, ts, item, quantity, total FROM history WHERE seq >= ? ORDER BY seq",
+                                     (seq if seq else -sys.maxsize,)).fetchall()
+        if seq:
+            if not rows or rows[0][0] != seq:
+                return None
+            rows = rows[1:]
+        return [(date, {"seq": row_seq, "ts": ts, "quantity": quantity, "item": item, "total": total})
+                for row_seq, date, ts, item, quantity, total in rows]
+
+
+    def query_history(self, start=None, end=None, items=None):
+        """Per-date view ({date: [entries]}) of the purchases between start and end, optionally of some items"""
+        history = {}
+        for date, entry in self.iter_history(start, end, items):
+            history.setdefault(date, []).append(entry)
+        return history
+
+
+    def reset_history(self):
+        """Clear all purchase history"""
+        with self._lock, self._transaction():
+            self.conn.execute("DELETE FROM history")
+            self.conn.execute("DELETE FROM daily_totals")
+            self.conn.execute("DELETE FROM item_totals")
+
+
+    @timed("store.history_summary")
+    def history_summary(self):
+        """Per-day totals, per-item quantity/revenue and running totals (no transaction scan)"""
+        with self._lock:
+            days = self.conn.execute("SELECT date, total, count FROM daily_totals ORDER BY id").fetchall()
+            items = self.conn.execute("SELECT item, quantity, revenue FROM item_totals").fetchall()
+
+        return {
+            "days": {date: {"total": total, "count": count} for date, total, count in days},
+            "items": {item: {"quantity": quantity, "revenue": revenue} for item, quantity, revenue in items},
+            "total": sum(total for date, total, count in days),
+            "count": sum(count for date, total, count in days)
+        }
+
+
+    def _add_to_aggregates(self, date, item, quantity, total):
+        """Update daily and per-item totals (call inside the history transaction)"""
+        self.conn.execute(self.AGGREGATE_SQL[0], (date, total))
+        self.conn.execute(self.AGGREGATE_SQL[1], (item, quantity, total))
+
+
+    def _add_query_columns(self):
+        """Add the ISO day/timestamp columns and their index to databases created before them"""
+        with self._lock:
+            columns = {row[1] for row in self.conn.execute("PRAGMA table_info(history)")}
+            with self._transaction():
+                if "ts" not in columns:
+                    self.conn.execute("ALTER TABLE history ADD COLUMN ts TEXT")
+                if "day" not in columns:
+                    self.conn.execute("ALTER TABLE history ADD COLUMN day TEXT NOT NULL DEFAULT ''")
+                    # Backfill one UPDATE per distinct date key
+                    dates = [date for (date,) in self.conn.execute("SELECT DISTINCT date FROM history")]
+                    self.conn.executemany("UPDATE history SET day = ? WHERE date = ?",
+                                          [(iso_day(date), date) for date in dates])
+                self.conn.execute("CREATE INDEX IF NOT EXISTS history_day_item ON history (day, item)")
+
+
+    def _trim_amount_entries(self):
+        """Keep only the most recent sales in amount_entries (call inside a transaction)"""
+        self.conn.execute("DELETE FROM amount_entries WHERE id <= (SELECT MAX(id) FROM amount_entries) - ?",
+                          (RECENT_SALES_KEPT,))
+
+
+    def _bound_amount_entries(self):
+        """Add the sale count to databases created before it and drop their old amount entries"""
+        with self._lock:
+            columns = {row[1] for row in self.conn.execute("PRAGMA table_info(totals)")}
+            with self._transaction():
+                if "count" not in columns:
+                    self.conn.execute("ALTER TABLE totals ADD COLUMN count INTEGER NOT NULL DEFAULT 0")
+                    self.conn.execute("UPDATE totals SET count = (SELECT COUNT(*) FROM amount_entries) WHERE id = 1")
+                self._trim_amount_entries()
+
+
+    def _rebuild_aggregates_if_missing(self):
+        """Fill the aggregate tables for databases created before they existed"""
+        with self._lock:
+            has_history = self.conn.execute("SELECT 1 FROM history LIMIT 1").fetchone()
+            has_totals = self.conn.execute("SELECT 1 FROM daily_totals LIMIT 1").fetchone()
+            if not has_history or has_totals:
+                return
+
+            with self._transaction():
+                self.conn.execute("""
+                    INSERT INTO daily_totals (date, total, count)
+                    SELECT date, SUM(total), COUNT(*) FROM history GROUP BY date ORDER BY MIN(seq)
+                """)
+                self.conn.execute("""
+                    INSERT INTO item_totals (item, quantity, revenue)
+                    SELECT item, SUM(quantity), SUM(total) FROM history GROUP BY item
+                """)
+
+
+    def record_sale(self, item, quantity, total_amount, stock, date=None):
+        """Persist a sale (stock, running total and history) in a single transaction"""
+        return self.record_sales([(item, quantity, total_amount)], stock, date=date)
+
+
+    @timed("store.record_sales")
+    def record_sales(self, lines, stock, date=None):
+        """Persist a basket of (item, quantity, total) sales and the remaining stock ({item: quantity}) in a single transaction"""
+        date = date or _today()
+        ts = now_timestamp()
+        remaining = [(quantity, item) for item, quantity in stock.items()]
+
+        with self._lock, self._transaction():
+            self.conn.executemany("UPDATE items SET quantity = ? WHERE name = ?", remaining)
+            self.conn.execute("UPDATE totals SET total = total + ?, count = count + ? WHERE id = 1",
+                              (sum(total for item, quantity, total in lines), len(lines)))
+            self.conn.executemany("INSERT INTO amount_entries (item, quantity, total) VALUES (?, ?, ?)", lines)
+            self._trim_amount_entries()
+            self.conn.executemany(
+                "INSERT INTO history (date, ts, day, item, quantity, total) VALUES (?, ?, ?, ?, ?, ?)",
+                [(date, ts, iso_day(date), item, quantity, total) for item, quantity, total in lines])
+            for item, quantity, total in lines:
+                self._add_to_aggregates(date, item, quantity, total)
+            total = self.conn.execute("SELECT total FROM totals WHERE id = 1").fetchone()[0]
+
+        return {"total": total}
+
+
+    def data_version(self):
+        """Cheap signature that changes whenever this or another connection commits"""
+        with self._lock:
+            external = self.conn.execute("PRAGMA data_version").fetchone()[0]
+            return (external, self.conn.total_changes)
+
+
+    def close(self):
+        """Checkpoint the WAL and close the database"""
+        with self._lock:
+            self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self.conn.close()
+
+
+    @contextmanager
+    def _transaction(self):
+        """Wrap statements in BEGIN IMMEDIATE ... COMMIT (ROLLBACK on error)"""
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield self.conn
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+
+
+def _today():
+    """Date key used by the per-date history view"""
+    return datetime.datetime.now().strftime(DATE_KEY_FORMAT)
+
+
+def migrate_json_to_sqlite(inventory_dir, db_path=None):
+    """One-shot migration of inventory.json, amounts.json and the history journal into SQLite"""
+    inventory_dir = Path(inventory_dir)
+    db_path = Path(db_path) if db_path else inventory_dir / "inventory.db"
+
+    source = JsonStore(inventory_dir, compact=False)   # Read-only: the JSON files are left as they are
+    target = SQLiteStore(db_path)
+
+    try:
+        inventory = source.load_inventory()
+    except (json.JSONDecodeError, ValueError):
+        inventory = {}
+    try:
+        amounts = source.load_amounts()
+    except (json.JSONDecodeError, ValueError):
+        amounts = empty_amounts()
+    history = source.read_history()
+
+    with target._lock, target._transaction():
+        target.conn.execute("DELETE FROM items")
+        target.conn.execute("DELETE FROM history")
+        target.conn.execute("DELETE FROM daily_totals")
+        target.conn.execute("DELETE FROM item_totals")
+    target.save_inventory(inventory)
+    target.save_amounts(amounts)
+
+    # Purchases keep their journal numbers, so a saved Firebase sync mark stays valid. Legacy
+    # entries (saved before numbering) come first, numbered up to 0 to keep them in order.
+    entries = [(date, entry) for date, day_entries in history.items() for entry in day_entries]
+    legacy_seq = -sum(1 for date, entry in entries if not entry.get("seq"))
+    rows = []
+    for date, entry in entries:
+        seq = entry.get("seq")
+        if not seq:
+            seq = legacy_seq = legacy_seq + 1
+        rows.append((seq, date, entry.get("ts"), iso_day(date), entry.get("item", "Unknown Item"),
+                     entry.get("quantity", 0), entry.get("total", 0)))
+    rows.sort()
+
+    with target._lock, target._transaction():
+        target.conn.executemany(
+            "INSERT INTO history (seq, date, ts, day, item, quantity, total) VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        # Numbers removed by a JSON history reset are not handed out again either
+        reset_seq = source.history.reset_seq()
+        if reset_seq > max((row[0] for row in rows), default=0):
+            target.conn.execute("DELETE FROM sqlite_sequence WHERE name = 'history'")
+            target.conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('history', ?)", (reset_seq,))
+    target._rebuild_aggregates_if_missing()
+
+    print(f"✅ Migrated {len(inventory)} items and {sum(map(len, history.values()))} history entries to {db_path}")
+    return target
+
+
+def open_store(inventory_dir, backend=None, compact=True):
+    """Open the configured storage backend ("json" or "sqlite", default from INVENTORY_STORAGE)"""
+    inventory_dir = Path(inventory_dir)
+    backend = (backend or os.environ.get("INVENTORY_STORAGE", "json")).lower()
+
+    if backend == "sqlite":
+        db_path = inventory_dir / "inventory.db"
+        if not db_path.exists():
+            return migrate_json_to_sqlite(inventory_dir, db_path)  # First run: import the JSON files once
+        return SQLiteStore(db_path)
+
+    if backend == "json":
+        return JsonStore(inventory_dir, compact=compact)
+
+    raise ValueError(f"Unknown storage backend: {backend}")
+
+
+if __name__ == "__main__":
+    # Usage: python storage.py migrate [inventory_dir]
+    if len(sys.argv) >= 2 and sys.argv[1] == "migrate":
+        directory = sys.argv[2] if len(sys.argv) > 2 else os.path.join(os.getcwd(), "inventory")
+        migrate_json_to_sqlite(directory).close()
+    else:
+        print("Usage: python storage.py migrate [inventory_dir]")
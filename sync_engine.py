@@ -0,0 +1,407 @@
+import hashlib
+import json
+import threading
+import time
+
+from pathlib import Path
+from instrumentation import count, count_payload, timed, timer
+from storage import empty_amounts
+
+
+def apply_event(tree, event_type, path, data):
+    """Apply a Realtime Database "put"/"patch" event to a local copy of the tree"""
+    keys = [key for key in path.split("/") if key]
+
+    if not keys:
+        if event_type == "put":
+            return dict(data) if isinstance(data, dict) else {}
+        parent, leaf = None, None
+        node = tree
+    else:
+        parent = tree
+        for key in keys[:-1]:
+            if not isinstance(parent.get(key), dict):
+                parent[key] = {}
+            parent = parent[key]
+        leaf = keys[-1]
+
+        if event_type == "put":
+            if data is None:
+                parent.pop(leaf, None)
+            else:
+                parent[leaf] = data
+            return tree
+
+        if not isinstance(parent.get(leaf), dict):
+            parent[leaf] = {}
+        node = parent[leaf]
+
+    # Patch: merge children, None deletes a child
+    for key, value in (data or {}).items():
+        if value is None:
+            node.pop(key, None)
+        else:
+            node[key] = value
+    return tree
+
+
+def flatten(data, depth=2, prefix=""):
+    """Flatten nested dicts/lists into {"a/b": value} paths down to the given depth"""
+    if depth == 0 or not isinstance(data, (dict, list)) or not data:
+        return {prefix: data} if prefix else {}
+
+    children = data.items() if isinstance(data, dict) else enumerate(data)
+    flat = {}
+    for key, value in children:
+        path = f"{prefix}/{key}" if prefix else str(key)
+        flat.update(flatten(value, depth - 1, path))
+    return flat
+
+
+class DeltaTracker:
+    """Remembers what was last uploaded for each child path so only changed children are sent"""
+
+    def __init__(self, depth=2):
+        self.depth = depth
+        self.sent = {}  # path -> fingerprint of the value last uploaded
+
+
+    def diff(self, data):
+        """Return ({path: value} to upload, {path: fingerprint} to remember once it succeeds)"""
+        flat = flatten(data, self.depth)
+        fingerprints = {path: _fingerprint(value) for path, value in flat.items()}
+
+        changes = {path: flat[path] for path, fp in fingerprints.items() if self.sent.get(path) != fp}
+        for path in self.sent:
+            if path not in flat:
+                changes[path] = None    # Removed locally, delete remotely
+        return changes, fingerprints
+
+
+    def commit(self, fingerprints):
+        """Record a successful upload"""
+        self.sent = fingerprints
+
+
+def _fingerprint(value):
+    return hashlib.sha1(json.dumps(value, sort_keys=True, default=str).encode("utf-8")).digest()
+
+
+class HistoryMark:
+    """High-water mark of the uploaded history, persisted so a restart only sends newer purchases
+
+    The remote history keeps its per-date lists (history/<date>/<index>): the number of
+    entries already uploaded for a date is the index of its next one.
+    """
+
+    def __init__(self, path=None):
+        self.path = Path(path) if path else None
+        self.seq = 0        # Sequence number of the last uploaded purchase (0: none, or only legacy unnumbered ones)
+        self.counts = {}    # date -> entries uploaded for that date
+        self._load()
+
+
+    def writes(self, records):
+        """({"<date>/<index>": entry}, state after them) for new (date, entry) records"""
+        seq, counts = self.seq, dict(self.counts)
+        writes = {}
+        for date, entry in records:
+            index = counts.get(date, 0)
+            writes[f"{date}/{index}"] = entry
+            counts[date] = index + 1
+            seq = max(seq, entry.get("seq", 0))
+        return writes, (seq, counts)
+
+
+    def commit(self, state):
+        """Record an upload (once it is in the outbox or sent)"""
+        self.seq, self.counts = state
+        if self.path is None:
+            return
+        temp_file = self.path.with_suffix(".tmp")
+        with temp_file.open("w", encoding="utf-8") as file:
+            json.dump({"seq": self.seq, "counts": self.counts}, file)
+        temp_file.replace(self.path)
+
+
+    def _load(self):
+        if self.path is None or not self.path.exists():
+            return
+        try:
+            with self.path.open("r", encoding="utf-8") as file:
+                data = json.load(file)
+            self.seq, self.counts = int(data["seq"]), dict(data["counts"])
+        except (OSError, ValueError, KeyError, TypeError):
+            print("⚠️ History sync state is corrupted, the history will be uploaded again")
+
+
+class SyncEngine:
+    """Change-driven Firebase sync: streamed inbound deltas, dirty-tracked outbound updates"""
+
+    def __init__(self, store, inventory_ref, amounts_ref, history_ref, on_change=None,
+                 root_ref=None, outbox=None, poll_interval=3, max_backoff=60, check_interval=1,
+                 retry_stream_after=60, batch_delay=0.5, history_mark_path=None):
+        self.store = store
+        self.inventory_ref = inventory_ref
+        self.amounts_ref = amounts_ref
+        self.history_ref = history_ref
+        self.on_change = on_change                  # Called after the local inventory was updated
+        self.root_ref = root_ref                    # Used for multi-path updates of the outbox
+        self.outbox = outbox                        # Persistent queue of pending writes (optional)
+        self.batch_delay = batch_delay              # Time to collect more writes before a flush
+        self.poll_interval = poll_interval          # Fallback polling interval (seconds)
+        self.max_backoff = max_backoff              # Longest wait between failed attempts
+        self.check_interval = check_interval        # How often local data is checked for changes
+        self.retry_stream_after = retry_stream_after
+
+        self.inventory = {}     # Local mirror of the remote inventory tree
+        self.amounts_tracker = DeltaTracker()
+        self.history_mark = HistoryMark(history_mark_path)    # Last uploaded purchase (kept across runs)
+
+        self._listener = None
+        self._local_version = None
+        self._dirty = threading.Event()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+
+    def start(self):
+        """Start the inbound listener (or polling fallback) and the outbound worker"""
+        if not self.start_listener():
+            threading.Thread(target=self.poll_for_changes, daemon=True).start()
+        threading.Thread(target=self.push_local_changes, daemon=True).start()
+        if self.outbox is not None:
+            threading.Thread(target=self.flush_outbox, daemon=True).start()
+
+
+    def stop(self):
+        """Stop listening and pushing"""
+        self._stop.set()
+        self._dirty.set()
+        if self.outbox is not None:
+            self.outbox.ready.set()
+        if self._listener is not None:
+            self._listener.close()
+            self._listener = None
+
+
+    def notify_local_change(self):
+        """Wake the outbound worker right away (e.g. after a sale)"""
+        self._dirty.set()
+
+
+    def write_item(self, item_name, data):
+        """Queue an inventory write (None deletes) and apply it locally right away"""
+        self.outbox.put(f"inventory/{item_name}", data)
+        with self._lock:
+            self.inventory = apply_event(self.inventory, "put", f"/{item_name}", data)
+            self._save_inventory()
+
+
+    # Inbound ----------------------------------------------------------------
+
+    def start_listener(self):
+        """Stream inventory changes from Firebase; returns False when streaming is unavailable"""
+        try:
+            count("net.calls")
+            self._listener = self.inventory_ref.listen(self._on_event)
+            print("📡 Listening for inventory changes")
+            return True
+        except Exception as e:
+            print(f"⚠️ Streaming unavailable, falling back to polling: {e}")
+            self._listener = None
+            return False
+
+
+    @timed("sync.on_event")
+    def _on_event(self, event):
+        """Apply one streamed delta to the local inventory"""
+        count("net.events")
+        count_payload("net.bytes_received", event.data)
+        with self._lock:
+            self.inventory = apply_event(self.inventory, event.event_type, event.path, event.data)
+            self.inventory = self._overlay_pending(self.inventory)
+            self._save_inventory()
+
+
+    def _overlay_pending(self, inventory):
+        """Re-apply queued local item writes so stale remote data does not undo them"""
+        if self.outbox is None:
+            return inventory
+        for path, value in self.outbox.pending().items():
+            if path.startswith("inventory/"):
+                inventory = apply_event(inventory, "put", path[len("inventory"):], value)
+        return inventory
+
+
+    def poll_for_changes(self):
+        """Fallback: poll the inventory, backing off while Firebase is unreachable"""
+        delay = self.poll_interval
+        last_stream_attempt = time.monotonic()
+
+        while not self._stop.is_set():
+            try:
+                count("net.calls")
+                remote = self.inventory_ref.get() or {}
+                count_payload("net.bytes_received", remote)
+                remote = self._overlay_pending(remote)
+                with self._lock:
+                    if remote != self.inventory:
+                        self.inventory = remote
+                        self._save_inventory()
+                delay = self.poll_interval
+            except Exception as e:
+                delay = min(delay * 2, self.max_backoff)
+                print(f"⚠️ Error while polling Firebase (retrying in {delay}s): {e}")
+
+            # Switch back to streaming once it is available again
+            if time.monotonic() - last_stream_attempt >= self.retry_stream_after:
+                last_stream_attempt = time.monotonic()
+                if self.start_listener():
+                    return
+
+            self._stop.wait(delay)
+
+
+    def _save_inventory(self):
+        """Write the mirrored inventory locally and notify the GUI"""
+        if not self.inventory:
+            print("⚠️ No inventory data found in Firebase")
+            return
+
+        self.store.save_inventory(self.inventory)
+        print("✅ Synced inventory from Firebase")
+        if self.on_change:
+            self.on_change()
+
+
+    # Outbound ---------------------------------------------------------------
+
+    def push_local_changes(self):
+        """Upload changed amounts/history children whenever local data changes"""
+        delay = self.check_interval
+
+        while not self._stop.is_set():
+            self._dirty.wait(delay)
+            self._dirty.clear()
+            if self._stop.is_set():
+                return
+
+            try:
+                version = self.store.data_version()
+                if version != self._local_version:
+                    self.push_amounts()
+                    self.push_history()
+                    self._local_version = version
+                delay = self.check_interval
+            except Exception as e:
+                delay = min(max(delay, 1) * 2, self.max_backoff)
+                print(f"⚠️ Error while syncing to Firebase (retrying in {delay}s): {e}")
+
+
+    @timed("sync.push_amounts")
+    def push_amounts(self):
+        """Send only the amounts children that changed"""
+        try:
+            amounts = self.store.load_amounts()
+        except (json.JSONDecodeError, ValueError):
+            amounts = empty_amounts()
+        if not self.amounts_tracker.sent:
+            # Replace the node once per run: drops entries left over from when every sale was listed
+            self._set(self.amounts_ref, "amounts", amounts)
+            self.amounts_tracker.commit(self.amounts_tracker.diff(amounts)[1])
+            return
+        self._push(self.amounts_ref, self.amounts_tracker, amounts, "amounts")
+
+
+    @timed("sync.push_history")
+    def push_history(self):
+        """Send only the purchases newer than the last uploaded one, in one multi-path update"""
+        mark = self.history_mark
+        if mark.seq == 0 and mark.counts:
+            # Only legacy (unnumbered) purchases were uploaded so far: every numbered one is new,
+            # and fewer legacy purchases than were uploaded means the history was reset
+            records = self.store.history_since(0)
+            new = [(date, entry) for date, entry in records if entry.get("seq", 0) > 0]
+            records = new if len(records) - len(new) == sum(mark.counts.values()) else None
+        else:
+            records = self.store.history_since(mark.seq)
+        if records is None:
+            # The history was reset: replace the remote copy with what is left
+            mark.commit((0, {}))
+            records = self.store.history_since(0)
+            history = {}
+            for date, entry in records:
+                history.setdefault(date, []).append(entry)
+            self._set(self.history_ref, "history", history or ["No history yet"])
+            mark.commit(mark.writes(records)[1])
+            return
+        if not records:
+            return
+
+        writes, state = mark.writes(records)
+        if not mark.counts:
+            writes["0"] = None  # Drop the "No history yet" placeholder
+        if self.outbox is not None:
+            self.outbox.put_many({f"history/{path}": value for path, value in writes.items()})
+        else:
+            count("net.calls")
+            count_payload("net.bytes_sent", writes)
+            self.history_ref.update(writes)
+        print(f"✅ Synced {len(records)} new history entries to Firebase")
+        mark.commit(state)
+
+
+    def _push(self, ref, tracker, data, name):
+        changes, fingerprints = tracker.diff(data)
+        if changes and self.outbox is not None:
+            # Queue the changes; the outbox worker uploads them (and retries while offline)
+            self.outbox.put_many({f"{name}/{path}": value for path, value in changes.items()})
+        elif changes:
+            count("net.calls")
+            count_payload("net.bytes_sent", changes)
+            ref.update(changes)     # One multi-path update with only the changed children
+            print(f"✅ Synced {len(changes)} changed {name} entries to Firebase")
+        tracker.commit(fingerprints)
+
+
+    def _set(self, ref, name, value):
+        """Replace a whole node (through the outbox when there is one)"""
+        if self.outbox is not None:
+            self.outbox.put(name, value)
+            return
+
+        count("net.calls")
+        count_payload("net.bytes_sent", value)
+        if value is None:
+            ref.delete()
+        else:
+            ref.set(value)
+
+
+    def flush_outbox(self):
+        """Upload queued writes in batched multi-path updates, backing off while offline"""
+        delay = self.check_interval
+
+        while not self._stop.is_set():
+            self.outbox.ready.wait()
+            if self._stop.is_set():
+                return
+            self._stop.wait(self.batch_delay)  # Let a burst of writes coalesce first
+
+            pending = self.outbox.pending()
+            if not pending:
+                continue
+
+            try:
+                count("net.calls")
+                count_payload("net.bytes_sent", pending)
+                with timer("sync.upload"):
+                    self.root_ref.update(pending)
+                self.outbox.acknowledge(pending)
+                print(f"✅ Uploaded {len(pending)} queued changes to Firebase")
+                delay = self.check_interval
+            except Exception as e:
+                delay = min(max(delay, 1) * 2, self.max_backoff)
+                print(f"⚠️ Firebase upload failed, {len(pending)} changes kept offline (retrying in {delay}s): {e}")
+                self._stop.wait(delay)
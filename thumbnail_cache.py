@@ -0,0 +1,193 @@
+import customtkinter as ctk
+import hashlib
+import os
+
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from asset_store import HASH_NAME
+from instrumentation import timed
+
+
+class ThumbnailCache:
+    """Caches rounded product thumbnails on disk and their CTkImage objects in memory
+
+    Given a dispatch function (UIDispatcher.call), thumbnails that are not in memory are
+    prepared (decode, resize, round corners, encode to the disk cache) on a thread pool;
+    Pillow releases the GIL for that work, so several images are processed in parallel
+    while the Tk thread keeps painting.
+    """
+
+    def __init__(self, cache_dir, size=(280, 280), radius=30, max_images=512, dispatch=None, workers=None):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.size = size
+        self.radius = radius
+        self.max_images = max_images
+        self.dispatch = dispatch        # Runs a callback on the Tk thread; without it get() loads synchronously
+
+        self._images = OrderedDict()    # LRU: (path, mtime, file size) -> CTkImage
+        self._mask = None               # Rounded mask shared by every card
+        self._placeholder = None        # Grey placeholder shared by every card
+        self._loading = {}              # Key -> {waiter: callback} for a thumbnail being prepared (Tk thread only)
+        self._pool = None
+        if dispatch is not None:
+            self._pool = ThreadPoolExecutor(max_workers=workers or min(4, os.cpu_count() or 1),
+                                            thread_name_prefix="thumbnails")
+
+
+    def get(self, image_path, on_ready=None, waiter=None):
+        """Return the CTkImage for an item image (or the shared placeholder if it is missing)
+
+        With on_ready and a worker pool, a thumbnail that is not in memory yet is prepared in
+        the background: the placeholder is returned now and on_ready(image) runs on the Tk
+        thread once it is done. Requests are served in order, so the first cards come first.
+        Asking again for the same waiter (e.g. an item ID) while it loads replaces its callback.
+        """
+        try:
+            stat = os.stat(image_path)
+        except (OSError, TypeError, ValueError):
+            return self.placeholder()
+
+        key = (os.path.abspath(image_path), stat.st_mtime_ns, stat.st_size)
+
+        # In-memory hit: no PIL work at all
+        image = self._images.get(key)
+        if image is not None:
+            self._images.move_to_end(key)
+            return image
+
+        if on_ready is None or self._pool is None:
+            return self._remember(key, self._load_thumbnail(image_path, key))
+
+        waiter = on_ready if waiter is None else waiter
+        waiting = self._loading.get(key)
+        if waiting is not None:
+            waiting[waiter] = on_ready  # Already being prepared (e.g. the same image on several items)
+        else:
+            self._loading[key] = {waiter: on_ready}
+            self.mask()     # Built here, so the workers only read it
+            future = self._pool.submit(self._load_thumbnail, image_path, key)
+            future.add_done_callback(lambda done: self.dispatch(self._loaded, key, done))
+        return self.placeholder()
+
+
+    def shutdown(self):
+        """Drop queued thumbnail work (the app is closing)"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+    def _remember(self, key, thumbnail):
+        """Wrap a PIL thumbnail in a CTkImage and keep it in the LRU (Tk thread)"""
+        image = ctk.CTkImage(light_image=thumbnail, size=self.size)
+        self._images[key] = image
+        if len(self._images) > self.max_images:
+            self._images.popitem(last=False)  # Drop the least recently used image
+        return image
+
+
+    def _loaded(self, key, future):
+        """A background thumbnail is done: hand it to the cards waiting for it (Tk thread)"""
+        callbacks = self._loading.pop(key, {}).values()
+        if future.cancelled():
+            return
+        try:
+            image = self._remember(key, future.result())
+        except Exception as e:
+            print(f"⚠️ Could not load thumbnail for {key[0]}: {e}")
+            self._images[key] = self.placeholder()     # Do not retry an unreadable file on every refresh
+            return
+        for callback in callbacks:
+            callback(image)
+
+
+    def placeholder(self):
+        """Return the shared light grey placeholder image"""
+        if self._placeholder is None:
+            from PIL import Image   # Imaging is imported on first use to keep startup fast
+
+            placeholder = Image.new("RGB", self.size, color=(200, 200, 200))  # Light gray
+            self._placeholder = ctk.CTkImage(light_image=placeholder, size=self.size)
+        return self._placeholder
+
+
+    @timed("images.round_corners")
+    def round_corners(self, image):
+        """Load an image (or use provided PIL image), resize it, and apply rounded corners"""
+        from PIL import Image
+
+        if isinstance(image, (str, Path)):  # If image is a file path
+            img = Image.open(image)
+            img.draft("RGB", self.size)     # JPEGs decode at a reduced scale close to the display size
+            img = img.convert("RGBA")
+        else:   # If image is already a PIL image
+            img = image.convert("RGBA")
+
+        img = img.resize(self.size, Image.LANCZOS)
+        img.putalpha(self.mask())
+        return img
+
+
+    def mask(self):
+        """Return the shared mask with rounded corners"""
+        if self._mask is None:
+            from PIL import Image, ImageDraw
+
+            self._mask = Image.new("L", self.size, 0)
+            draw = ImageDraw.Draw(self._mask)
+            draw.rounded_rectangle((0, 0, *self.size), radius=self.radius, fill=255)
+        return self._mask
+
+
+    def derivative_path(self, image_path, key=None):
+        """Disk cache file of an image's rounded thumbnail
+
+        Content-addressed assets are named after their hash (the content cannot change);
+        other paths are keyed by path, modification time and size.
+        """
+        stem = Path(image_path).stem
+        if HASH_NAME.fullmatch(stem):
+            return self.cache_dir / f"{stem}-{self.size[0]}x{self.size[1]}-r{self.radius}.png"
+
+        if key is None:
+            stat = os.stat(image_path)
+            key = (os.path.abspath(image_path), stat.st_mtime_ns, stat.st_size)
+        digest = hashlib.sha1(repr((*key, self.size, self.radius)).encode("utf-8")).hexdigest()
+        return self.cache_dir / f"{digest}.png"
+
+
+    def prepare(self, image_path):
+        """Build the display-size derivative on disk if it is missing (no Tk objects, safe on a worker thread)"""
+        cached_path = self.derivative_path(image_path)
+        if not cached_path.exists():
+            self._save_derivative(self.round_corners(image_path), cached_path, image_path)
+        return cached_path
+
+
+    @timed("images.load_thumbnail")
+    def _load_thumbnail(self, image_path, key):
+        """Read the rounded thumbnail from the disk cache, building it on a miss"""
+        cached_path = self.derivative_path(image_path, key)
+
+        if cached_path.exists():
+            from PIL import Image
+
+            try:
+                with Image.open(cached_path) as cached:
+                    return cached.copy()
+            except OSError:
+                pass    # Corrupted cache file, rebuild it below
+
+        thumbnail = self.round_corners(image_path)
+        self._save_derivative(thumbnail, cached_path, image_path)
+        return thumbnail
+
+
+    def _save_derivative(self, thumbnail, cached_path, image_path):
+        try:
+            temp_path = cached_path.with_suffix(".tmp")
+            thumbnail.save(temp_path, format="PNG")
+            temp_path.replace(cached_path)
+        except OSError as e:
+            print(f"⚠️ Could not cache thumbnail for {image_path}: {e}")
@@ -0,0 +1,183 @@
+import customtkinter as ctk
+import math
+
+
+class VirtualGrid(ctk.CTkFrame):
+    """Scrollable card grid that only builds cards for the rows in (or near) the viewport
+
+    A fixed pool of card widgets is created once and re-bound to other items as the user
+    scrolls, so memory and widget count stay constant no matter how large the catalog is.
+    """
+
+    def __init__(self, master, create_card, bind_card, columns=5, overscan=1, row_height=None,
+                 padx=15, pady=10, fg_color="#2b2b2b", **kwargs):
+        super().__init__(master, fg_color=fg_color, **kwargs)
+        self.create_card = create_card  # create_card(parent) -> card dict with a "frame" widget
+        self.bind_card = bind_card      # bind_card(card, item) fills a card with an item's data
+        self.columns = columns
+        self.overscan = overscan        # Extra rows built above and below the viewport
+        self.row_height = row_height    # Measured from the first card when not given
+        self.padx = padx
+        self.pady = pady
+
+        self.items = []     # Item keys in grid order
+        self.pool = []      # [(card, canvas window id)]
+        self._render_pending = False
+        self._force_render = False
+
+        self.canvas = ctk.CTkCanvas(self, bg=fg_color, highlightthickness=0)
+        self.scrollbar = ctk.CTkScrollbar(self, command=self._on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y")
+        self.canvas.pack(side="left", fill="both", expand=True)
+        self.canvas.configure(yscrollcommand=self._on_canvas_scroll)
+
+        self.canvas.bind("<Configure>", lambda event: self.schedule_render(force=True))
+        # The wheel over a card is delivered to the card, so the handler is app-wide (and removed on destroy)
+        self._wheel_bindings = [(sequence, self.bind_all(sequence, self._on_mousewheel, add="+"))
+                                for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>")]   # 4/5: Linux scroll
+
+
+    def destroy(self):
+        """Remove this grid's app-wide wheel handlers (other bindings of those events are kept), then the widgets"""
+        for sequence, funcid in self._wheel_bindings:
+            if funcid is None:
+                continue
+            script = self.tk.call("bind", "all", sequence)
+            kept = "\n".join(line for line in script.split("\n") if funcid not in line)
+            self.tk.call("bind", "all", sequence, kept)
+            self.deletecommand(funcid)
+        self._wheel_bindings = []
+        super().destroy()
+
+
+    def set_items(self, items):
+        """Show these item keys (in order) and re-bind the visible cards"""
+        self.items = list(items)
+        self.render(force=True)
+
+
+    def scroll_to_top(self):
+        self.canvas.yview_moveto(0)
+
+
+    def visible_cards(self):
+        """Return the cards currently bound to an item"""
+        return [card for card, window in self.pool if card["item"] is not None]
+
+
+    def schedule_render(self, force=False):
+        """Coalesce several scroll/resize events into one render"""
+        self._force_render = self._force_render or force
+        if not self._render_pending:
+            self._render_pending = True
+            self.after_idle(self._run_scheduled_render)
+
+
+    def render(self, force=False):
+        """Bind and position pool cards for the rows around the viewport"""
+        width = max(self.canvas.winfo_width(), 1)
+        height = max(self.canvas.winfo_height(), 1)
+        column_width = width / self.columns
+
+        if not self.items:
+            self._hide_from(0)
+            self.canvas.configure(scrollregion=(0, 0, width, 0))
+            return
+
+        if self.row_height is None:
+            self._measure_row_height()
+
+        total_rows = math.ceil(len(self.items) / self.columns)
+        self.canvas.configure(scrollregion=(0, 0, width, total_rows * self.row_height))
+
+        # Rows in the viewport plus the overscan above and below it
+        top = self.canvas.canvasy(0)
+        first_row = max(0, int(top // self.row_height) - self.overscan)
+        last_row = min(total_rows, int((top + height) // self.row_height) + 1 + self.overscan)
+
+        visible_rows = math.ceil(height / self.row_height) + 1 + 2 * self.overscan
+        self._grow_pool(visible_rows * self.columns)
+
+        first_index = first_row * self.columns
+        last_index = min(len(self.items), last_row * self.columns)
+        used_slots = set()
+
+        for index in range(first_index, last_index):
+            # The same item keeps the same slot while it stays in range, so scrolling
+            # one row only re-binds the cards that wrapped around
+            slot = index % len(self.pool)
+            card, window = self.pool[slot]
+            used_slots.add(slot)
+
+            item = self.items[index]
+            if force or card["item"] != item:
+                self.bind_card(card, item)
+
+            x = (index % self.columns) * column_width + column_width / 2
+            y = (index // self.columns) * self.row_height + self.pady
+            self.canvas.coords(window, x, y)
+            self.canvas.itemconfigure(window, state="normal", width=column_width - 2 * self.padx)
+
+        for slot, (card, window) in enumerate(self.pool):
+            if slot not in used_slots:
+                card["item"] = None
+                self.canvas.itemconfigure(window, state="hidden")
+
+
+    def _run_scheduled_render(self):
+        force = self._force_render
+        self._render_pending = False
+        self._force_render = False
+        if self.winfo_exists():
+            self.render(force=force)
+
+
+    def _grow_pool(self, size):
+        """Create cards until the pool can cover the viewport"""
+        while len(self.pool) < size:
+            card = self.create_card(self.canvas)
+            window = self.canvas.create_window(0, 0, window=card["frame"], anchor="n", state="hidden")
+            self.pool.append((card, window))
+
+
+    def _hide_from(self, slot):
+        for card, window in self.pool[slot:]:
+            card["item"] = None
+            self.canvas.itemconfigure(window, state="hidden")
+
+
+    def _measure_row_height(self):
+        """Measure the height of a bound card to size the rows"""
+        self._grow_pool(1)
+        card, window = self.pool[0]
+        self.bind_card(card, self.items[0])
+        card["frame"].update_idletasks()
+        self.row_height = card["frame"].winfo_reqheight() + 2 * self.pady
+
+
+    def _on_scrollbar(self, *args):
+        self.canvas.yview(*args)
+
+
+    def _on_canvas_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        self.schedule_render()
+
+
+    def _on_mousewheel(self, event):
+        """Scroll when the wheel is used over the grid or one of its cards"""
+        widget = event.widget
+        while widget is not None:
+            if widget == self.canvas:
+                break
+            widget = getattr(widget, "master", None)
+        else:
+            return
+
+        if getattr(event, "num", None) == 4:
+            step = -1
+        elif getattr(event, "num", None) == 5:
+            step = 1
+        else:
+            step = -1 if event.delta > 0 else 1
+        self.canvas.yview_scroll(step, "units")